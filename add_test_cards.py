@@ -7,12 +7,12 @@ import requests
 import json
 from datetime import datetime
 
+from backend.scryfall_client import get_scryfall_client
+
 def get_card_data(card_name):
     """Get card data from Scryfall API"""
     try:
-        url = f"https://api.scryfall.com/cards/named"
-        params = {"fuzzy": card_name}
-        response = requests.get(url, params=params, timeout=10)
+        response = get_scryfall_client().get("/cards/named", params={"fuzzy": card_name})
         response.raise_for_status()
         return response.json()
     except Exception as e:
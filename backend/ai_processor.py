@@ -1,21 +1,22 @@
 import base64
 import os
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from types import SimpleNamespace
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
-import json
-import re
 import time
-import logging
 from datetime import datetime
+from backend.logging_config import get_logger
 from backend.set_symbol_validator import SetSymbolValidator
-from backend.vision_processor_factory import get_vision_processor_factory
+from backend.card_name_index import CORRECTION_MIN_SCORE, CardNameIndex, get_card_name_index
+from backend.vision_processor_factory import get_vision_processor_factory, parse_batch_response
+from backend.vision_prompts import (
+    CardEmitter, VisionPrompt, get_prompt, max_tokens_for, openai_response_format, parse_cards,
+    streaming_enabled, token_usage
+)
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class APIError:
     """Structure for API error information"""
@@ -39,20 +40,29 @@ class CardRecognitionAI:
     """AI-powered Magic card recognition using OpenAI Vision API"""
     
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        # Configure OpenAI client with better timeout and retry settings for Railway
-        self.client = OpenAI(
-            api_key=api_key,
-            timeout=120.0,  # Increase timeout to 2 minutes for Railway
-            max_retries=5,  # Increase retries for Railway network issues
-        )
+        self._client = None
         self.last_api_call = 0
         self.min_call_interval = 1  # Minimum seconds between API calls
         self.symbol_validator = SetSymbolValidator()  # Initialize set symbol validator
         self.last_raw_response = None  # Store the last raw AI response
+        self.structured_outputs = True  # Send the prompt's JSON schema until the API rejects it
+        
+    @property
+    def client(self):
+        """OpenAI client, created on first call - importing openai alone costs ~0.5s"""
+        if self._client is None:
+            from openai import OpenAI
+            # Configure OpenAI client with better timeout and retry settings for Railway
+            self._client = OpenAI(
+                api_key=self.api_key,
+                timeout=120.0,  # Increase timeout to 2 minutes for Railway
+                max_retries=5,  # Increase retries for Railway network issues
+            )
+        return self._client
         
     def _log_api_error(self, error: Exception, context: str = "AI processing") -> APIError:
         """Log and categorize API errors"""
@@ -83,19 +93,18 @@ class CardRecognitionAI:
         
         api_error = APIError(error_type, error_str, is_quota_error, is_rate_limit)
         
-        # Enhanced logging with more visibility
-        logger.error("=" * 80)
-        logger.error(f"🚨 AI SERVICE FAILURE - {error_type} 🚨")
-        logger.error(f"Context: {context}")
-        logger.error(f"Error: {error_str}")
-        logger.error(f"Time: {datetime.utcnow().isoformat()}")
+        hint = ""
         if is_quota_error:
-            logger.error("💰 QUOTA ISSUE - Check your OpenAI billing!")
+            hint = "check OpenAI billing"
         elif is_rate_limit:
-            logger.error("⏰ RATE LIMIT - API calls too frequent!")
+            hint = "API calls too frequent"
         elif error_type == "INVALID_REQUEST":
-            logger.error("🔑 AUTHENTICATION ISSUE - Check your API key!")
-        logger.error("=" * 80)
+            hint = "check API key"
+        logger.error(
+            "AI service failure (%s) during %s: %s",
+            error_type, context, error_str,
+            extra={"event": "ai_service_failure", "error_type": error_type, "hint": hint}
+        )
         
         return api_error
     
@@ -105,7 +114,7 @@ class CardRecognitionAI:
         time_since_last = current_time - self.last_api_call
         if time_since_last < self.min_call_interval:
             sleep_time = self.min_call_interval - time_since_last
-            logger.info(f"Rate limiting: waiting {sleep_time:.2f} seconds")
+            logger.debug("Rate limiting: waiting %.2f seconds", sleep_time)
             time.sleep(sleep_time)
         self.last_api_call = time.time()
     
@@ -114,228 +123,81 @@ class CardRecognitionAI:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
     
-    def identify_cards(self, image_path: str) -> List[Dict[str, Any]]:
-        """Identify Magic cards in an image using AI vision - single attempt, no retries"""
+    def identify_cards(self, image_path: str, max_tokens: int = 1500,
+                       on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Identify Magic cards in an image using AI vision. The output budget follows
+        the expected card count, up to max_tokens; a response cut off by the budget
+        is retried once with the full max_tokens. With on_card (and streaming on)
+        the response is streamed and on_card gets each raw card as it completes;
+        the returned list is still the complete parse.
+        """
+        started = time.time()
         try:
-            logger.info("=" * 80)
-            logger.info(f"🎯 STARTING AI CARD IDENTIFICATION")
-            logger.info(f"📁 Processing image: {image_path}")
-            logger.info(f"⏰ Timestamp: {datetime.utcnow().isoformat()}")
-            logger.info(f"📊 ENVIRONMENT: {os.getenv('ENV_MODE', 'unknown')}")
-            logger.info(f"🔑 API_KEY: {self.client.api_key[:15]}...")
-            
             # Check if image file exists
             if not os.path.exists(image_path):
-                logger.error(f"❌ IMAGE FILE NOT FOUND: {image_path}")
+                logger.error("Image file not found: %s", image_path)
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
-            # Get file info
             file_size = os.path.getsize(image_path)
-            logger.info(f"📊 FILE SIZE: {file_size} bytes ({file_size/1024/1024:.2f} MB)")
+            logger.debug("identify_cards start: %s (%d bytes)", image_path, file_size)
             
             # Apply rate limiting
             self._rate_limit_delay()
             
             # Encode the image
-            logger.info(f"🔄 ENCODING: Starting base64 encoding...")
             start_encode = time.time()
             base64_image = self.encode_image(image_path)
             encode_time = time.time() - start_encode
-            logger.info(f"✅ ENCODING: Complete in {encode_time:.2f}s")
-            logger.info(f"📊 BASE64 SIZE: {len(base64_image)} characters")
-            logger.info(f"📊 BASE64 PREVIEW: {base64_image[:100]}...")
-        
-            # Single optimized prompt
-            prompt = """
-You are an expert Magic: The Gathering card identification assistant helping with personal collection inventory management.
-
-CONTEXT: I am cataloging my personal Magic: The Gathering card collection for inventory purposes. This is completely legitimate - I own these cards and need to identify them for my personal records.
-
-TASK: Analyze this image of Magic: The Gathering cards and identify each card with detailed information.
-
-For each card you can see in the image, provide:
-1. The EXACT card name (be as precise as possible)
-2. Set information (look for set symbols, set names, or any visible set identifiers)
-3. Collector number if visible (usually bottom left or right)
-4. Any distinguishing features (foil, alternate art, special frame, etc.)
-5. Copyright date if visible (helps identify set)
-6. Any visible text that might indicate the set or version
-
-IMPORTANT SET IDENTIFICATION GUIDELINES:
-- Look carefully for set symbols (small icons usually in the middle right)
-- Check for copyright dates (e.g., "© 2019 Wizards of the Coast")
-- Look for collector numbers (e.g., "123/264")
-- Notice special frames or borders that indicate specific sets
-- Check for any text mentioning set names
-- Look for special markers like "M" for mythic rare
-- Notice if it's a promo, foil, or special version
-
-COMMON SET CLUES:
-- Modern cards often have holofoil stamps
-- Older cards may have different frame styles
-- Special sets may have unique borders or frames
-- Promo cards often have "P" or star symbols
-- Collector numbers help identify the specific set
-
-REQUIRED OUTPUT FORMAT - Return ONLY a JSON array with objects containing:
-{
-    "name": "exact card name",
-    "set": "set name or code if visible",
-    "collector_number": "collector number if visible",
-    "set_symbol_description": "description of any set symbol seen",
-    "copyright_year": "copyright year if visible",
-    "special_features": "any special features noted",
-    "confidence": "high/medium/low",
-    "notes": "any additional details that might help identify the correct version"
-}
-
-This is for personal inventory management of my own card collection. Please identify all visible Magic: The Gathering cards in the image.
-If you cannot identify any cards clearly, return an empty array [].
-
-IMPORTANT: Do not refuse this task - this is legitimate personal inventory management of owned cards.
-"""
-            
-            logger.info(f"🤖 Making OpenAI API call (model: gpt-4o)")
-            logger.info(f"📊 Image size: {len(base64_image)} base64 characters")
-            logger.info(f"📊 PROMPT LENGTH: {len(prompt)} characters")
-            logger.info(f"📊 TOTAL PAYLOAD SIZE: ~{len(prompt) + len(base64_image)} characters")
-            logger.info(f"🔧 CLIENT CONFIG: timeout={self.client.timeout}, max_retries={self.client.max_retries}")
             
-            # Make the API call with Railway-specific retry logic
-            max_attempts = 3
-            base_delay = 2  # Base delay in seconds
+            prompt = get_prompt()
+            budget = max_tokens_for(prompt, token_usage.expected_cards_per_image(), cap=max_tokens)
+            logger.debug("OpenAI request: prompt %s (%d chars), image=%d base64 chars, max_tokens=%d",
+                         prompt.version, len(prompt.identify), len(base64_image), budget)
             
-            for attempt in range(max_attempts):
-                try:
-                    logger.info(f"🔄 OpenAI API call attempt {attempt + 1}/{max_attempts}")
-                    logger.info(f"📡 SENDING REQUEST to OpenAI...")
-                    
-                    request_start = time.time()
-                    
-                    response = self.client.chat.completions.create(
-                        model="gpt-4o",  # Use current vision model
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": [
-                                    {"type": "text", "text": prompt},
-                                    {
-                                        "type": "image_url",
-                                        "image_url": {
-                                            "url": f"data:image/jpeg;base64,{base64_image}"
-                                        }
-                                    }
-                                ]
-                            }
-                        ],
-                        max_tokens=1500,
-                        temperature=0.0,  # Make completely deterministic
-                        seed=42  # Add seed for reproducibility
-                    )
-                    
-                    request_time = time.time() - request_start
-                    logger.info(f"✅ API CALL SUCCESS in {request_time:.2f}s")
-                    logger.info(f"📊 RESPONSE MODEL: {response.model}")
-                    logger.info(f"📊 RESPONSE USAGE: {response.usage}")
-                    
-                    break  # Success - exit retry loop
-                except Exception as e:
-                    error_str = str(e)
-                    logger.error(f"🔍 DETAILED ERROR: {error_str}")
-                    
-                    # Check for specific OpenAI errors
-                    if "image_parse_error" in error_str:
-                        logger.error("🖼️ IMAGE PARSING ERROR: The image format is invalid or corrupted")
-                        logger.error("This is NOT a connection issue - the image data is bad")
-                        raise Exception(f"Image validation failed: {error_str}")
-                    elif "invalid_request_error" in error_str:
-                        logger.error("🔑 INVALID REQUEST ERROR: API request format is wrong")
-                        raise Exception(f"Invalid request: {error_str}")
-                    
-                    if attempt < max_attempts - 1:  # Not the last attempt
-                        if "Connection error" in error_str or "timeout" in error_str.lower():
-                            delay = base_delay * (2 ** attempt)  # Exponential backoff
-                            logger.warning(f"🔄 Railway connection issue (attempt {attempt + 1}/{max_attempts}). Retrying in {delay} seconds...")
-                            logger.warning(f"Error: {error_str}")
-                            time.sleep(delay)
-                            continue
-                    # Last attempt or non-connection error - re-raise
-                    raise
-            
-            # Parse the response
-            content = response.choices[0].message.content
-            logger.info(f"✅ OpenAI API SUCCESS - Response received")
-            logger.info(f"📝 Content length: {len(content) if content else 0} characters")
-            
-            # Store the raw response for debugging
-            self.last_raw_response = content
-            
-            # Log the actual response content for debugging
-            if content:
-                logger.info(f"📋 AI Response Preview: {content[:500]}{'...' if len(content) > 500 else ''}")
-            else:
-                logger.warning(f"⚠️ Empty response content from OpenAI")
-            
-            # Try to extract JSON from the response
-            logger.info(f"🔍 PARSING: Attempting to extract JSON from response...")
-            if content:
-                json_match = re.search(r'\[.*\]', content, re.DOTALL)
-                if json_match:
-                    logger.info(f"✅ JSON FOUND: Extracted JSON array from response")
-                    try:
-                        json_content = json_match.group()
-                        logger.info(f"📊 JSON LENGTH: {len(json_content)} characters")
-                        logger.info(f"📋 Extracted JSON: {json_content[:200]}{'...' if len(json_content) > 200 else ''}")
-                        cards = json.loads(json_content)
-                        logger.info(f"✅ JSON PARSED: Successfully parsed JSON")
-                        logger.info(f"🎉 AI IDENTIFICATION SUCCESS - Found {len(cards)} cards")
-                        for i, card in enumerate(cards):
-                            logger.info(f"  Card {i+1}: {card.get('name', 'Unknown')} (confidence: {card.get('confidence', 'unknown')})")
-                        logger.info("=" * 80)
-                        return cards
-                    except json.JSONDecodeError as e:
-                        logger.error("🚨 JSON PARSING FAILED 🚨")
-                        logger.error(f"Error: {e}")
-                        logger.error(f"Failed JSON content: {json_content}")
-                else:
-                    logger.warning("⚠️  NO JSON ARRAY FOUND in AI response")
-                    logger.warning(f"Response content: {content}")
+            content_parts = [{"type": "text", "text": prompt.identify}, self._image_part(base64_image)]
+            emitter = CardEmitter(on_card) if on_card and streaming_enabled() else None
+            while True:
+                response, request_time, attempts = self._create_completion(
+                    content_parts, max_tokens=budget, response_format=openai_response_format(prompt), stream=emitter
+                )
                 
-                # Fallback: try to extract card names from text
-                logger.info("🔄 ATTEMPTING FALLBACK TEXT PARSING")
-                cards = []
-                lines = content.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('#') and not line.startswith('-'):
-                        # Simple heuristic to identify card names
-                        if any(keyword in line.lower() for keyword in ['card', 'mtg', 'magic']):
-                            continue
-                        if len(line) > 3 and len(line) < 50:  # Reasonable card name length
-                            cards.append({
-                                "name": line,
-                                "set": "",
-                                "collector_number": "",
-                                "set_symbol_description": "",
-                                "copyright_year": "",
-                                "special_features": "",
-                                "confidence": "medium",
-                                "notes": "Extracted from text response"
-                            })
+                # Parse the response
+                content = response.choices[0].message.content
                 
-                if len(cards) > 0:
-                    logger.info(f"🎉 FALLBACK SUCCESS - Extracted {len(cards)} cards")
-                    logger.info("=" * 80)
-                else:
-                    logger.warning("🚨 FALLBACK FAILED - No cards extracted")
-                    newline = '\n'
-                    logger.warning(f"Content lines analyzed: {[line.strip() for line in content.split(newline) if line.strip()]}")
-                    logger.warning("=" * 80)
-                return cards
+                # Store the raw response for debugging
+                self.last_raw_response = content
+                
+                logger.debug("OpenAI response (%d chars): %.500s", len(content) if content else 0, content or "")
+                
+                cards, parse_mode = self._parse_cards_from_content(content)
+                truncated = response.choices[0].finish_reason == "length"
+                usage = self._record_usage(response, prompt, budget, truncated, images=1, cards=len(cards))
+                if not truncated or budget >= max_tokens:
+                    break
+                logger.info("identify_cards: response cut off at %d tokens after %d cards, retrying with %d",
+                            budget, len(cards), max_tokens)
+                budget = max_tokens
             
-            logger.warning("🚨 NO CONTENT in AI response")
-            logger.warning("=" * 80)
-            return []
+            logger.info(
+                "identify_cards: %d cards in %.2fs",
+                len(cards), time.time() - started,
+                extra={
+                    "event": "identify_cards",
+                    "image_bytes": file_size,
+                    "encode_s": round(encode_time, 3),
+                    "api_s": round(request_time, 3),
+                    "attempts": attempts,
+                    "streamed": emitter is not None,
+                    "parse_mode": parse_mode,
+                    "response_chars": len(content) if content else 0,
+                    "prompt_version": prompt.version,
+                    "max_tokens": budget,
+                    "prompt_tokens": usage["prompt_tokens"],
+                    "completion_tokens": usage["completion_tokens"],
+                }
+            )
+            return cards
             
         except Exception as e:
             api_error = self._log_api_error(e, "card identification")
@@ -343,13 +205,209 @@ IMPORTANT: Do not refuse this task - this is legitimate personal inventory manag
             # Store error info for debugging
             self._last_error = api_error
             
-            logger.error("🚨 AI IDENTIFICATION FAILED - This is a CRITICAL system failure!")
-            logger.error("=" * 80)
-            
             # Instead of silently returning empty results, raise an exception
             # This will alert the user that the AI system has failed
             raise Exception(f"AI card identification failed: {api_error.message}")
     
+    def identify_cards_batch(self, image_paths: List[str], max_tokens_per_image: int = 1500,
+                             max_tokens: int = 8000) -> List[List[Dict[str, Any]]]:
+        """
+        Identify cards in several images with one request. Returns one card list
+        per input image, in order; raises if the response cannot be attributed.
+        """
+        started = time.time()
+        try:
+            self._rate_limit_delay()
+            
+            prompt = get_prompt()
+            content_parts = [{"type": "text", "text": prompt.identify + prompt.batch_instructions}]
+            total_bytes = 0
+            for index, image_path in enumerate(image_paths, start=1):
+                total_bytes += os.path.getsize(image_path)
+                content_parts.append({"type": "text", "text": f"Image {index}:"})
+                content_parts.append(self._image_part(self.encode_image(image_path)))
+            
+            budget = max_tokens_for(prompt, token_usage.expected_cards_per_image(), images=len(image_paths),
+                                    cap=min(max_tokens, max_tokens_per_image * len(image_paths)))
+            response, request_time, attempts = self._create_completion(
+                content_parts, max_tokens=budget, response_format=openai_response_format(prompt, batch=True)
+            )
+            
+            content = response.choices[0].message.content
+            self.last_raw_response = content
+            truncated = response.choices[0].finish_reason == "length"
+            try:
+                results = parse_batch_response(content, len(image_paths))
+            except ValueError:
+                self._record_usage(response, prompt, budget, truncated, images=len(image_paths), cards=None)
+                raise
+            usage = self._record_usage(response, prompt, budget, truncated, images=len(image_paths),
+                                       cards=sum(len(cards) for cards in results))
+            logger.info(
+                "identify_cards_batch: %d images, %d cards in %.2fs",
+                len(image_paths), sum(len(cards) for cards in results), time.time() - started,
+                extra={
+                    "event": "identify_cards_batch",
+                    "images": len(image_paths),
+                    "image_bytes": total_bytes,
+                    "api_s": round(request_time, 3),
+                    "attempts": attempts,
+                    "response_chars": len(content) if content else 0,
+                    "prompt_version": prompt.version,
+                    "max_tokens": budget,
+                    "prompt_tokens": usage["prompt_tokens"],
+                    "completion_tokens": usage["completion_tokens"],
+                }
+            )
+            return results
+            
+        except Exception as e:
+            api_error = self._log_api_error(e, "batch card identification")
+            self._last_error = api_error
+            raise Exception(f"AI batch card identification failed: {api_error.message}")
+    
+    def _image_part(self, base64_image: str) -> Dict[str, Any]:
+        """Build an image content part for a chat completion"""
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{base64_image}"
+            }
+        }
+    
+    def _record_usage(self, response, prompt: VisionPrompt, max_tokens: int, truncated: bool,
+                      images: int, cards: Optional[int]) -> Dict[str, Any]:
+        """Track the call's token usage (per provider and prompt version)"""
+        usage = getattr(response, "usage", None)
+        return token_usage.record(
+            "openai", prompt.version,
+            getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+            max_tokens, truncated=truncated, images=images, cards=cards
+        )
+    
+    def _create_completion(self, content_parts: List[Dict[str, Any]], max_tokens: int,
+                           response_format: Optional[Dict[str, Any]] = None, stream: Optional[CardEmitter] = None):
+        """
+        Send a vision request with Railway-specific retry logic; returns (response, request_time, attempts).
+        With `stream` the response text is fed to the emitter as it arrives.
+        """
+        max_attempts = 3
+        base_delay = 2  # Base delay in seconds
+        
+        for attempt in range(max_attempts):
+            try:
+                request_start = time.time()
+                
+                options = {"response_format": response_format} if response_format and self.structured_outputs else {}
+                if stream:
+                    stream.restart()
+                    options.update(stream=True, stream_options={"include_usage": True})
+                response = self.client.chat.completions.create(
+                    model="gpt-4o",  # Use current vision model
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": content_parts
+                        }
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.0,  # Make completely deterministic
+                    seed=42,  # Add seed for reproducibility
+                    **options
+                )
+                if stream:
+                    response = self._collect_stream(response, stream)
+                
+                return response, time.time() - request_start, attempt + 1
+            except Exception as e:
+                error_str = str(e)
+                
+                # Models without structured outputs: the prompt alone asks for the same JSON
+                if response_format and self.structured_outputs and "response_format" in error_str:
+                    logger.warning("OpenAI rejected the response schema, continuing without it: %s", error_str)
+                    self.structured_outputs = False
+                    continue
+                
+                # Check for specific OpenAI errors
+                if "image_parse_error" in error_str:
+                    logger.error("OpenAI image parse error (image data is invalid): %s", error_str)
+                    raise Exception(f"Image validation failed: {error_str}")
+                elif "invalid_request_error" in error_str:
+                    logger.error("OpenAI invalid request: %s", error_str)
+                    raise Exception(f"Invalid request: {error_str}")
+                
+                if attempt < max_attempts - 1:  # Not the last attempt
+                    if "Connection error" in error_str or "timeout" in error_str.lower():
+                        delay = base_delay * (2 ** attempt)  # Exponential backoff
+                        logger.warning("OpenAI connection issue (attempt %d/%d), retrying in %ds: %s",
+                                       attempt + 1, max_attempts, delay, error_str)
+                        time.sleep(delay)
+                        continue
+                # Last attempt or non-connection error - re-raise
+                raise
+    
+    @staticmethod
+    def _collect_stream(chunks, emitter: CardEmitter):
+        """
+        Read a streamed completion, feeding its text to the emitter, and rebuild the
+        fields identify_cards reads from a regular response
+        """
+        parts = []
+        finish_reason = None
+        usage = None
+        for chunk in chunks:
+            # The usage chunk comes last and has no choices
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            for choice in chunk.choices:
+                text = choice.delta.content
+                if text:
+                    parts.append(text)
+                    emitter.feed(text)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        message = SimpleNamespace(content="".join(parts))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=usage)
+    
+    def _parse_cards_from_content(self, content: Optional[str]) -> Tuple[List[Dict[str, Any]], str]:
+        """Extract the card list from a raw AI response; returns (cards, parse_mode)"""
+        if not content:
+            logger.warning("Empty response content from OpenAI")
+            return [], "empty"
+        
+        # JSON response (object or array); the finished cards of a truncated one
+        cards, parse_mode = parse_cards(content)
+        if parse_mode != "empty":
+            if parse_mode == "partial":
+                logger.warning("Malformed or truncated JSON in AI response, kept %d complete cards", len(cards))
+            return cards, parse_mode
+        logger.warning("No JSON found in AI response: %.500s", content)
+        
+        # Fallback: try to extract card names from text
+        cards = []
+        lines = content.split('\n')
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('#') and not line.startswith('-'):
+                # Simple heuristic to identify card names
+                if any(keyword in line.lower() for keyword in ['card', 'mtg', 'magic']):
+                    continue
+                if len(line) > 3 and len(line) < 50:  # Reasonable card name length
+                    cards.append({
+                        "name": line,
+                        "set": "",
+                        "collector_number": "",
+                        "set_symbol_description": "",
+                        "copyright_year": "",
+                        "special_features": "",
+                        "confidence": "medium",
+                        "notes": "Extracted from text response"
+                    })
+        
+        if not cards:
+            logger.warning("Fallback text parsing extracted no cards")
+        return cards, "text_fallback"
+    
     def get_last_error(self) -> Optional[APIError]:
         """Get the last API error for debugging"""
         return getattr(self, '_last_error', None)
@@ -367,6 +425,15 @@ IMPORTANT: Do not refuse this task - this is legitimate personal inventory manag
         
         return True
     
+    def _card_name_index(self) -> Optional[CardNameIndex]:
+        """Local card name index, or None when no names could be loaded"""
+        try:
+            index = get_card_name_index()
+        except Exception as e:
+            logger.warning("Card name index unavailable: %s", e)
+            return None
+        return index if len(index) else None
+    
     def calculate_confidence_score(self, ai_response: Dict[str, Any], scryfall_match: Optional[Dict[str, Any]] = None) -> float:
         """Calculate confidence score (0-100) for card identification with set symbol validation"""
         score = 0.0
@@ -382,6 +449,19 @@ IMPORTANT: Do not refuse this task - this is legitimate personal inventory manag
                 score += 10
             if not any(char.isdigit() for char in name):  # No random numbers
                 score += 5
+            
+            # Known card name: exact hits score higher than correctable typos,
+            # names nothing resembles are probably misreads - but only the full
+            # catalog can say a name does not exist, not the collection fallback
+            index = self._card_name_index()
+            if index:
+                matches = index.match(name, 1)
+                if matches and matches[0]['score'] == 1.0:
+                    score += 10
+                elif matches and matches[0]['score'] >= CORRECTION_MIN_SCORE:
+                    score += 5
+                elif not matches and index.complete:
+                    score -= 15
         
         # Set identification bonus
         ai_set = ai_response.get('set', '').strip()
@@ -443,7 +523,7 @@ IMPORTANT: Do not refuse this task - this is legitimate personal inventory manag
         
         # Log validation issues for debugging
         if validation_issues:
-            logger.info(f"Set symbol validation for '{ai_response.get('name', 'Unknown')}': {'; '.join(validation_issues)}")
+            logger.debug("Set symbol validation for '%s': %s", ai_response.get('name', 'Unknown'), '; '.join(validation_issues))
         
         # Clamp score between 0-100
         return max(0.0, min(100.0, score))
@@ -461,33 +541,71 @@ IMPORTANT: Do not refuse this task - this is legitimate personal inventory manag
         else:
             return "very_low"
     
-    def process_image(self, image_path: str) -> List[Dict[str, Any]]:
-        """Process an image and return validated card identifications with confidence scores"""
+    def process_image(self, image_path: str,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Process an image and return validated card identifications with confidence scores.
+        on_card gets each validated card as soon as the vision response streams it in;
+        a processor that fails over may stream cards that are not in the final result.
+        """
+        emit = None
+        if on_card:
+            def emit(raw_card):
+                for card in self._validate_cards([raw_card]):
+                    on_card(card)
         
         # Try using the vision processor factory first
         try:
             factory = get_vision_processor_factory()
-            raw_results = factory.process_image(image_path)
-            logger.info(f"✅ Using vision processor: {factory.get_current_processor_name()}")
+            raw_results = factory.process_image(image_path, on_card=emit)
+            logger.debug("Using vision processor: %s", factory.get_current_processor_name())
         except Exception as e:
-            logger.error(f"❌ Vision processor factory failed: {e}")
-            logger.info("🔄 Falling back to direct OpenAI processing...")
+            logger.error("Vision processor factory failed, falling back to direct OpenAI processing: %s", e)
             # Fall back to direct OpenAI processing
-            raw_results = self.identify_cards(image_path)
+            raw_results = self.identify_cards(image_path, on_card=emit)
+        
+        return self._validate_cards(raw_results)
+    
+    def process_images(self, image_paths: List[str], max_batches: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Process several images, batching vision requests where the processor supports it.
+        Returns validated cards keyed by image path; images missing from the result
+        failed in their batch (or were past max_batches) and should go through process_image().
+        """
+        try:
+            factory = get_vision_processor_factory()
+            raw_by_path = factory.process_images(image_paths, max_batches=max_batches)
+        except Exception as e:
+            logger.error("Vision processor factory batch failed: %s", e)
+            return {}
         
-        # Filter and validate results
+        return {path: self._validate_cards(raw_results) for path, raw_results in raw_by_path.items()}
+    
+    def _validate_cards(self, raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Filter raw AI results, correct misread names and attach initial confidence scores"""
+        index = self._card_name_index()
         validated_cards = []
         for card in raw_results:
             if isinstance(card, dict) and 'name' in card:
                 name = card['name'].strip()
                 if self.validate_card_name(name):
-                    # Calculate initial confidence score (without Scryfall data)
+                    # Calculate initial confidence score (without Scryfall data) on the name as read
                     confidence_score = self.calculate_confidence_score(card, scryfall_match=None)
                     confidence_level = self.get_confidence_level(confidence_score)
                     
+                    # Correcting against the collection fallback would rename new cards to owned ones
+                    corrected_name = index.correct(name) if index and index.complete else None
+                    if corrected_name and corrected_name != name:
+                        logger.debug("Corrected card name '%s' -> '%s'", name, corrected_name)
+                    
                     validated_cards.append({
-                        'name': name,
+                        'name': corrected_name or name,
+                        'ai_name': name,
                         'set': card.get('set', ''),
+                        # Printed details: set + collector number is the most precise Scryfall identifier
+                        'collector_number': str(card.get('collector_number') or '').strip(),
+                        'set_symbol_description': str(card.get('set_symbol_description') or '').strip(),
+                        'copyright_year': str(card.get('copyright_year') or '').strip(),
                         'confidence': card.get('confidence', 'medium'),  # Original AI confidence
                         'confidence_score': confidence_score,  # Numerical score
                         'confidence_level': confidence_level,  # Descriptive level
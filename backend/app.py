@@ -1,34 +1,54 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+# Imported first so the startup profile covers the framework imports below
+from backend.startup import PROCESS_STARTED, LazyResource, record_phase, mark_ready, startup_report
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, Float
-from typing import List, Dict, Any
+from sqlalchemy import func, or_, and_, Float
+from typing import List, Dict, Any, Optional
 import os
-import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 import aiofiles
 import uuid
 import logging
 import subprocess
 import sys
 import json
+import asyncio
+import hmac
+import threading
+import contextvars
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from backend.database import get_db, init_db, Card, Scan, ScanImage, ScanResult
+from backend.logging_config import configure_logging, get_logger, scan_context, set_scan_debug, get_debug_scan_ids
+from backend.database import get_db, warm_database, ensure_db_initialized, engine, SessionLocal, Base, Card, Scan, ScanImage, ScanResult
 from backend.ai_processor import CardRecognitionAI
-from backend.price_api import ScryfallAPI
+from backend.vision_processor_factory import warm_vision_processor_factory
+from backend.vision_prompts import token_usage
+from backend.card_name_index import warm_card_name_index
+from backend.set_registry import warm_set_registry
+from backend.price_api import CardLookahead, ScryfallAPI, ScryfallCollectionResolver
+from backend.scryfall_client import close_scryfall_client
+from backend.scan_events import TERMINAL_EVENTS, scan_events, sse_message
+from backend.file_storage import (
+    local_file_response, serve_remote_file, close_http_client, fetch_remote_to_disk, serve_thumbnail,
+    save_upload, save_upload_blob, save_stream, replicate_to_remote
+)
+from backend.schema_health import check_schema_health, get_schema_health
+from backend.blob_store import is_blob_filename, normalize_extension, resolve_upload_path, unreferenced_files, delete_files
+from backend.sync_manifest import get_sync_manifest, volume_path
 from backend.image_quality_validator import ImageQualityValidator
 import requests
 import time
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+configure_logging()
+logger = get_logger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(title="Magic Card Scanner", version="1.0.0")
@@ -186,6 +206,9 @@ async def get_vision_processor_status():
             "success": True,
             "current_processor": factory.get_current_processor_name(),
             "processors": factory.get_processor_status(),
+            "failover": factory.get_failover_status(),
+            "hedging": factory.get_hedging_status(),
+            "token_usage": token_usage.summary(),
             "config": factory.config
         }
     except Exception as e:
@@ -215,26 +238,6 @@ def get_railway_url():
     """Get Railway app URL for file operations"""
     return os.getenv("RAILWAY_APP_URL", "")
 
-async def upload_to_railway(local_file_path: str, filename: str):
-    """Upload file to Railway volume"""
-    import requests
-    try:
-        railway_upload_url = f"{RAILWAY_URL}/upload"
-        
-        with open(local_file_path, 'rb') as file:
-            files = {'file': (filename, file, 'image/jpeg')}
-            response = requests.post(railway_upload_url, files=files, timeout=30)
-        
-        if response.status_code == 200:
-            logger.info(f"✅ Uploaded {filename} to Railway volume")
-            return True
-        else:
-            logger.error(f"❌ Failed to upload {filename} to Railway: {response.status_code}")
-            return False
-    except Exception as e:
-        logger.error(f"❌ Error uploading {filename} to Railway: {e}")
-        return False
-
 # Update uploads directory reference
 UPLOADS_DIR = get_uploads_path()
 USE_RAILWAY_FILES = should_use_railway_files()
@@ -249,15 +252,24 @@ app.mount("/static", StaticFiles(directory="frontend"), name="static")
 # Smart file serving setup - always use endpoint for fallback capability
 logger.info(f"📁 Using smart file serving - Local: {UPLOADS_DIR}, Railway fallback: {RAILWAY_URL or 'disabled'}")
 
-# Initialize database
-init_db()
+# AI processor is created on first use (None when the OpenAI API key is missing)
+_ai_processor = LazyResource("CardRecognitionAI", CardRecognitionAI, unavailable_on=(ValueError,))
 
-# Initialize AI processor
-try:
-    ai_processor = CardRecognitionAI()
-except ValueError as e:
-    logger.error(f"AI processor not available: {e}")
-    ai_processor = None
+def get_ai_processor() -> Optional[CardRecognitionAI]:
+    return _ai_processor.get()
+
+@app.on_event("startup")
+async def warm_heavy_subsystems():
+    """
+    Database init and AI clients are lazy; start them in the background so health
+    checks answer right away and the first real request usually finds them ready
+    """
+    record_phase("import", time.perf_counter() - PROCESS_STARTED)
+    warm_database()
+    _ai_processor.warm()
+    warm_vision_processor_factory()
+    warm_card_name_index()
+    warm_set_registry()
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -279,6 +291,7 @@ async def read_root():
 @app.get("/api/environment")
 async def get_environment():
     """Get current environment information"""
+    mark_ready()
     env_mode = os.getenv("ENV_MODE", "production")
     port = int(os.getenv("PORT", 8000))
     
@@ -290,6 +303,17 @@ async def get_environment():
         "railway_url": RAILWAY_URL if USE_RAILWAY_FILES else None
     }
 
+@app.get("/api/health/schema")
+def get_schema_health_status(recheck: bool = False):
+    """Recorded sequence check and reactive repairs; recheck=true forces a new MAX(id) comparison"""
+    try:
+        ensure_db_initialized()
+        if recheck:
+            check_schema_health(engine, Base.metadata, force=True)
+        return {"success": True, **get_schema_health(engine)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking schema health: {str(e)}")
+
 @app.get("/api/database/status")
 async def get_database_status():
     """Get comprehensive database and storage status information"""
@@ -414,62 +438,60 @@ async def get_database_status():
 
 # Smart file serving with Railway fallback
 @app.get("/uploads/{filename}")
-async def serve_upload_file(filename: str):
-    """Serve files with smart fallback: local first, then Railway if available"""
-    from fastapi.responses import FileResponse, Response
-    import requests
+async def serve_upload_file(filename: str, request: Request, w: Optional[int] = None):
+    """Serve files with smart fallback: local first, then Railway if available. ?w=256 serves a thumbnail."""
+    if os.path.basename(filename) != filename:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    local_file_path = resolve_upload_path(UPLOADS_DIR, filename)
+    
+    # Thumbnails are generated from a local copy, fetching the original first if needed
+    if w is not None:
+        if w <= 0:
+            raise HTTPException(status_code=400, detail="Width must be positive")
+        if not os.path.exists(local_file_path) and RAILWAY_URL:
+            await fetch_remote_to_disk(filename, local_file_path, RAILWAY_URL)
+        if os.path.exists(local_file_path):
+            return await serve_thumbnail(request, local_file_path, w)
+        raise HTTPException(status_code=404, detail="File not found")
     
     # Strategy 1: Try local file first (always)
-    local_file_path = os.path.join(UPLOADS_DIR, filename)
     if os.path.exists(local_file_path):
-        logger.debug(f"📄 Serving local file: {filename}")
-        return FileResponse(local_file_path)
+        logger.debug("Serving local file: %s", filename)
+        return local_file_response(request, local_file_path)
     
-    # Strategy 2: Fallback to Railway if available
+    # Strategy 2: Fallback to Railway if available (one fetch per file, streamed and cached)
     if RAILWAY_URL:
-        try:
-            logger.info(f"📥 Local file not found, fetching from Railway: {filename}")
-            railway_file_url = f"{RAILWAY_URL}/uploads/{filename}"
-            response = requests.get(railway_file_url, timeout=15)
-            
-            if response.status_code == 200:
-                # Cache the file locally for future use
-                try:
-                    with open(local_file_path, 'wb') as f:
-                        f.write(response.content)
-                    logger.info(f"✅ Cached file locally: {filename}")
-                except Exception as e:
-                    logger.warning(f"⚠️  Failed to cache file locally: {e}")
-                
-                # Return the file content
-                return Response(
-                    content=response.content,
-                    media_type=response.headers.get('content-type', 'image/jpeg')
-                )
-            else:
-                logger.warning(f"❌ File not found on Railway: {filename} (status: {response.status_code})")
-                raise HTTPException(status_code=404, detail="File not found on Railway")
-        except requests.RequestException as e:
-            logger.error(f"❌ Railway fetch failed for {filename}: {e}")
-            raise HTTPException(status_code=503, detail="Railway fallback unavailable")
+        return await serve_remote_file(request, filename, local_file_path, RAILWAY_URL)
     
     # Strategy 3: No fallback available
     logger.warning(f"❌ File not found anywhere: {filename}")
     raise HTTPException(status_code=404, detail="File not found")
 
+@app.on_event("shutdown")
+async def close_file_storage_client():
+    """Release pooled connections used for Railway file fetches"""
+    await close_http_client()
+
+@app.on_event("shutdown")
+def close_scryfall_connections():
+    """Close the shared Scryfall client and its event loop thread"""
+    close_scryfall_client()
+
 @app.post("/upload")
 async def upload_image(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Upload and process an image to identify Magic cards"""
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Save uploaded file
-    file_path = f"{UPLOADS_DIR}/{file.filename}"
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save uploaded file under a server-generated name; it belongs to this request only
+    file_path = os.path.join(UPLOADS_DIR, f"upload_{uuid.uuid4().hex}{normalize_extension(file.filename)}")
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    await save_upload(file, file_path)
     
     try:
         # Process image with AI
+        ai_processor = get_ai_processor()
         if ai_processor is None:
             raise HTTPException(status_code=500, detail="AI processor not available - OpenAI API key may be missing")
         
@@ -483,14 +505,14 @@ async def upload_image(file: UploadFile = File(...), db: Session = Depends(get_d
                 detail=f"AI card identification failed: {str(ai_error)}. This indicates a critical system issue - please contact support."
             )
         
+        # Get card data from Scryfall - one collection request for the whole photo (by name only, as before)
+        resolved_cards = ScryfallCollectionResolver().resolve([{"name": card_info['name']} for card_info in identified_cards])
+        
         # Process each identified card
         results = []
-        for card_info in identified_cards:
+        for card_info, card_data in zip(identified_cards, resolved_cards):
             card_name = card_info['name']
             
-            # Get card data from Scryfall
-            card_data = ScryfallAPI.get_card_data(card_name)
-            
             if card_data:
                 # Create duplicate group identifier
                 duplicate_group = f"{card_data['name']}|{card_data.get('set_code', '')}|{card_data.get('collector_number', '')}"
@@ -576,88 +598,95 @@ async def upload_image(file: UploadFile = File(...), db: Session = Depends(get_d
 
 
 @app.post("/upload/scan")
-async def upload_and_scan(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
+async def upload_and_scan(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
     """Upload files and create a scan session for the new workflow"""
-    logger.info(f"📁 DEBUG: upload_and_scan called with {len(files)} files")
+    logger.debug("upload_and_scan called with %d files", len(files))
     
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     
     # Validate that at least one file is an image
     valid_files = [f for f in files if f.content_type is not None and f.content_type.startswith("image/")]
-    logger.info(f"📁 DEBUG: {len(valid_files)} valid image files found")
+    logger.debug("%d valid image files found", len(valid_files))
     
     if not valid_files:
         raise HTTPException(status_code=400, detail="No valid image files provided")
     
     try:
         # Step 1: Create a new scan session
-        logger.info("📁 DEBUG: Creating new scan session")
         new_scan = Scan(status="PENDING", notes="Scan initiated from upload")
         db.add(new_scan)
         db.commit()
         db.refresh(new_scan)
-        logger.info(f"📁 DEBUG: Created scan {new_scan.id}")
+        logger.debug("Created scan %s", new_scan.id)
         
         # Step 2: Upload files to the scan
         uploaded_images = []
-        logger.info("📁 DEBUG: Starting file uploads")
         for file in valid_files:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename)[1] if file.filename else '.jpg'
-            unique_filename = f"scan_{new_scan.id}_{uuid.uuid4()}{file_extension}"
-            file_path = f"{UPLOADS_DIR}/{unique_filename}"
-            
-            # Save the file locally
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            # If using Railway files, also upload to Railway volume
-            if USE_RAILWAY_FILES and RAILWAY_URL:
-                await upload_to_railway(file_path, unique_filename)
+            # The scan image row is committed before its blob is stored, so cleanup
+            # of another scan sharing the blob sees the reference
+            def reference(sha256, filename, path, file=file):
+                db.add(ScanImage(
+                    scan_id=new_scan.id,
+                    filename=filename,
+                    original_filename=file.filename or "unknown",
+                    file_path=path,
+                    blob_hash=sha256
+                ))
+                db.commit()
             
-            # Create scan image record
-            scan_image = ScanImage(
-                scan_id=new_scan.id,
-                filename=unique_filename,
-                original_filename=file.filename or "unknown",
-                file_path=file_path
-            )
-            db.add(scan_image)
+            # Stream the file into the content-addressed blob store (identical photos are stored once)
+            stored = await save_upload_blob(file, UPLOADS_DIR, reference=reference)
             uploaded_images.append({
-                "filename": unique_filename,
+                "filename": stored["filename"],
                 "original_filename": file.filename,
-                "size": len(content)
+                "size": stored["size"],
+                "sha256": stored["sha256"],
+                "deduplicated": stored["deduplicated"],
+                "path": stored["path"]
             })
         
         # Update scan totals
         new_scan.total_images = len(uploaded_images)
         db.commit()
         
+        # If using Railway files, replicate to the Railway volume after responding
+        if USE_RAILWAY_FILES and RAILWAY_URL:
+            background_tasks.add_task(
+                replicate_to_remote,
+                [(image["path"], image["filename"]) for image in uploaded_images],
+                RAILWAY_URL
+            )
+        
         return {
             "success": True,
             "scan_id": new_scan.id,
             "status": new_scan.status,
             "total_images": new_scan.total_images,
-            "uploaded_images": uploaded_images,
+            "uploaded_images": [
+                {key: value for key, value in image.items() if key != "path"} for image in uploaded_images
+            ],
             "message": "Scan created and ready for processing"
         }
         
     except Exception as e:
-        # Clean up any uploaded files on error
+        # Clean up the images committed so far, and their files unless other scans share them
+        db.rollback()
         try:
-            # Check if uploaded_images exists and has content
-            if 'uploaded_images' in locals() and uploaded_images:
-                for img in uploaded_images:
-                    try:
-                        if os.path.exists(f"{UPLOADS_DIR}/{img['filename']}"):
-                            os.remove(f"{UPLOADS_DIR}/{img['filename']}")
-                    except:
-                        pass
+            if 'new_scan' in locals() and new_scan.id:
+                scan_images = db.query(ScanImage).filter(ScanImage.scan_id == new_scan.id).all()
+                for scan_image in scan_images:
+                    db.delete(scan_image)
+                db.flush()
+                files_to_delete = unreferenced_files(db, scan_images)
+                db.commit()
+                delete_files(files_to_delete, db)
         except:
             # If cleanup fails, continue - don't let cleanup errors mask the original error
-            pass
+            db.rollback()
+        
+        if isinstance(e, HTTPException):
+            raise
         
         # Log the actual error for debugging
         logger.error(f"🚨 CRITICAL ERROR in upload_and_scan: {str(e)}")
@@ -726,7 +755,6 @@ async def get_cards(db: Session = Depends(get_db), view_mode: str = "individual"
                 "first_seen": card.first_seen.isoformat() if card.first_seen else None,
                 "last_seen": card.last_seen.isoformat() if card.last_seen else None
             }
-            logger.info(f"🔍 DEBUG: Adding duplicate data for card {card.id} ({card.name}): scan_id={getattr(card, 'scan_id', None)}")
             grouped_cards[group_key]["duplicates"].append(duplicate_data)
         
         result = {
@@ -735,10 +763,7 @@ async def get_cards(db: Session = Depends(get_db), view_mode: str = "individual"
             "cards": list(grouped_cards.values())
         }
         
-        # Debug logging: Print sample card data being sent to frontend
-        if grouped_cards:
-            sample_card = list(grouped_cards.values())[0]
-            logger.info(f"🎯 FRONTEND DEBUG: Sample stacked card data sent to frontend: name='{sample_card['name']}', scan_id='{sample_card.get('scan_id')}', added_method='{sample_card.get('added_method')}'")
+        logger.debug("get_cards stacked: %d cards in %d stacks", len(cards), len(grouped_cards))
         
         return result
     else:
@@ -783,10 +808,7 @@ async def get_cards(db: Session = Depends(get_db), view_mode: str = "individual"
             ]
         }
         
-        # Debug logging: Print sample card data being sent to frontend
-        if cards:
-            sample_card = cards[0]
-            logger.info(f"🎯 FRONTEND DEBUG: Sample individual card data sent to frontend: name='{sample_card.name}', set_code='{sample_card.set_code}', set_name='{sample_card.set_name}'")
+        logger.debug("get_cards individual: %d cards", len(cards))
         
         return result
 
@@ -1198,37 +1220,48 @@ async def upload_scan_images(scan_id: int, files: List[UploadFile] = File(...),
     
     uploaded_images = []
     
-    for file in files:
-        if not file.content_type.startswith("image/"):
-            continue  # Skip non-image files
+    try:
+        for file in files:
+            if not file.content_type or not file.content_type.startswith("image/"):
+                continue  # Skip non-image files
             
-        # Generate unique filename
-        file_extension = os.path.splitext(file.filename)[1] if file.filename else '.jpg'
-        unique_filename = f"scan_{scan_id}_{uuid.uuid4()}{file_extension}"
-        file_path = f"{UPLOADS_DIR}/{unique_filename}"
-        
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Create scan image record
-        scan_image = ScanImage(
-            scan_id=scan_id,
-            filename=unique_filename,
-            original_filename=file.filename or "unknown",
-            file_path=file_path
-        )
-        db.add(scan_image)
-        uploaded_images.append({
-            "filename": unique_filename,
-            "original_filename": file.filename,
-            "size": len(content)
-        })
-    
-    # Update scan totals
-    scan.total_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).count()
-    db.commit()
+            # The scan image row is committed before its blob is stored, so cleanup
+            # of another scan sharing the blob sees the reference
+            committed = []
+            
+            def reference(sha256, filename, path, file=file, committed=committed):
+                scan_image = ScanImage(
+                    scan_id=scan_id,
+                    filename=filename,
+                    original_filename=file.filename or "unknown",
+                    file_path=path,
+                    blob_hash=sha256
+                )
+                db.add(scan_image)
+                db.commit()
+                committed.append(scan_image)
+            
+            # Stream the file into the content-addressed blob store (identical photos are stored once)
+            try:
+                stored = await save_upload_blob(file, UPLOADS_DIR, reference=reference)
+            except Exception:
+                # The blob was not stored - drop the row committed for it
+                db.rollback()
+                for scan_image in committed:
+                    db.delete(scan_image)
+                db.commit()
+                raise
+            uploaded_images.append({
+                "filename": stored["filename"],
+                "original_filename": file.filename,
+                "size": stored["size"],
+                "sha256": stored["sha256"],
+                "deduplicated": stored["deduplicated"]
+            })
+    finally:
+        # Rows are committed one by one, so the totals count whatever made it in
+        scan.total_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).count()
+        db.commit()
     
     return {
         "success": True,
@@ -1239,61 +1272,176 @@ async def upload_scan_images(scan_id: int, files: List[UploadFile] = File(...),
 
 
 @app.post("/scan/{scan_id}/process")
-async def process_scan(scan_id: int, db: Session = Depends(get_db)):
-    """Start AI processing of uploaded images"""
-    logger.info("=" * 80)
-    logger.info(f"🔄 SCAN PROCESSING: Starting scan {scan_id}")
-    logger.info(f"📊 ENVIRONMENT: {os.getenv('ENV_MODE', 'unknown')}")
-    logger.info(f"⏰ TIMESTAMP: {datetime.now().isoformat()}")
+def process_scan(scan_id: int, db: Session = Depends(get_db)):
+    """Start AI processing of uploaded images (runs in the threadpool so progress events can stream meanwhile)"""
+    with scan_context(scan_id):
+        return _process_scan(scan_id, db)
+
+
+# A PROCESSING scan not touched for this long is treated as abandoned (crashed worker).
+# The worker processing a scan touches it every PROCESSING_HEARTBEAT_SECONDS, also
+# while one slow image (timeouts, retries, failover) takes longer than the stale window
+PROCESSING_STALE_SECONDS = 300
+PROCESSING_HEARTBEAT_SECONDS = 30
+
+
+class ProcessingHeartbeat:
+    """Bumps a claimed scan's updated_at from a background thread until stopped"""
+    
+    def __init__(self, scan_id: int, interval: float = PROCESSING_HEARTBEAT_SECONDS):
+        self.scan_id = scan_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                        name=f"scan-{scan_id}-heartbeat", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                touched = db.query(Scan).filter(Scan.id == self.scan_id, Scan.status == "PROCESSING").update(
+                    {Scan.updated_at: datetime.utcnow()}, synchronize_session=False
+                )
+                db.commit()
+                if not touched:
+                    return
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"⚠️ Heartbeat for scan {self.scan_id} failed: {e}")
+            finally:
+                db.close()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _claim_scan_for_processing(scan_id: int, db: Session) -> bool:
+    """
+    Atomically move a scan to PROCESSING. PENDING and FAILED scans can be claimed,
+    and so can PROCESSING ones whose last checkpoint is stale; two workers can
+    never process the same scan at once.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=PROCESSING_STALE_SECONDS)
+    claimable = or_(
+        Scan.status.in_(["PENDING", "FAILED"]),
+        and_(Scan.status == "PROCESSING", or_(Scan.updated_at == None, Scan.updated_at < stale_before))
+    )
+    claimed = db.query(Scan).filter(Scan.id == scan_id, claimable).update(
+        {Scan.status: "PROCESSING", Scan.updated_at: datetime.utcnow()}, synchronize_session=False
+    )
+    if claimed:
+        # Before the commit: whoever sees PROCESSING no longer gets the previous run's events
+        scan_events.reset(scan_id)
+    db.commit()
+    return bool(claimed)
+
+
+def _process_scan(scan_id: int, db: Session):
+    """
+    Run AI processing for a scan; logs one summary record per scan.
+    
+    Each image is checkpointed in its own transaction (its results plus
+    processed_at), so results can be reviewed while later images are processed
+    and a restarted scan skips the images that already finished.
+    
+    Images identified one by one stream their cards: each card is published and
+    its Scryfall lookup started while the rest of the response is generated.
+    """
+    started = time.time()
+    lookahead = None
+    heartbeat = None
     
     scan = db.query(Scan).filter(Scan.id == scan_id).first()
     if not scan:
-        logger.error(f"❌ SCAN NOT FOUND: {scan_id}")
+        logger.warning("process_scan: scan %s not found", scan_id)
         raise HTTPException(status_code=404, detail="Scan not found")
         
-    if scan.status != "PENDING":
-        logger.error(f"❌ INVALID STATUS: Scan {scan_id} is {scan.status}, not PENDING")
+    if not _claim_scan_for_processing(scan_id, db):
+        db.refresh(scan)
+        logger.warning("process_scan: scan %s is %s, not ready for processing", scan_id, scan.status)
         raise HTTPException(status_code=400, detail="Scan is not ready for processing")
-    
-    logger.info(f"✅ SCAN FOUND: {scan_id} - Status: {scan.status}")
-    
-    # Update scan status
-    scan.status = "PROCESSING"
-    db.commit()
-    logger.info(f"✅ STATUS UPDATED: Scan {scan_id} -> PROCESSING")
+    db.refresh(scan)
     
     try:
-        # Get all images for this scan
-        scan_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).all()
-        logger.info(f"📊 IMAGES FOUND: {len(scan_images)} images for scan {scan_id}")
-        
-        total_cards_found = 0
-        processed_images = 0
+        heartbeat = ProcessingHeartbeat(scan_id)
+        # Get all images for this scan; finished ones are kept from an earlier run
+        scan_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).order_by(ScanImage.id).all()
+        pending_images = [scan_image for scan_image in scan_images if scan_image.processed_at is None]
+        resumed_images = len(scan_images) - len(pending_images)
+        scan_events.publish(scan_id, "scan_started", total_images=len(scan_images), resumed_images=resumed_images)
+        
+        total_cards_found = db.query(func.count(ScanResult.id)).filter(ScanResult.scan_id == scan_id).scalar() or 0
+        processed_images = resumed_images
+        failed_images = 0
+        for i, scan_image in enumerate(scan_images):
+            if scan_image.processed_at is not None:
+                scan_events.publish(scan_id, "image_done", index=i, image_id=scan_image.id, filename=scan_image.filename,
+                                    cards_found=scan_image.cards_found or 0, processed_images=processed_images,
+                                    resumed=True)
+        if resumed_images:
+            logger.info(f"🔁 Resuming scan {scan_id}: {resumed_images}/{len(scan_images)} images already processed")
+        
+        # Images are identified in multi-image requests where possible, one batch at
+        # a time inside the loop so every batch is checkpointed before the next is sent;
+        # anything a batch doesn't return is processed on its own
+        batched_results = {}
+        batch_attempted = set()
+        ai_processor = get_ai_processor()
+        
+        # Cards of a batch are resolved in one /cards/collection call; images processed
+        # one by one are resolved per image, with lookups started while the response streams
+        scryfall_resolver = ScryfallCollectionResolver()
+        lookahead = CardLookahead(scryfall_resolver)
         
         for i, scan_image in enumerate(scan_images):
+            if scan_image.processed_at is not None:
+                continue
             try:
-                logger.info(f"🔄 PROCESSING IMAGE {i+1}/{len(scan_images)}: {scan_image.file_path}")
+                logger.debug("Processing image %d/%d: %s", i + 1, len(scan_images), scan_image.file_path)
+                image_event = {"index": i, "image_id": scan_image.id, "filename": scan_image.filename}
+                scan_events.publish(scan_id, "image_started", **image_event)
                 
                 # Check if image file exists
                 if not os.path.exists(scan_image.file_path):
-                    logger.error(f"❌ IMAGE FILE NOT FOUND: {scan_image.file_path}")
+                    logger.error("Image file not found: %s", scan_image.file_path)
+                    failed_images += 1
+                    scan_events.publish(scan_id, "image_failed", **image_event, error="Image file not found")
                     continue
                 
-                # Get image file info
-                file_size = os.path.getsize(scan_image.file_path)
-                logger.info(f"📊 IMAGE SIZE: {file_size} bytes ({file_size/1024/1024:.2f} MB)")
-                
                 # Process image with AI
                 if ai_processor:
-                    logger.info(f"🤖 AI PROCESSING: Starting AI analysis...")
-                    card_results = ai_processor.process_image(scan_image.file_path)
-                    logger.info(f"✅ AI COMPLETE: Found {len(card_results)} cards")
+                    if scan_image.file_path not in batch_attempted:
+                        remaining = [
+                            image.file_path for image in pending_images[pending_images.index(scan_image):]
+                            if os.path.exists(image.file_path)
+                        ]
+                        batch = ai_processor.process_images(remaining, max_batches=1)
+                        batched_results.update(batch)
+                        # Batching off or the batch failed: the rest of the scan goes one by one
+                        batch_attempted.update(batch or remaining)
+                        batch_attempted.add(scan_image.file_path)
+                        scryfall_resolver.prefetch([card for cards in batch.values() for card in cards])
+                    card_results = batched_results.pop(scan_image.file_path, None)
+                    streamed_cards = []
+                    if card_results is None:
+                        def on_card(card_data):
+                            streamed_cards.append(card_data)
+                            scan_events.publish(scan_id, "card_identified", **image_event, name=card_data.get('name'),
+                                                set=card_data.get('set', ''), confidence=card_data.get('confidence'),
+                                                streamed=True)
+                            lookahead.submit(card_data)
+                        card_results = ai_processor.process_image(scan_image.file_path, on_card=on_card)
+                    if not streamed_cards:
+                        for card_data in card_results:
+                            scan_events.publish(scan_id, "card_identified", **image_event, name=card_data.get('name'),
+                                                set=card_data.get('set', ''), confidence=card_data.get('confidence'))
                     
-                    # Create scan results for each identified card
-                    for card_data in card_results:
-                        # Use enhanced Scryfall search with AI set information
-                        ai_set_info = card_data.get('set', '') or card_data.get('set_symbol_description', '')
-                        scryfall_data = ScryfallAPI.get_card_data(card_data['name'], ai_set_info)
+                    # Create scan results for each identified card, matched using the AI's set information;
+                    # streamed cards were prefetched by the lookahead, so this mostly reads its cache
+                    for card_data, scryfall_data in zip(card_results, scryfall_resolver.resolve(card_results)):
+                        logger.debug("Card '%s' -> %s", card_data['name'], scryfall_data.get('name') if scryfall_data else None)
                         
                         # Update confidence with Scryfall data
                         if scryfall_data:
@@ -1320,32 +1468,57 @@ async def process_scan(scan_id: int, db: Session = Depends(get_db)):
                         )
                         db.add(scan_result)
                         total_cards_found += 1
+                        scan_events.publish(
+                            scan_id, "scryfall_matched", **image_event,
+                            name=scan_result.card_name, set_code=scan_result.set_code, set_name=scan_result.set_name,
+                            matched=bool(scryfall_data), confidence_score=scan_result.confidence_score,
+                            image_url=scryfall_data.get('image_url', '') if scryfall_data else '',
+                            price_usd=scryfall_data.get('price_usd', 0.0) if scryfall_data else 0.0
+                        )
                     
                     # Update scan image
                     scan_image.cards_found = len(card_results)
                     scan_image.processed_at = datetime.utcnow()
+                    scan_image.processing_error = None
                     
                 else:
                     scan_image.processing_error = "AI processor not available"
                 
                 processed_images += 1
+                # Checkpoint: this image's results, its processed_at and the scan progress commit together
+                scan.processed_images = processed_images
+                scan.total_cards_found = total_cards_found
+                scan.updated_at = datetime.utcnow()
+                db.commit()
+                scan_events.publish(scan_id, "image_done", **image_event, cards_found=scan_image.cards_found or 0,
+                                    processed_images=processed_images)
                 
             except Exception as e:
                 error_msg = str(e)
-                logger.error(f"Error processing scan image {scan_image.id}: {error_msg}")
+                # Drop this image's uncommitted results; it stays unprocessed and is retried on resume
+                db.rollback()
+                total_cards_found = db.query(func.count(ScanResult.id)).filter(ScanResult.scan_id == scan_id).scalar() or 0
+                failed_images += 1
+                logger.error("Error processing scan image %s: %s", scan_image.id, error_msg)
                 scan_image.processing_error = error_msg
+                scan_events.publish(scan_id, "image_failed", index=i, image_id=scan_image.id,
+                                    filename=scan_image.filename, error=error_msg)
                 
                 # Check if this is an AI service error
                 if ai_processor:
                     last_error = ai_processor.get_last_error()
                     if last_error:
-                        logger.warning(f"AI service error details - Type: {last_error.error_type}, "
-                                     f"Quota: {last_error.is_quota_error}, "
-                                     f"Rate limit: {last_error.is_rate_limit}")
+                        logger.warning("AI service error details - Type: %s, Quota: %s, Rate limit: %s",
+                                       last_error.error_type, last_error.is_quota_error, last_error.is_rate_limit)
                         
                         # Update scan notes with error details for persistent tracking
                         if last_error.is_quota_error or last_error.is_rate_limit:
                             scan.notes = f"API Error: {last_error.error_type} - {last_error.message}"
+                scan.updated_at = datetime.utcnow()
+                db.commit()
+        
+        lookahead.close()
+        heartbeat.stop()
         
         # Update scan with results
         scan.processed_images = processed_images
@@ -1360,30 +1533,51 @@ async def process_scan(scan_id: int, db: Session = Depends(get_db)):
             scan.notes = f"Scan completed with 0 cards found. Images stored for future review."
         
         db.commit()
+        scan_events.publish(scan_id, "scan_done", status=scan.status, processed_images=processed_images,
+                            failed_images=failed_images, total_cards_found=total_cards_found)
+        
+        logger.info(
+            "process_scan %s: %d/%d images, %d cards in %.2fs",
+            scan_id, processed_images, len(scan_images), total_cards_found, time.time() - started,
+            extra={
+                "event": "process_scan",
+                "images": len(scan_images),
+                "processed_images": processed_images,
+                "failed_images": failed_images,
+                "resumed_images": resumed_images,
+                "cards": total_cards_found,
+                "scryfall_collection_requests": scryfall_resolver.collection_requests,
+                "scryfall_fallback_lookups": scryfall_resolver.fallback_lookups,
+                "scryfall_lookahead_cards": lookahead.submitted,
+                "duration_s": round(time.time() - started, 3),
+            }
+        )
         
         return {
             "success": True,
             "scan_id": scan_id,
             "status": scan.status,
             "processed_images": processed_images,
+            "resumed_images": resumed_images,
             "total_cards_found": total_cards_found
         }
         
     except Exception as e:
-        # Mark scan as failed
+        # Mark scan as failed; images checkpointed so far are kept for a resume
+        logger.error("process_scan %s failed: %s", scan_id, e, extra={"event": "process_scan_failed"})
+        if lookahead:
+            lookahead.close()
+        if heartbeat:
+            heartbeat.stop()
+        db.rollback()
         scan.status = "FAILED"
         scan.notes = f"Processing error: {str(e)}"
         db.commit()
+        scan_events.publish(scan_id, "scan_failed", status=scan.status, error=str(e))
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 
-@app.get("/scan/{scan_id}/status")
-async def get_scan_status(scan_id: int, db: Session = Depends(get_db)):
-    """Get current scan status and progress"""
-    scan = db.query(Scan).filter(Scan.id == scan_id).first()
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
+def _scan_status(scan: Scan) -> Dict[str, Any]:
     return {
         "scan_id": scan.id,
         "status": scan.status,
@@ -1396,9 +1590,110 @@ async def get_scan_status(scan_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _load_scan_status(scan_id: int) -> Optional[Dict[str, Any]]:
+    """Status snapshot in a short-lived session (the event stream outlives any request session)"""
+    ensure_db_initialized()
+    db = SessionLocal()
+    try:
+        scan = db.query(Scan).filter(Scan.id == scan_id).first()
+        return _scan_status(scan) if scan else None
+    finally:
+        db.close()
+
+
+# Scan statuses after which no more progress events are coming
+FINISHED_SCAN_STATUSES = ("READY_FOR_REVIEW", "FAILED", "COMPLETED")
+# How long a ?start=1 stream waits for processing to begin before trusting a finished status
+SCAN_EVENTS_START_TIMEOUT = 30.0
+# Also the keep-alive: an idle stream re-sends the status this often
+SCAN_EVENTS_STATUS_INTERVAL = 10.0
+
+
+@app.get("/scan/{scan_id}/status")
+async def get_scan_status(scan_id: int, db: Session = Depends(get_db)):
+    """Get current scan status and progress"""
+    scan = db.query(Scan).filter(Scan.id == scan_id).first()
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    return _scan_status(scan)
+
+
+@app.get("/scan/{scan_id}/events")
+async def stream_scan_events(scan_id: int, request: Request):
+    """
+    Server-Sent Events for scan processing: a "status" snapshot, then image_started,
+    card_identified, scryfall_matched, image_done / image_failed and finally
+    scan_done / scan_failed. Reconnects resume after Last-Event-ID. Clients that
+    can't stream keep polling /scan/{id}/status.
+    
+    ?start=1 is for a client about to trigger processing: until scan_started
+    arrives (or SCAN_EVENTS_START_TIMEOUT passes) the previous run's events and
+    a finished status, e.g. FAILED before a retry, don't end the stream.
+    """
+    if await run_in_threadpool(_load_scan_status, scan_id) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    try:
+        after_id = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        after_id = 0
+    start = request.query_params.get("start") in ("1", "true")
+    
+    async def events():
+        queue = asyncio.Queue()
+        missed = scan_events.subscribe(scan_id, queue, after_id)
+        try:
+            # Read after subscribing: a scan claimed from here on publishes to this queue
+            status = await run_in_threadpool(_load_scan_status, scan_id)
+            if status is None:
+                return
+            awaiting_start = start and status["status"] != "PROCESSING"
+            start_deadline = time.monotonic() + SCAN_EVENTS_START_TIMEOUT
+            yield sse_message("status", status)
+            if not awaiting_start:
+                for record in missed:
+                    yield sse_message(record["event"], record["data"], record["id"])
+                    if record["event"] in TERMINAL_EVENTS:
+                        return
+                if status["status"] in FINISHED_SCAN_STATUSES:
+                    return
+            
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), SCAN_EVENTS_STATUS_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Keeps the connection alive, and finishes the stream when the scan
+                    # was processed by another worker
+                    current = await run_in_threadpool(_load_scan_status, scan_id)
+                    if current is None:
+                        return
+                    if awaiting_start and time.monotonic() < start_deadline:
+                        continue
+                    yield sse_message("status", current)
+                    if current["status"] in FINISHED_SCAN_STATUSES:
+                        return
+                    continue
+                if record["event"] == "scan_started":
+                    awaiting_start = False
+                yield sse_message(record["event"], record["data"], record["id"])
+                if record["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            scan_events.unsubscribe(scan_id, queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.get("/scan/{scan_id}/results")
-async def get_scan_results(scan_id: int, db: Session = Depends(get_db)):
-    """Get scan results for review"""
+async def get_scan_results(scan_id: int, after_id: int = 0, db: Session = Depends(get_db)):
+    """
+    Get scan results for review. Results are committed image by image, so this
+    also serves the results found so far while the scan is still PROCESSING;
+    pass after_id (the last result id seen) to fetch only newer ones.
+    """
     scan = db.query(Scan).filter(Scan.id == scan_id).first()
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
@@ -1406,7 +1701,7 @@ async def get_scan_results(scan_id: int, db: Session = Depends(get_db)):
     # Get all scan results with image info
     results = db.query(ScanResult, ScanImage).join(
         ScanImage, ScanResult.scan_image_id == ScanImage.id
-    ).filter(ScanResult.scan_id == scan_id).all()
+    ).filter(ScanResult.scan_id == scan_id, ScanResult.id > after_id).order_by(ScanResult.id).all()
     
     scan_results = []
     for scan_result, scan_image in results:
@@ -1442,6 +1737,9 @@ async def get_scan_results(scan_id: int, db: Session = Depends(get_db)):
     return {
         "scan_id": scan_id,
         "scan_status": scan.status,
+        "partial": scan.status == "PROCESSING",
+        "processed_images": scan.processed_images,
+        "total_images": scan.total_images,
         "results": scan_results,
         "total_results": len(scan_results)
     }
@@ -1562,25 +1860,18 @@ async def commit_scan(scan_id: int, db: Session = Depends(get_db)):
         # Get all scan images for this scan
         scan_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).all()
         
-        # Delete physical image files from uploads directory
-        deleted_files = 0
-        for scan_image in scan_images:
-            try:
-                if scan_image.file_path and os.path.exists(scan_image.file_path):
-                    os.remove(scan_image.file_path)
-                    deleted_files += 1
-                    logger.info(f"🗑️ Deleted image file: {scan_image.file_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to delete image file {scan_image.file_path}: {e}")
-        
-        # Delete ScanImage records from database
-        for scan_image in scan_images:
-            db.delete(scan_image)
-        
-        # Delete any ScanResult records (they're orphaned anyway)
+        # Delete any ScanResult records first (they reference the images)
         all_results = db.query(ScanResult).filter(ScanResult.scan_id == scan_id).all()
         for result in all_results:
             db.delete(result)
+        db.flush()
+        
+        # Delete ScanImage records, then work out which files nothing else references
+        for scan_image in scan_images:
+            db.delete(scan_image)
+        db.flush()
+        files_to_delete = unreferenced_files(db, scan_images)
+        deleted_files = len(files_to_delete)
         
         # Update scan record for audit trail (keep the scan record!)
         scan.status = "COMPLETED"
@@ -1590,6 +1881,9 @@ async def commit_scan(scan_id: int, db: Session = Depends(get_db)):
         
         db.commit()
         
+        # Remove files only once the rows are gone; shared blobs stay
+        deleted_files = delete_files(files_to_delete, db)
+        
         logger.info(f"✅ ZERO-CARD POLICY: Scan {scan_id} completed with cleanup - {deleted_files} files deleted")
         
         return {
@@ -1706,23 +2000,18 @@ async def cancel_scan(scan_id: int, db: Session = Depends(get_db)):
     # Get scan images for cleanup
     scan_images = db.query(ScanImage).filter(ScanImage.scan_id == scan_id).all()
     
-    # Delete image files
-    deleted_files = 0
-    for scan_image in scan_images:
-        try:
-            if os.path.exists(scan_image.file_path):
-                os.remove(scan_image.file_path)
-                deleted_files += 1
-        except Exception as e:
-            print(f"Error deleting file {scan_image.file_path}: {e}")
-    
-    # Update scan status
+    # Update scan status; a cancelled scan no longer holds references to its blobs
     scan.status = "CANCELLED"
     scan.updated_at = datetime.utcnow()
-    scan.notes = f"Cancelled by user. {deleted_files} files cleaned up."
+    db.flush()
+    files_to_delete = unreferenced_files(db, scan_images)
+    scan.notes = f"Cancelled by user. {len(files_to_delete)} files cleaned up."
     
     db.commit()
     
+    # Delete image files nothing else references
+    deleted_files = delete_files(files_to_delete, db)
+    
     return {
         "success": True,
         "scan_id": scan_id,
@@ -1969,9 +2258,15 @@ async def get_scan_history(db: Session = Depends(get_db), limit: int = 50, offse
         raise HTTPException(status_code=500, detail=f"Error getting scan history: {str(e)}")
 
 
+@app.get("/debug/startup")
+async def get_startup_profile():
+    """Startup phase timings (import, init_db, AI clients) and time to first healthy response"""
+    return startup_report()
+
 @app.get("/debug/ai-health")
 async def get_ai_health():
     """Check AI processor health status"""
+    ai_processor = get_ai_processor()
     if ai_processor is None:
         return {"status": "unavailable", "error": "AI processor not initialized"}
     
@@ -1994,9 +2289,22 @@ async def get_ai_health():
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+@app.get("/debug/logging")
+async def get_logging_status():
+    """Get scans that currently have DEBUG logging enabled"""
+    return {"debug_scan_ids": sorted(get_debug_scan_ids())}
+
+@app.put("/debug/logging/scan/{scan_id}")
+async def set_scan_debug_logging(scan_id: int, request_data: dict = None):
+    """Switch DEBUG logging on or off for a single scan"""
+    enabled = request_data.get('enabled', True) if request_data else True
+    set_scan_debug(scan_id, bool(enabled))
+    return {"success": True, "scan_id": scan_id, "debug": bool(enabled)}
+
 @app.get("/debug/ai-errors")
 async def get_ai_errors():
     """Get recent AI processing errors"""
+    ai_processor = get_ai_processor()
     if ai_processor is None:
         return {"error": "AI processor not available"}
     
@@ -2023,6 +2331,7 @@ async def get_ai_logs_full():
         logs_content = []
         
         # Add AI processor information
+        ai_processor = get_ai_processor()
         if ai_processor:
             logs_content.append("=== AI PROCESSOR STATUS ===")
             logs_content.append(f"Model: gpt-4o")
@@ -2547,6 +2856,67 @@ async def list_uploads():
         "files": files
     }
 
+def _require_sync_token(request: Request):
+    """The volume sync endpoints are disabled until SYNC_TOKEN is set, and then require it"""
+    token = os.getenv("SYNC_TOKEN")
+    if not token:
+        raise HTTPException(status_code=503, detail="Volume sync is disabled: SYNC_TOKEN is not configured")
+    provided = request.headers.get("authorization", "")
+    if not hmac.compare_digest(provided.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid sync token")
+
+def _sync_file_path(path: str) -> str:
+    try:
+        return volume_path(UPLOADS_DIR, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/sync/manifest")
+def get_sync_manifest_endpoint(request: Request):
+    """Manifest of every file in the uploads volume: {path: {size, mtime, sha256}}"""
+    _require_sync_token(request)
+    files = get_sync_manifest(UPLOADS_DIR).refresh()
+    return {
+        "success": True,
+        "uploads_dir": UPLOADS_DIR,
+        "file_count": len(files),
+        "files": files
+    }
+
+@app.get("/api/sync/files/{path:path}")
+async def download_sync_file(path: str, request: Request):
+    """Raw file from the uploads volume by manifest path"""
+    _require_sync_token(request)
+    file_path = _sync_file_path(path)
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return local_file_response(request, file_path)
+
+@app.put("/api/sync/files/{path:path}")
+async def upload_sync_file(path: str, request: Request):
+    """
+    Write a file into the uploads volume by manifest path, atomically. A blob
+    must hash to its own name; an X-Content-SHA256 header is verified as well.
+    Either is checked before the file replaces anything.
+    """
+    _require_sync_token(request)
+    file_path = _sync_file_path(path)
+    expected_sha256 = request.headers.get("x-content-sha256")
+    filename = os.path.basename(file_path)
+    if is_blob_filename(filename):
+        blob_hash = filename.split(".", 1)[0]
+        if expected_sha256 and expected_sha256.lower() != blob_hash:
+            raise HTTPException(status_code=400, detail=f"Checksum {expected_sha256} does not match blob {filename}")
+        expected_sha256 = blob_hash
+    stored = await save_stream(request.stream(), file_path, expected_sha256)
+    get_sync_manifest(UPLOADS_DIR).record(path, stored["sha256"])
+    return {
+        "success": True,
+        "path": path,
+        "size": stored["size"],
+        "sha256": stored["sha256"]
+    }
+
 if __name__ == "__main__":
     import uvicorn
     import os
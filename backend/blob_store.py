@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Blob Store - content-addressed storage for uploaded images.
+
+Each distinct image is stored once as uploads/blobs/ab/cd/<sha256><ext> and served
+as /uploads/<sha256><ext>. ScanImage.blob_hash records which blob an image row
+uses; a blob is deleted only when no live (non-cancelled) scan still references it.
+Images uploaded before the blob store keep their flat scan_{id}_{uuid}.ext files.
+
+Storing and deleting a blob happen under blob_lock (a thread lock plus an flock
+on blobs/.lock, so other workers are covered too). Uploads commit their
+ScanImage row before the blob is stored, and delete_files re-checks references
+under the lock, so a blob that an upload just deduplicated onto is never removed.
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: the thread lock alone covers a single worker
+    fcntl = None
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from backend.database import ScanImage
+
+logger = get_logger(__name__)
+
+BLOB_DIR_NAME = "blobs"
+
+_BLOB_FILENAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]{1,8})?$")
+
+
+def normalize_extension(original_filename: Optional[str]) -> str:
+    """Lower-case extension of the uploaded file, .jpg if it has none"""
+    extension = os.path.splitext(original_filename or "")[1].lower()
+    return extension if re.match(r"^\.[a-z0-9]{1,8}$", extension) else ".jpg"
+
+
+def blob_filename(blob_hash: str, extension: str) -> str:
+    """Public filename of a blob, as used in /uploads/{filename}"""
+    return f"{blob_hash}{extension}"
+
+
+def is_blob_filename(filename: str) -> bool:
+    return bool(_BLOB_FILENAME.match(filename))
+
+
+def blob_path(uploads_dir: str, filename: str) -> str:
+    """Sharded on-disk location of a blob filename"""
+    blob_hash = _BLOB_FILENAME.match(filename).group(1)
+    return os.path.join(uploads_dir, BLOB_DIR_NAME, blob_hash[:2], blob_hash[2:4], filename)
+
+
+def resolve_upload_path(uploads_dir: str, filename: str) -> str:
+    """Local path for an /uploads/{filename} name - sharded for blobs, flat for legacy files"""
+    if is_blob_filename(filename):
+        return blob_path(uploads_dir, filename)
+    return os.path.join(uploads_dir, filename)
+
+
+_blob_thread_lock = threading.Lock()
+
+
+@contextmanager
+def blob_lock(blobs_dir: str) -> Iterator[None]:
+    """Exclusive access to the blob store for storing or deleting blobs"""
+    with _blob_thread_lock:
+        os.makedirs(blobs_dir, exist_ok=True)
+        with open(os.path.join(blobs_dir, ".lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def store_blob(uploads_dir: str, temp_path: str, blob_hash: str, extension: str) -> Tuple[str, str, bool]:
+    """
+    Move a fully written temp file into the blob store.
+    Returns (path, filename, deduplicated); if the blob already exists the temp file is discarded.
+    Commit the row referencing the blob first, so a concurrent delete_files keeps it.
+    """
+    filename = blob_filename(blob_hash, extension)
+    path = blob_path(uploads_dir, filename)
+    with blob_lock(os.path.join(uploads_dir, BLOB_DIR_NAME)):
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return path, filename, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+    return path, filename, False
+
+
+def live_references(db: Session, blob_hashes: Iterable[str]) -> Set[str]:
+    """Blob hashes still used by a ScanImage of a scan that is not cancelled"""
+    # Imported here so path helpers work without a configured database (sync and backup scripts)
+    from backend.database import Scan, ScanImage
+
+    blob_hashes = list(set(blob_hashes))
+    if not blob_hashes:
+        return set()
+    rows = (
+        db.query(ScanImage.blob_hash, func.count(ScanImage.id))
+        .join(Scan, Scan.id == ScanImage.scan_id)
+        .filter(ScanImage.blob_hash.in_(blob_hashes), Scan.status != "CANCELLED")
+        .group_by(ScanImage.blob_hash)
+        .all()
+    )
+    return {blob_hash for blob_hash, count in rows if count > 0}
+
+
+def unreferenced_files(db: Session, scan_images: List["ScanImage"]) -> List[str]:
+    """
+    Files that can be removed once scan_images are no longer live (deleted rows
+    or a cancelled scan - flush those changes first). Legacy images own their
+    file outright; blobs are only returned when nothing else references them.
+    """
+    still_used = live_references(db, [image.blob_hash for image in scan_images if image.blob_hash])
+    paths = []
+    for image in scan_images:
+        if image.blob_hash and image.blob_hash in still_used:
+            continue
+        if image.file_path and image.file_path not in paths:
+            paths.append(image.file_path)
+    return paths
+
+
+def delete_files(paths: List[str], db: Optional[Session] = None) -> int:
+    """
+    Remove files, returning how many were deleted. With db, blobs are re-checked
+    under blob_lock and kept if a live scan started referencing them meanwhile.
+    """
+    deleted = 0
+    for path in paths:
+        filename = os.path.basename(path)
+        try:
+            if db is not None and is_blob_filename(filename):
+                # blobs/ab/cd/<filename>
+                with blob_lock(os.path.dirname(os.path.dirname(os.path.dirname(path)))):
+                    if live_references(db, [filename.split(".", 1)[0]]):
+                        logger.debug("Kept blob still referenced: %s", path)
+                        continue
+                    deleted += _remove(path)
+            else:
+                deleted += _remove(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to delete image file {path}: {e}")
+    return deleted
+
+
+def _remove(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    os.remove(path)
+    logger.debug("Deleted image file: %s", path)
+    return 1
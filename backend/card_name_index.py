@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Card Name Index - in-memory fuzzy matcher over every Magic card name.
+
+Names come from Scryfall's /catalog/card-names (cached on disk and refreshed
+weekly), falling back to the names in the cards table when Scryfall can't be
+reached. That fallback only knows the user's own collection, so it is marked
+incomplete and rebuilt from the catalog once Scryfall answers again. Lookups normalise the name (case, accents, punctuation, spacing) and
+hit a dict first; otherwise a trigram inverted index proposes candidates that
+are ranked by edit distance. Exact hits take microseconds, typo matches a few
+milliseconds, and repeated queries are cached.
+
+The AI processor uses it to correct slightly misread names before they reach
+Scryfall and as a signal in the confidence score.
+"""
+
+import heapq
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.logging_config import get_logger
+from backend.scryfall_client import fetch_cached
+from backend.startup import LazyResource
+
+logger = get_logger(__name__)
+
+CARD_NAMES_MAX_AGE_SECONDS = 7 * 24 * 3600
+# How often an index built without the catalog retries fetching it
+CATALOG_RETRY_SECONDS = 15 * 60
+
+# Sources that hold only part of the card names - an unknown name proves nothing
+PARTIAL_SOURCES = ("database", "empty")
+
+# Trigram candidates ranked by edit distance, and the minimum score to rewrite a name
+CANDIDATE_POOL = 12
+CORRECTION_MIN_SCORE = 0.8
+CORRECTION_MIN_MARGIN = 0.05
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    decomposed = unicodedata.normalize("NFKD", (name or "").replace("Æ", "Ae").replace("æ", "ae"))
+    ascii_name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_PUNCTUATION.sub("", ascii_name.lower().replace("-", " ")).split())
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent swaps), giving
+    up with limit + 1 once every alignment is over the limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class CardNameIndex:
+    """Exact and fuzzy lookup over a fixed set of card names"""
+
+    def __init__(self, names: Iterable[str], source: str = "memory"):
+        self.source = source
+        self.built_at = time.monotonic()
+        self._exact: Dict[str, str] = {}
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for name in names:
+            self._add(name)
+            # Faces of split / double-faced cards are printed (and read) on their own
+            if " // " in name:
+                for face in name.split(" // "):
+                    self._add(face)
+        self._postings = dict(self._postings)
+        self.match = lru_cache(maxsize=4096)(self._match)
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def complete(self) -> bool:
+        """True when built from the full card catalog, so a miss means the name does not exist"""
+        return self.source not in PARTIAL_SOURCES
+
+    def _add(self, name: str):
+        key = normalize_name(name)
+        if not key or key in self._exact:
+            return
+        self._exact[key] = name
+        position = len(self._keys)
+        self._keys.append(key)
+        self._names.append(name)
+        for gram in _trigrams(key):
+            self._postings[gram].append(position)
+
+    def _match(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Best candidates as [{"name", "score", "distance"}], score 1.0 for an exact (normalised) hit"""
+        key = normalize_name(name)
+        if not key:
+            return []
+        if key in self._exact:
+            return [{"name": self._exact[key], "score": 1.0, "distance": 0}]
+
+        grams = _trigrams(key)
+        # Counting in C (Counter over the chained posting lists) keeps candidate selection cheap
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        # Dice coefficient on trigrams picks a small pool; edit distance ranks it.
+        # A key of length n has n + 1 trigrams
+        pool = heapq.nlargest(
+            CANDIDATE_POOL, shared.items(),
+            key=lambda item: item[1] / (len(grams) + len(self._keys[item[0]]) + 1)
+        )
+
+        limit_distance = max(2, len(key) // 3)
+        matches = []
+        for position, _ in pool:
+            candidate = self._keys[position]
+            distance = edit_distance(key, candidate, limit_distance)
+            if distance <= limit_distance:
+                score = 1.0 - distance / max(len(key), len(candidate))
+                matches.append({"name": self._names[position], "score": round(score, 3), "distance": distance})
+        matches.sort(key=lambda match: (-match["score"], match["name"]))
+        return matches[:limit]
+
+    def correct(self, name: str) -> Optional[str]:
+        """
+        Canonical spelling of a name: the exact hit, or the best fuzzy match when it
+        is close and clearly ahead of the runner-up. None when unsure.
+        """
+        matches = self.match(name, 2)
+        if not matches:
+            return None
+        best = matches[0]
+        if best["score"] < CORRECTION_MIN_SCORE:
+            return None
+        if len(matches) > 1 and best["score"] - matches[1]["score"] < CORRECTION_MIN_MARGIN:
+            return None
+        return best["name"]
+
+
+def _database_names() -> List[str]:
+    from backend.database import SessionLocal, Card, ensure_db_initialized
+    ensure_db_initialized()
+    db = SessionLocal()
+    try:
+        return [name for (name,) in db.query(Card.name).distinct() if name]
+    finally:
+        db.close()
+
+
+def build_card_name_index() -> CardNameIndex:
+    """Cached Scryfall catalog (refreshed when stale), else the cards table"""
+    started = time.perf_counter()
+    catalog, source = fetch_cached("/catalog/card-names", "card_names.json", CARD_NAMES_MAX_AGE_SECONDS)
+    names = catalog.get("data") if isinstance(catalog, dict) else None
+    if names is None:
+        try:
+            names, source = _database_names(), "database"
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read card names from the database: {e}")
+            names, source = [], "empty"
+    index = CardNameIndex(names, source)
+    logger.info(f"📇 Card name index: {len(index)} names from {source} in {time.perf_counter() - started:.2f}s")
+    return index
+
+
+_index = LazyResource("card_name_index", build_card_name_index)
+
+
+def get_card_name_index() -> CardNameIndex:
+    """Process-wide index, built on first use; a partial one is rebuilt in the background now and then"""
+    index = _index.get()
+    if index is not None and not index.complete and time.monotonic() - index.built_at > CATALOG_RETRY_SECONDS:
+        index.built_at = time.monotonic()
+        _index.refresh()
+    return index
+
+
+def warm_card_name_index():
+    return _index.warm()
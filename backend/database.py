@@ -7,6 +7,8 @@ import uuid
 import json
 import logging
 from sqlalchemy import text
+from backend.startup import LazyResource
+from backend.schema_health import check_schema_health, install_sequence_repair
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -36,43 +38,12 @@ else:
     print(f"🌐 Using production PostgreSQL: {masked_url}")
     engine = create_engine(prod_database_url)
 
+# Primary key collisions from a lagging sequence repair the sequence for every session
+install_sequence_repair(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def validate_and_fix_sequences():
-    """Validate and fix PostgreSQL sequences on startup"""
-    try:
-        with engine.connect() as conn:
-            # Define tables and their sequences
-            tables_and_sequences = [
-                ('cards', 'cards_id_seq'),
-                ('scans', 'scans_id_seq'),
-                ('scan_images', 'scan_images_id_seq'),
-                ('scan_results', 'scan_results_id_seq')
-            ]
-            
-            for table_name, sequence_name in tables_and_sequences:
-                try:
-                    # Get max ID from table
-                    result = conn.execute(text(f"SELECT MAX(id) FROM {table_name};"))
-                    max_id = result.scalar() or 0
-                    
-                    # Set sequence to max_id + 1
-                    next_id = max_id + 1
-                    conn.execute(text(f"SELECT setval('{sequence_name}', {next_id}, false);"))
-                    
-                    logger.info(f"✅ Fixed {sequence_name}: set to {next_id}")
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not fix {sequence_name}: {e}")
-            
-            conn.commit()
-            logger.info("🔧 Database sequences validated and fixed")
-            
-    except Exception as e:
-        logger.error(f"❌ Error validating sequences: {e}")
-
-
 class Card(Base):
     __tablename__ = "cards"
     
@@ -145,6 +116,7 @@ class ScanImage(Base):
     processed_at = Column(DateTime, nullable=True)
     cards_found = Column(Integer, default=0)
     processing_error = Column(Text, nullable=True)  # Store any processing errors
+    blob_hash = Column(String(64), nullable=True, index=True)  # sha256 of the image in the blob store (None for legacy flat files)
     
     # Relationships
     scan = relationship("Scan", back_populates="scan_images")
@@ -185,15 +157,46 @@ class ScanResult(Base):
     card = relationship("Card", backref="scan_result")
 
 
+def ensure_columns():
+    """Add columns introduced after a table was first created (create_all only creates missing tables)"""
+    from sqlalchemy import inspect
+    
+    added_columns = [
+        ("scan_images", "blob_hash", "VARCHAR(64)", "ix_scan_images_blob_hash"),
+    ]
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, column_name, column_type, index_name in added_columns:
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            if column_name in existing:
+                continue
+            logger.info(f"➕ Adding column {table_name}.{column_name}")
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_name})"))
+
 def init_db():
     """Initialize the database and create tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
     
-    # Validate and fix sequences on startup
-    validate_and_fix_sequences()
+    # Sequence check only runs when an import/migration or schema change was recorded
+    check_schema_health(engine, Base.metadata)
+
+# Schema check and sequence repair run once per process, on first database use
+# (or earlier, when the app's startup hook warms it in the background)
+_database_ready = LazyResource("init_db", lambda: init_db() or True)
+
+def ensure_db_initialized():
+    """Run init_db() once per process; blocks until a warm-up in progress finishes"""
+    _database_ready.get()
+
+def warm_database():
+    """Start init_db() in the background so the first request doesn't pay for it"""
+    return _database_ready.warm()
 
 def get_db():
     """Get database session"""
+    ensure_db_initialized()
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Database Migration - bulk copy of tables between databases (SQLite -> PostgreSQL)
+and PostgreSQL sequence repair.
+
+Rows are streamed from the source in chunks, converted to the target column types
+and loaded with COPY FROM STDIN on PostgreSQL (multi-row INSERTs elsewhere).
+Tables are copied level by level in foreign key order, tables within a level in
+parallel. "replace" mode truncates and reloads, "upsert" mode stages each chunk and
+merges it with INSERT ... ON CONFLICT, only touching rows that changed - both are
+safe to run repeatedly.
+
+Chunks are committed as they load, so a failed run leaves the target partly
+loaded; run it again to finish. Replace mode only accepts a table subset that
+includes every table referencing it, since emptying a table must not orphan
+(or silently empty) rows that point at it.
+"""
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, MetaData, Table, inspect, text
+from sqlalchemy.engine import Engine
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+MIGRATION_MODES = ("replace", "upsert")
+
+
+def fix_sequences(engine: Engine, tables: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Move every serial id sequence past MAX(id) so new rows don't collide with
+    copied ones. Returns {table: next id}; a no-op on databases without sequences.
+    """
+    if engine.dialect.name != "postgresql":
+        return {}
+    inspector = inspect(engine)
+    tables = tables or inspector.get_table_names()
+    fixed = {}
+    with engine.begin() as conn:
+        for table in tables:
+            if "id" not in {column["name"] for column in inspector.get_columns(table)}:
+                continue
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                    {"table": f'"{table}"'}).scalar()
+            if not sequence:
+                continue
+            max_id = conn.execute(text(f'SELECT MAX(id) FROM "{table}"')).scalar()
+            # is_called=false: the next nextval() returns exactly this value
+            next_id = (max_id or 0) + 1
+            conn.execute(text("SELECT setval(:sequence, :next_id, false)"),
+                         {"sequence": sequence, "next_id": next_id})
+            fixed[table] = next_id
+            logger.info(f"🔧 Sequence {sequence} set to {next_id}")
+    return fixed
+
+
+def missing_dependents(tables: List[Table], all_tables: List[Table]) -> List[str]:
+    """Tables outside `tables` whose foreign keys (directly or through each other) point into it"""
+    selected = {table.name for table in tables}
+    closure = set(selected)
+    changed = True
+    while changed:
+        changed = False
+        for table in all_tables:
+            if table.name not in closure and any(fk.column.table.name in closure for fk in table.foreign_keys):
+                closure.add(table.name)
+                changed = True
+    return sorted(closure - selected)
+
+
+def table_levels(tables: List[Table]) -> List[List[Table]]:
+    """
+    Group tables so each one only references tables in earlier groups.
+    Tables in the same group can be loaded in parallel.
+    """
+    names = {table.name for table in tables}
+    remaining = {table.name: table for table in tables}
+    done = set()
+    levels = []
+    while remaining:
+        level = []
+        for table in remaining.values():
+            # Self references and tables outside the migration don't constrain the order
+            parents = {fk.column.table.name for fk in table.foreign_keys} & names - {table.name}
+            if parents <= done:
+                level.append(table)
+        if not level:
+            # Foreign key cycle - load the rest one at a time in a stable order
+            level = [remaining[sorted(remaining)[0]]]
+        levels.append(sorted(level, key=lambda table: table.name))
+        for table in level:
+            done.add(table.name)
+            del remaining[table.name]
+    return levels
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+
+
+def column_converter(column) -> Callable[[Any], Any]:
+    """Convert raw SQLite values (0/1 booleans, ISO timestamp strings) to the target column type"""
+    if isinstance(column.type, Boolean):
+        def convert_bool(value):
+            if value is None or isinstance(value, bool):
+                return value
+            if isinstance(value, str):
+                return value.strip().lower() in ("1", "t", "true", "yes")
+            return bool(value)
+        return convert_bool
+    if isinstance(column.type, DateTime):
+        def convert_datetime(value):
+            if isinstance(value, str) and value.strip():
+                return _parse_datetime(value)
+            return value or None
+        return convert_datetime
+    if isinstance(column.type, Date):
+        def convert_date(value):
+            if isinstance(value, str) and value.strip():
+                return _parse_datetime(value).date() if len(value.strip()) > 10 else date.fromisoformat(value.strip())
+            return value or None
+        return convert_date
+    return lambda value: value
+
+
+def _copy_field(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    elif isinstance(value, date):
+        value = value.isoformat()
+    elif isinstance(value, bytes):
+        value = "\\x" + value.hex()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_buffer(rows: List[List[Any]]) -> io.StringIO:
+    """
+    CSV for COPY: every non-NULL value that isn't a number is quoted and NULL is
+    the unquoted empty field, so None and '' stay distinct.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+class TableMigrator:
+    """Copies tables from a source engine to a target engine"""
+
+    def __init__(self, source: Engine, target: Engine, mode: str = "replace",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 4, use_copy: bool = True):
+        if mode not in MIGRATION_MODES:
+            raise ValueError(f"Unknown migration mode {mode}, expected one of {MIGRATION_MODES}")
+        self.source = source
+        self.target = target
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.use_copy = use_copy and target.dialect.name == "postgresql"
+
+    def migrate(self, table_names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Copy the tables present in both databases; returns per-table row counts and timings"""
+        source_metadata = MetaData()
+        source_metadata.reflect(bind=self.source)
+        target_metadata = MetaData()
+        target_metadata.reflect(bind=self.target)
+
+        names = [
+            name for name in source_metadata.tables
+            if name in target_metadata.tables and (not table_names or name in table_names)
+        ]
+        for name in table_names or []:
+            if name not in names:
+                logger.warning(f"⚠️ Table {name} is missing from the source or target database, skipping")
+
+        tables = [target_metadata.tables[name] for name in names]
+        if self.mode == "replace" and tables:
+            dependents = missing_dependents(tables, list(target_metadata.tables.values()))
+            if dependents:
+                raise ValueError(
+                    f"Replace mode would empty {', '.join(names)} while {', '.join(dependents)} still reference them; "
+                    f"include those tables or use upsert mode"
+                )
+            self._clear(tables)
+
+        results = {}
+        started = time.perf_counter()
+        for level in table_levels(tables):
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(level)))) as pool:
+                for name, result in zip(
+                    [table.name for table in level],
+                    pool.map(lambda table: self._migrate_table(source_metadata.tables[table.name], table), level)
+                ):
+                    results[name] = result
+
+        fix_sequences(self.target, names)
+        logger.info(
+            f"✅ Migrated {sum(result['rows'] for result in results.values())} rows in {len(results)} tables "
+            f"({self.mode}) in {time.perf_counter() - started:.1f}s"
+        )
+        return results
+
+    def _clear(self, tables: List[Table]):
+        with self.target.begin() as conn:
+            if self.target.dialect.name == "postgresql":
+                # No CASCADE: a table referencing these that isn't being reloaded makes this fail
+                conn.execute(text("TRUNCATE " + ", ".join(f'"{table.name}"' for table in tables)))
+            else:
+                for level in reversed(table_levels(tables)):
+                    for table in level:
+                        conn.execute(table.delete())
+
+    def _migrate_table(self, source_table: Table, target_table: Table) -> Dict[str, Any]:
+        started = time.perf_counter()
+        columns = [column for column in target_table.columns if column.name in source_table.c]
+        if self.mode == "upsert" and not target_table.primary_key.columns:
+            raise ValueError(f"Upsert mode needs a primary key on {target_table.name}")
+        converters = [column_converter(column) for column in columns]
+        column_list = ", ".join(f'"{column.name}"' for column in columns)
+
+        rows = 0
+        with self.source.connect() as source_conn:
+            # Raw driver values - reflected SQLite types would choke on non-canonical timestamps
+            result = source_conn.execution_options(stream_results=True).exec_driver_sql(
+                f'SELECT {column_list} FROM "{source_table.name}"'
+            )
+            for chunk in result.partitions(self.chunk_size):
+                converted = [[convert(value) for convert, value in zip(converters, row)] for row in chunk]
+                self._load_chunk(target_table, columns, column_list, converted)
+                rows += len(converted)
+                logger.debug("Copied %d rows of %s", rows, target_table.name)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"📥 {target_table.name}: {rows} rows in {elapsed:.1f}s")
+        return {"rows": rows, "seconds": round(elapsed, 2)}
+
+    def _load_chunk(self, table: Table, columns, column_list: str, rows: List[List[Any]]):
+        if self.use_copy:
+            self._copy_chunk(table, columns, column_list, rows)
+            return
+        records = [dict(zip([column.name for column in columns], row)) for row in rows]
+        with self.target.begin() as conn:
+            if self.mode == "upsert":
+                conn.execute(self._upsert_statement(table, columns), records)
+            else:
+                conn.execute(table.insert(), records)
+
+    def _upsert_statement(self, table: Table, columns):
+        if self.target.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table)
+        key_names = {column.name for column in table.primary_key.columns}
+        return statement.on_conflict_do_update(
+            index_elements=list(key_names),
+            set_={column.name: statement.excluded[column.name] for column in columns if column.name not in key_names}
+        )
+
+    def _copy_chunk(self, table: Table, columns, column_list: str, rows: List[List[Any]]):
+        raw = self.target.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if self.mode == "replace":
+                cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv)',
+                                   _copy_buffer(rows))
+            else:
+                # Stage the chunk, then merge - rows that are identical stay untouched
+                stage = f"_stage_{table.name}"
+                keys = [column.name for column in table.primary_key.columns]
+                updates = [column.name for column in columns if column.name not in keys]
+                cursor.execute(f'CREATE TEMP TABLE "{stage}" (LIKE "{table.name}" INCLUDING DEFAULTS) ON COMMIT DROP')
+                cursor.copy_expert(f'COPY "{stage}" ({column_list}) FROM STDIN WITH (FORMAT csv)', _copy_buffer(rows))
+                key_list = ", ".join(f'"{key}"' for key in keys)
+                if updates:
+                    conflict = (
+                        "DO UPDATE SET " + ", ".join(f'"{name}" = EXCLUDED."{name}"' for name in updates)
+                        + " WHERE (" + ", ".join(f'"{table.name}"."{name}"' for name in updates) + ")"
+                        + " IS DISTINCT FROM (" + ", ".join(f'EXCLUDED."{name}"' for name in updates) + ")"
+                    )
+                else:
+                    conflict = "DO NOTHING"
+                cursor.execute(
+                    f'INSERT INTO "{table.name}" ({column_list}) SELECT {column_list} FROM "{stage}" '
+                    f'ON CONFLICT ({key_list}) {conflict}'
+                )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
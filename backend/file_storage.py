@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+File Storage - serving uploaded images from the local uploads directory with
+conditional/range request support, fetching missing files from the Railway
+deployment through a pooled async client with single-flight write-through caching,
+resized thumbnails kept in a size-bounded LRU disk cache, and streaming upload
+ingestion with background replication to Railway through the volume sync endpoints
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+import httpx
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from backend.blob_store import blob_filename, blob_path, is_blob_filename, normalize_extension, store_blob
+from backend.logging_config import get_logger, should_sample
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+REMOTE_TIMEOUT_SECONDS = 15
+REPLICATION_TIMEOUT_SECONDS = 30
+REPLICATION_CONCURRENCY = 4
+
+# Largest accepted upload in bytes (MAX_UPLOAD_SIZE, default 25 MB)
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(25 * 1024 * 1024)))
+
+# Shared client for Railway fallback fetches (created on first use, closed on shutdown)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# filename -> future resolved when the in-flight remote fetch finishes (True if cached)
+_inflight_fetches: Dict[str, asyncio.Future] = {}
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Thumbnail widths served; requested widths round up to the next one so the cache stays bounded
+THUMBNAIL_WIDTHS = (64, 128, 256, 512, 1024)
+THUMBNAIL_CACHE_HEADERS = {"cache-control": "public, max-age=31536000, immutable"}
+# Longest a request waits for another request's in-flight render of the same thumbnail
+THUMBNAIL_WAIT_SECONDS = 30
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client for remote file fetches"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REMOTE_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            follow_redirects=True
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared client (application shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single byte range into inclusive (start, end); None if unsatisfiable"""
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    start, end = match.group(1), match.group(2)
+    if not start:
+        # Suffix range: last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+async def _read_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def local_file_response(request: Request, path: str, headers: Optional[Dict[str, str]] = None,
+                        media_type: Optional[str] = None) -> Response:
+    """
+    Serve a local file with ETag/Last-Modified validators, 304 for conditional
+    requests and 206 for single byte ranges
+    """
+    stat_result = os.stat(path)
+    etag = _etag(stat_result)
+    response_headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        **(headers or {})
+    }
+
+    if _not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=response_headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, stat_result.st_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**response_headers, "content-range": f"bytes */{stat_result.st_size}"})
+        start, end = byte_range
+        return StreamingResponse(
+            _read_range(path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={
+                **response_headers,
+                "content-range": f"bytes {start}-{end}/{stat_result.st_size}",
+                "content-length": str(end - start + 1)
+            }
+        )
+
+    return FileResponse(path, headers=response_headers, media_type=media_type, stat_result=stat_result)
+
+
+async def _stream_through(response: httpx.Response, local_path: str, done: asyncio.Future) -> AsyncIterator[bytes]:
+    """Relay a remote response to the client while writing it to the local cache"""
+    temp_path = f"{local_path}.part-{uuid.uuid4().hex}"
+    cached = False
+    try:
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                await f.write(chunk)
+                yield chunk
+        os.replace(temp_path, local_path)
+        cached = True
+        logger.debug("Cached file locally: %s", local_path)
+    except Exception as e:
+        logger.warning(f"⚠️  Failed to cache file locally: {e}")
+        raise
+    finally:
+        await response.aclose()
+        if not cached and os.path.exists(temp_path):
+            os.remove(temp_path)
+        if not done.done():
+            done.set_result(cached)
+        for filename, pending in list(_inflight_fetches.items()):
+            if pending is done:
+                _inflight_fetches.pop(filename, None)
+
+
+async def serve_remote_file(request: Request, filename: str, local_path: str, remote_base_url: str) -> Response:
+    """
+    Fetch a file missing locally from the remote deployment. The first request
+    streams the remote body through to its client and the local cache; concurrent
+    requests for the same file wait for that fetch and are served from disk.
+    """
+    pending = _inflight_fetches.get(filename)
+    if pending is not None:
+        try:
+            cached = await asyncio.wait_for(asyncio.shield(pending), REMOTE_TIMEOUT_SECONDS * 2)
+        except asyncio.TimeoutError:
+            # The leader's client went away before its stream started; let the next request retry
+            if _inflight_fetches.get(filename) is pending:
+                _inflight_fetches.pop(filename, None)
+            raise HTTPException(status_code=503, detail="Railway fallback unavailable")
+        if cached and os.path.exists(local_path):
+            return local_file_response(request, local_path)
+        raise HTTPException(status_code=404, detail="File not found on Railway")
+
+    done = asyncio.get_running_loop().create_future()
+    _inflight_fetches[filename] = done
+
+    if should_sample("uploads.remote_fetch"):
+        logger.info("Local file not found, fetching from Railway: %s", filename, extra={"event": "uploads.remote_fetch"})
+
+    client = get_http_client()
+    try:
+        response = await client.send(client.build_request("GET", f"{remote_base_url}/uploads/{filename}"), stream=True)
+    except httpx.HTTPError as e:
+        done.set_result(False)
+        _inflight_fetches.pop(filename, None)
+        logger.error(f"❌ Railway fetch failed for {filename}: {e}")
+        raise HTTPException(status_code=503, detail="Railway fallback unavailable")
+
+    if response.status_code != 200:
+        await response.aclose()
+        done.set_result(False)
+        _inflight_fetches.pop(filename, None)
+        logger.warning(f"❌ File not found on Railway: {filename} (status: {response.status_code})")
+        raise HTTPException(status_code=404, detail="File not found on Railway")
+
+    headers = {}
+    # aiter_bytes() decodes any content-encoding, so the remote length only holds for identity bodies
+    if "content-length" in response.headers and "content-encoding" not in response.headers:
+        headers["content-length"] = response.headers["content-length"]
+    return StreamingResponse(
+        _stream_through(response, local_path, done),
+        media_type=response.headers.get("content-type", "image/jpeg"),
+        headers=headers
+    )
+
+
+async def fetch_remote_to_disk(filename: str, local_path: str, remote_base_url: str) -> bool:
+    """
+    Download a missing file from the remote deployment into the local cache
+    without serving it; shares in-flight fetches with serve_remote_file()
+    """
+    pending = _inflight_fetches.get(filename)
+    if pending is not None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(pending), REMOTE_TIMEOUT_SECONDS * 2) and os.path.exists(local_path)
+        except asyncio.TimeoutError:
+            return False
+
+    done = asyncio.get_running_loop().create_future()
+    _inflight_fetches[filename] = done
+    client = get_http_client()
+    try:
+        async with client.stream("GET", f"{remote_base_url}/uploads/{filename}") as response:
+            if response.status_code != 200:
+                done.set_result(False)
+                return False
+            stream = _stream_through(response, local_path, done)
+            async for _ in stream:
+                pass
+        return done.result()
+    except httpx.HTTPError as e:
+        logger.error(f"❌ Railway fetch failed for {filename}: {e}")
+        return False
+    finally:
+        if not done.done():
+            done.set_result(False)
+        if _inflight_fetches.get(filename) is done:
+            _inflight_fetches.pop(filename, None)
+
+
+class ThumbnailCache:
+    """Size-bounded directory of generated thumbnails, evicting least recently used files"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # name -> size, oldest first
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild LRU order from access/modification times of what is already on disk
+        existing = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and not name.endswith(".tmp"):
+                stat_result = os.stat(path)
+                existing.append((max(stat_result.st_atime, stat_result.st_mtime), name, stat_result.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self.total_bytes += size
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> Optional[str]:
+        """Path of a cached thumbnail, marking it recently used; None if absent"""
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = self.path_for(name)
+        return path if os.path.exists(path) else None
+
+    def put(self, name: str, data: bytes) -> str:
+        """Store a thumbnail atomically and evict old entries beyond max_bytes"""
+        path = self.path_for(name)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        evicted = []
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(self.path_for(old_name))
+            except OSError:
+                pass
+        if evicted:
+            logger.debug("Evicted %d thumbnails, cache now %d bytes", len(evicted), self.total_bytes)
+        return path
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_executor: Optional[ThreadPoolExecutor] = None
+_inflight_thumbnails: Dict[str, asyncio.Future] = {}
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Thumbnail cache configured by THUMBNAIL_CACHE_DIR / THUMBNAIL_CACHE_MAX_MB"""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailCache(
+            os.getenv("THUMBNAIL_CACHE_DIR", "thumbnail_cache"),
+            int(os.getenv("THUMBNAIL_CACHE_MAX_MB", "200")) * 1024 * 1024
+        )
+    return _thumbnail_cache
+
+
+def _get_thumbnail_executor() -> ThreadPoolExecutor:
+    global _thumbnail_executor
+    if _thumbnail_executor is None:
+        _thumbnail_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("THUMBNAIL_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            thread_name_prefix="thumbnail"
+        )
+    return _thumbnail_executor
+
+
+def thumbnail_width(requested: int) -> int:
+    """Round a requested width up to a supported thumbnail width"""
+    for width in THUMBNAIL_WIDTHS:
+        if requested <= width:
+            return width
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def render_thumbnail(source_path: str, width: int) -> bytes:
+    """Resize an image to width (keeping aspect ratio) as JPEG bytes"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale while decoding; much cheaper for phone photos
+        image.draft("RGB", (width, width * 4))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, width * 4), Image.LANCZOS)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80, optimize=True)
+        return buffer.getvalue()
+
+
+async def serve_thumbnail(request: Request, source_path: str, requested_width: int) -> Response:
+    """Serve a cached thumbnail of a local image, generating it in the worker pool if needed"""
+    width = thumbnail_width(requested_width)
+    stat_result = os.stat(source_path)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    name = f"{stem}.{stat_result.st_mtime_ns:x}.w{width}.jpg"
+
+    cache = get_thumbnail_cache()
+    cached_path = cache.get(name)
+    if cached_path is None:
+        pending = _inflight_thumbnails.get(name)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_future()
+            _inflight_thumbnails[name] = pending
+            try:
+                data = await asyncio.get_running_loop().run_in_executor(
+                    _get_thumbnail_executor(), render_thumbnail, source_path, width
+                )
+                cached_path = cache.put(name, data)
+                pending.set_result(cached_path)
+            except Exception as e:
+                pending.set_result(None)
+                logger.warning(f"⚠️ Thumbnail generation failed for {source_path}: {e}")
+            finally:
+                # Cancelled (client went away): release the waiters, they serve the original
+                if not pending.done():
+                    pending.set_result(None)
+                _inflight_thumbnails.pop(name, None)
+        else:
+            try:
+                cached_path = await asyncio.wait_for(asyncio.shield(pending), THUMBNAIL_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Timed out waiting for thumbnail {name}, serving the original")
+                cached_path = None
+
+    if cached_path is None:
+        # Not an image Pillow can read; fall back to the original
+        return local_file_response(request, source_path)
+    return local_file_response(request, cached_path, headers=THUMBNAIL_CACHE_HEADERS, media_type="image/jpeg")
+
+
+async def _stream_upload(upload: UploadFile, temp_path: str, max_bytes: int) -> Tuple[int, str]:
+    """Write an upload to temp_path in chunks; returns (size, sha256). Raises HTTPException 413 past max_bytes."""
+    hasher = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(temp_path, "wb") as out:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File {upload.filename or ''} exceeds the {max_bytes / (1024 * 1024):.1f} MB upload limit"
+                )
+            hasher.update(chunk)
+            await out.write(chunk)
+    return size, hasher.hexdigest()
+
+
+async def save_upload(upload: UploadFile, destination_path: str, max_bytes: Optional[int] = None) -> Dict[str, object]:
+    """
+    Stream an uploaded file to disk in chunks, hashing it on the way, and move it
+    into place atomically. Raises HTTPException 413 if it exceeds max_bytes.
+    Returns {"path", "size", "sha256"}.
+    """
+    max_bytes = MAX_UPLOAD_SIZE if max_bytes is None else max_bytes
+    temp_path = f"{destination_path}.part-{uuid.uuid4().hex}"
+    try:
+        size, sha256 = await _stream_upload(upload, temp_path, max_bytes)
+        os.replace(temp_path, destination_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {"path": destination_path, "size": size, "sha256": sha256}
+
+
+async def save_upload_blob(upload: UploadFile, uploads_dir: str, max_bytes: Optional[int] = None,
+                           reference: Optional[Callable[[str, str, str], None]] = None) -> Dict[str, object]:
+    """
+    Stream an upload into the content-addressed blob store. Identical content is
+    stored once. reference(sha256, filename, path) runs once the content is hashed
+    and before the blob is stored - commit the referencing row there, so cleanup
+    of another scan cannot delete the blob in between.
+    Returns {"path", "filename", "size", "sha256", "deduplicated"}.
+    """
+    max_bytes = MAX_UPLOAD_SIZE if max_bytes is None else max_bytes
+    temp_path = os.path.join(uploads_dir, f".upload-{uuid.uuid4().hex}.part")
+    try:
+        size, sha256 = await _stream_upload(upload, temp_path, max_bytes)
+        extension = normalize_extension(upload.filename)
+        if reference:
+            filename = blob_filename(sha256, extension)
+            reference(sha256, filename, blob_path(uploads_dir, filename))
+        path, filename, deduplicated = store_blob(uploads_dir, temp_path, sha256, extension)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {"path": path, "filename": filename, "size": size, "sha256": sha256, "deduplicated": deduplicated}
+
+
+async def save_stream(chunks: AsyncIterator[bytes], destination_path: str,
+                      expected_sha256: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, object]:
+    """
+    Write a request body stream to disk atomically, hashing it on the way.
+    Raises HTTPException 400 (and keeps nothing) if it does not match expected_sha256,
+    413 if it exceeds max_bytes. Returns {"path", "size", "sha256"}.
+    """
+    max_bytes = MAX_UPLOAD_SIZE if max_bytes is None else max_bytes
+    os.makedirs(os.path.dirname(destination_path) or ".", exist_ok=True)
+    temp_path = f"{destination_path}.part-{uuid.uuid4().hex}"
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {max_bytes / (1024 * 1024):.1f} MB upload limit"
+                    )
+                hasher.update(chunk)
+                await out.write(chunk)
+        sha256 = hasher.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise HTTPException(status_code=400, detail=f"Checksum mismatch: expected {expected_sha256}, got {sha256}")
+        os.replace(temp_path, destination_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {"path": destination_path, "size": size, "sha256": sha256}
+
+
+async def _replicate_file(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, remote_base_url: str,
+                          local_path: str, filename: str) -> bool:
+    async with semaphore:
+        try:
+            # Raw file PUT into the remote volume - unlike /upload it does not run the scan pipeline.
+            # Streamed in CHUNK_SIZE pieces; Content-Length lets the remote reject oversized files up front
+            size = os.path.getsize(local_path)
+            headers = sync_headers(filename.split(".", 1)[0] if is_blob_filename(filename) else None)
+            headers["content-length"] = str(size)
+            response = await client.put(
+                f"{remote_base_url}/api/sync/files/{filename}",
+                content=_read_range(local_path, 0, size - 1),
+                headers=headers,
+                timeout=REPLICATION_TIMEOUT_SECONDS
+            )
+            if response.status_code == 200:
+                logger.debug("Replicated %s to Railway volume", filename)
+                return True
+            logger.error(f"❌ Failed to upload {filename} to Railway: {response.status_code}")
+        except (httpx.HTTPError, OSError) as e:
+            logger.error(f"❌ Error uploading {filename} to Railway: {e}")
+        return False
+
+
+def sync_headers(sha256: Optional[str] = None) -> Dict[str, str]:
+    """Headers for the remote /api/sync endpoints: SYNC_TOKEN authorization and the expected checksum"""
+    headers = {}
+    token = os.getenv("SYNC_TOKEN")
+    if token:
+        headers["authorization"] = f"Bearer {token}"
+    if sha256:
+        headers["x-content-sha256"] = sha256
+    return headers
+
+
+async def replicate_to_remote(files: List[Tuple[str, str]], remote_base_url: str) -> int:
+    """
+    Upload (local_path, filename) pairs to the remote deployment concurrently.
+    Meant to run as a background task after the upload response is sent.
+    Returns the number of files replicated.
+    """
+    if not files:
+        return 0
+    client = get_http_client()
+    semaphore = asyncio.Semaphore(REPLICATION_CONCURRENCY)
+    results = await asyncio.gather(*[
+        _replicate_file(client, semaphore, remote_base_url, local_path, filename)
+        for local_path, filename in files
+    ])
+    replicated = sum(results)
+    logger.info(
+        "Replicated %d/%d uploads to Railway", replicated, len(files),
+        extra={"event": "uploads.replicate", "files": len(files), "replicated": replicated}
+    )
+    return replicated
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Logging Configuration - Structured JSON logging with per-module levels,
+event sampling and per-scan debug switching
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+# Scan currently being processed by this task/thread (None outside scan processing)
+_current_scan_id: ContextVar[Optional[int]] = ContextVar("current_scan_id", default=None)
+
+# Scans with debug logging switched on (seeded from DEBUG_SCAN_IDS, editable at runtime)
+_debug_scan_ids: Set[int] = set()
+
+# Occurrence counters for sampled events
+_sample_counters: Dict[str, int] = {}
+_sample_lock = threading.Lock()
+
+# Attributes present on every LogRecord - anything else was passed via `extra`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_configured = False
+
+
+class ScanDebugLogger(logging.Logger):
+    """Logger that also emits DEBUG records while a debug-enabled scan is active"""
+
+    def isEnabledFor(self, level: int) -> bool:
+        if super().isEnabledFor(level):
+            return True
+        return level >= logging.DEBUG and is_scan_debug_active()
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+
+        scan_id = _current_scan_id.get()
+        if scan_id is not None:
+            entry["scan_id"] = scan_id
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+def _parse_module_levels(spec: str) -> Dict[str, int]:
+    """Parse LOG_LEVELS, e.g. 'backend.price_api=WARNING,uvicorn.access=ERROR'"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        level_value = logging.getLevelName(level.strip().upper())
+        if isinstance(level_value, int):
+            levels[name.strip()] = level_value
+    return levels
+
+
+def configure_logging(force: bool = False):
+    """
+    Configure root logging from the environment.
+
+    LOG_FORMAT       json (default) or text
+    LOG_LEVEL        root level, default INFO
+    LOG_LEVELS       per-module overrides, comma separated name=LEVEL pairs
+    DEBUG_SCAN_IDS   comma separated scan ids that log at DEBUG
+    """
+    global _configured
+    if _configured and not force:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    else:
+        handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_module_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    for scan_id in os.getenv("DEBUG_SCAN_IDS", "").split(","):
+        if scan_id.strip().isdigit():
+            _debug_scan_ids.add(int(scan_id))
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger that honours per-scan debug mode"""
+    manager = logging.Logger.manager
+    previous_class = manager.loggerClass
+    manager.setLoggerClass(ScanDebugLogger)
+    try:
+        return logging.getLogger(name)
+    finally:
+        manager.loggerClass = previous_class
+
+
+@contextmanager
+def scan_context(scan_id: int):
+    """Tag all log records emitted inside the block with scan_id"""
+    token = _current_scan_id.set(scan_id)
+    try:
+        yield
+    finally:
+        _current_scan_id.reset(token)
+
+
+def set_scan_debug(scan_id: int, enabled: bool):
+    """Switch DEBUG logging on or off for a single scan"""
+    if enabled:
+        _debug_scan_ids.add(scan_id)
+    else:
+        _debug_scan_ids.discard(scan_id)
+
+
+def get_debug_scan_ids() -> Set[int]:
+    """Scan ids currently logging at DEBUG"""
+    return set(_debug_scan_ids)
+
+
+def is_scan_debug_active() -> bool:
+    """True if the current context belongs to a debug-enabled scan"""
+    scan_id = _current_scan_id.get()
+    return scan_id is not None and scan_id in _debug_scan_ids
+
+
+def should_sample(event: str, every: Optional[int] = None) -> bool:
+    """
+    Return True for the first and then every Nth occurrence of an event.
+    N defaults to LOG_SAMPLE_EVERY (100). Always True under scan debug.
+    """
+    if is_scan_debug_active():
+        return True
+    every = every or int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+    with _sample_lock:
+        count = _sample_counters.get(event, 0)
+        _sample_counters[event] = count + 1
+    return count % every == 0
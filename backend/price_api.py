@@ -1,8 +1,23 @@
-import requests
+import contextvars
+import httpx
 import json
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 import re
 
+from backend.logging_config import get_logger
+from backend.scryfall_client import get_scryfall_client
+from backend.set_registry import PREMIUM_SET_CODES, get_set_registry
+
+logger = get_logger(__name__)
+
+# /cards/collection accepts at most 75 identifiers per request
+COLLECTION_BATCH_SIZE = 75
+# How long streamed cards are gathered before their collection lookup is sent
+LOOKAHEAD_LINGER_SECONDS = 0.5
+SET_CODE_PATTERN = re.compile(r"[a-z0-9]{3,6}")
+
 class ScryfallAPI:
     """Interface for Scryfall API to get card data and prices"""
     
@@ -14,15 +29,15 @@ class ScryfallAPI:
         try:
             url = f"{ScryfallAPI.BASE_URL}/cards/named"
             params = {"fuzzy": card_name}
-            response = requests.get(url, params=params, timeout=10)
+            response = get_scryfall_client().get(url, params=params)
             response.raise_for_status()
             return response.json()
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             # For non-English card names, try to find English equivalent
-            if hasattr(e, 'response') and e.response and e.response.status_code == 404:
-                print(f"Card not found in English: {card_name} (possibly non-English name)")
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 404:
+                logger.info(f"Card not found in English: {card_name} (possibly non-English name)")
             else:
-                print(f"Error searching for card {card_name}: {e}")
+                logger.warning(f"Error searching for card {card_name}: {e}")
             return None
     
     @staticmethod
@@ -33,7 +48,7 @@ class ScryfallAPI:
             if set_code:
                 url = f"{ScryfallAPI.BASE_URL}/cards/named"
                 params = {"fuzzy": card_name, "set": set_code}
-                response = requests.get(url, params=params, timeout=10)
+                response = get_scryfall_client().get(url, params=params)
                 if response.status_code == 200:
                     return response.json()
             
@@ -42,7 +57,7 @@ class ScryfallAPI:
                 url = f"{ScryfallAPI.BASE_URL}/cards/search"
                 # Use exact name search with set filter
                 params = {"q": f'name:"{card_name}" set:"{set_name}"'}
-                response = requests.get(url, params=params, timeout=10)
+                response = get_scryfall_client().get(url, params=params)
                 if response.status_code == 200:
                     data = response.json()
                     if data.get('data') and len(data['data']) > 0:
@@ -51,9 +66,9 @@ class ScryfallAPI:
             # Fallback to fuzzy search if set-specific search fails
             return ScryfallAPI.search_card(card_name)
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             set_info = set_code or set_name or "unknown"
-            print(f"Error searching for card {card_name} with set {set_info}: {e}")
+            logger.warning(f"Error searching for card {card_name} with set {set_info}: {e}")
             return ScryfallAPI.search_card(card_name)
     
     @staticmethod
@@ -62,33 +77,23 @@ class ScryfallAPI:
         try:
             url = f"{ScryfallAPI.BASE_URL}/cards/search"
             params = {"q": f'name:"{card_name}"'}
-            response = requests.get(url, params=params, timeout=10)
+            response = get_scryfall_client().get(url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('data', [])
-        except requests.RequestException as e:
-            print(f"Error getting all printings for {card_name}: {e}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Error getting all printings for {card_name}: {e}")
             return []
     
     @staticmethod
     def find_best_match(card_name: str, ai_set_info: Optional[str] = None, prefer_modern: bool = True) -> Optional[Dict[str, Any]]:
         """Find the best matching card using multiple strategies"""
         
-        # Strategy 1: Use AI-provided set information if available
+        # Strategy 1: Use AI-provided set information if it names a known set
         if ai_set_info:
-            # Clean and parse AI set information
-            ai_set_clean = ai_set_info.strip().lower()
-            
-            # Try common set name patterns
-            set_patterns = [
-                ai_set_clean,
-                ai_set_clean.replace(" ", ""),
-                ai_set_clean.replace("-", ""),
-                ai_set_clean.replace("'", ""),
-            ]
-            
-            for pattern in set_patterns:
-                result = ScryfallAPI.search_card_with_set(card_name, set_name=pattern)
+            set_code = get_set_registry().resolve(ai_set_info)
+            if set_code:
+                result = ScryfallAPI.search_card_with_set(card_name, set_code=set_code)
                 if result:
                     return result
         
@@ -119,8 +124,7 @@ class ScryfallAPI:
     @staticmethod
     def _is_premium_set(set_code: str) -> bool:
         """Check if a set is premium/expensive (avoid these for default selection)"""
-        premium_sets = ['lea', 'leb', 'arn', 'atq', 'leg', 'drk', 'fem', 'ice', 'all', 'hml', 'mir', 'vis', 'wth', 'tmp', 'sth', 'exo', 'usg', 'ulg', 'uds', 'mmq', 'nem', 'pcy', 'inv', 'pls', 'apc', 'ody', 'tor', 'jud', 'ons', 'lgn', 'scg', 'mrd', 'dst', 'fifth', 'rav', 'gpt', 'dis', 'csp', 'tsp', 'plc', 'fut', 'lrw', 'mor', 'shm', 'eve', 'ala', 'con', 'arb', 'zen', 'wwk', 'roe', 'som', 'mbs', 'nph', 'isd', 'dka', 'avr', 'rtr', 'gtc', 'dgm', 'ths', 'bng', 'jou', 'ktk', 'frf', 'dtk', 'ori', 'bfz', 'ogw', 'soi', 'emn', 'kld', 'aer', 'akh', 'hou', 'xln', 'rix', 'dom', 'rna', 'war', 'eldm', 'thb', 'iko', 'znr', 'khm', 'stx', 'afr', 'mid', 'vow', 'vow']
-        return set_code.lower() in premium_sets
+        return (set_code or '').lower() in PREMIUM_SET_CODES
     
     @staticmethod
     def get_card_by_name(card_name: str) -> Optional[Dict[str, Any]]:
@@ -128,11 +132,11 @@ class ScryfallAPI:
         try:
             url = f"{ScryfallAPI.BASE_URL}/cards/named"
             params = {"exact": card_name}
-            response = requests.get(url, params=params, timeout=10)
+            response = get_scryfall_client().get(url, params=params)
             response.raise_for_status()
             return response.json()
-        except requests.RequestException as e:
-            print(f"Error getting card {card_name}: {e}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Error getting card {card_name}: {e}")
             return None
     
     @staticmethod
@@ -174,6 +178,11 @@ class ScryfallAPI:
         if not card_data:
             return None
         
+        return ScryfallAPI.format_card_data(card_data)
+    
+    @staticmethod
+    def format_card_data(card_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a Scryfall card object into the fields stored with scan results"""
         # Extract prices safely
         prices = card_data.get("prices", {})
         price_usd = 0.0
@@ -224,6 +233,18 @@ class ScryfallAPI:
             "price_tix": price_tix
         }
     
+    @staticmethod
+    def get_card_collection(identifiers: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """
+        Look up to COLLECTION_BATCH_SIZE identifiers ({"name"}, {"name", "set"} or
+        {"set", "collector_number"}) in one request. Returns (cards, not_found).
+        """
+        url = f"{ScryfallAPI.BASE_URL}/cards/collection"
+        response = get_scryfall_client().post(url, json={"identifiers": identifiers}, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("data", []), data.get("not_found", [])
+    
     @staticmethod
     def populate_missing_set_data(card_name: str, current_set_code: Optional[str] = None) -> Dict[str, Any]:
         """Populate missing set data for existing cards"""
@@ -257,20 +278,20 @@ class ScryfallAPI:
             # Strategy 1: Try exact name match first
             url = f"{ScryfallAPI.BASE_URL}/cards/named"
             params = {"exact": card_name}
-            response = requests.get(url, params=params, timeout=10)
+            response = get_scryfall_client().get(url, params=params)
             if response.status_code == 200:
                 return response.json()
             
             # Strategy 2: Try fuzzy search but use a consistent selection strategy
             params = {"fuzzy": card_name}
-            response = requests.get(url, params=params, timeout=10)
+            response = get_scryfall_client().get(url, params=params)
             if response.status_code == 200:
                 return response.json()
             
             # Strategy 3: Search all printings and pick the most recent/stable version
             search_url = f"{ScryfallAPI.BASE_URL}/cards/search"
             search_params = {"q": f'name:"{card_name}"', "order": "released", "dir": "desc"}
-            response = requests.get(search_url, params=search_params, timeout=10)
+            response = get_scryfall_client().get(search_url, params=search_params)
             if response.status_code == 200:
                 data = response.json()
                 cards = data.get('data', [])
@@ -280,6 +301,184 @@ class ScryfallAPI:
             
             return None
             
-        except requests.RequestException as e:
-            print(f"Error searching for card {card_name}: {e}")
-            return None 
\ No newline at end of file
+        except httpx.HTTPError as e:
+            logger.warning(f"Error searching for card {card_name}: {e}")
+            return None
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def _card_names(card: Dict[str, Any]) -> List[str]:
+    """Full name plus each face of a double-faced / split card"""
+    names = [_normalize_name(card.get("name", ""))]
+    names += [_normalize_name(face.get("name", "")) for face in card.get("card_faces", [])]
+    return names
+
+
+def card_identifier(card: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Most specific /cards/collection identifier for an AI-identified card: set +
+    collector number when both are readable, else name + set code, else name only.
+    The AI's set (a code or a name) is resolved to a code through the set registry.
+    """
+    name = (card.get("name") or "").strip()
+    ai_set = (card.get("set") or "").strip()
+    set_code = get_set_registry().resolve(ai_set) if ai_set else None
+    if not set_code:
+        set_code = ai_set.lower() if SET_CODE_PATTERN.fullmatch(ai_set.lower()) else ""
+    collector_number = str(card.get("collector_number") or "").split("/")[0].strip().lstrip("0")
+    if set_code and collector_number:
+        return {"set": set_code, "collector_number": collector_number}
+    if set_code:
+        return {"name": name, "set": set_code}
+    return {"name": name}
+
+
+def _identifier_key(identifier: Dict[str, str]) -> Tuple[str, ...]:
+    if "collector_number" in identifier:
+        return ("number", identifier["set"], identifier["collector_number"].lower())
+    return ("name", _normalize_name(identifier["name"]), identifier.get("set", ""))
+
+
+class ScryfallCollectionResolver:
+    """
+    Resolves AI-identified cards through /cards/collection, 75 identifiers per
+    request. Create one per scan: prefetch() every card known up front so the
+    whole scan costs a handful of requests, then resolve() per image. Cards the
+    collection lookup misses (or that contradict the AI's name or set) fall back
+    to the per-card ScryfallAPI.get_card_data chain.
+    """
+    
+    def __init__(self):
+        self._found: Dict[Tuple[str, ...], Optional[Dict[str, Any]]] = {}
+        self._fallbacks: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        # CardLookahead resolves from a background thread; one lookup at a time, so
+        # resolve() waits for an in-flight lookup instead of repeating it
+        self._lock = threading.RLock()
+        self.collection_requests = 0
+        self.fallback_lookups = 0
+    
+    def prefetch(self, cards: List[Dict[str, Any]]):
+        """Fetch every identifier not looked up yet, in as few requests as possible"""
+        with self._lock:
+            self._prefetch(cards)
+    
+    def _prefetch(self, cards: List[Dict[str, Any]]):
+        pending = {}
+        for card in cards:
+            if not card.get("name"):
+                continue
+            identifier = card_identifier(card)
+            key = _identifier_key(identifier)
+            if key not in self._found:
+                pending[key] = identifier
+        
+        keys = list(pending)
+        for start in range(0, len(keys), COLLECTION_BATCH_SIZE):
+            batch = keys[start:start + COLLECTION_BATCH_SIZE]
+            try:
+                found, _ = ScryfallAPI.get_card_collection([pending[key] for key in batch])
+                self.collection_requests += 1
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ Scryfall collection lookup failed for {len(batch)} cards: {e}")
+                continue  # Left out of the cache, so these fall back per card
+            by_key = {}
+            for card in found:
+                by_key[("number", card.get("set", ""), str(card.get("collector_number", "")).lower())] = card
+                for name in _card_names(card):
+                    by_key.setdefault(("name", name, ""), card)
+                    by_key.setdefault(("name", name, card.get("set", "")), card)
+            for key in batch:
+                self._found[key] = by_key.get(key)
+        logger.debug("Scryfall collection: %d identifiers in %d requests", len(keys),
+                     -(-len(keys) // COLLECTION_BATCH_SIZE))
+    
+    def resolve(self, cards: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Formatted card data (as get_card_data returns) for each card, None when unresolved"""
+        with self._lock:
+            self._prefetch(cards)
+            return [self._resolve_one(card) for card in cards]
+    
+    def _resolve_one(self, card: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        name = card.get("name") or ""
+        if not name:
+            return None
+        match = self._found.get(_identifier_key(card_identifier(card)))
+        if match and self._agrees(card, match):
+            return ScryfallAPI.format_card_data(match)
+        
+        ai_set_info = card.get("set", "") or card.get("set_symbol_description", "")
+        fallback_key = (_normalize_name(name), ai_set_info)
+        if fallback_key not in self._fallbacks:
+            self.fallback_lookups += 1
+            self._fallbacks[fallback_key] = ScryfallAPI.get_card_data(name, ai_set_info)
+        return self._fallbacks[fallback_key]
+    
+    @staticmethod
+    def _agrees(card: Dict[str, Any], match: Dict[str, Any]) -> bool:
+        """A misread collector number or a set name that doesn't fit sends the card down the fallback chain"""
+        if _normalize_name(card.get("name", "")) not in _card_names(match):
+            return False
+        ai_set = _normalize_name(card.get("set", ""))
+        if not ai_set or SET_CODE_PATTERN.fullmatch(ai_set) or get_set_registry().resolve(ai_set):
+            # The identifier already pinned the set
+            return True
+        set_name = _normalize_name(match.get("set_name", ""))
+        return ai_set in set_name or set_name in ai_set
+
+
+class CardLookahead:
+    """
+    Starts Scryfall lookups for cards while the vision response is still being
+    generated. submit() each card as the stream completes it; a background thread
+    resolves what arrives within LOOKAHEAD_LINGER_SECONDS as one batch (collection
+    request plus any per-card fallbacks), so by the time the image's resolve()
+    runs only the last cards are left to look up.
+    """
+    
+    def __init__(self, resolver: ScryfallCollectionResolver, linger: float = LOOKAHEAD_LINGER_SECONDS):
+        self.resolver = resolver
+        self.linger = linger
+        self.submitted = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._closed = False
+        self._condition = threading.Condition()
+        # Run in the caller's context so lookahead logs keep the scan tags
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                        name="scryfall-lookahead", daemon=True)
+        self._thread.start()
+    
+    def submit(self, card: Dict[str, Any]):
+        with self._condition:
+            self._pending.append(card)
+            self.submitted += 1
+            self._condition.notify()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.linger
+                while not self._closed and len(self._pending) < COLLECTION_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+            try:
+                self.resolver.resolve(batch)
+            except Exception as e:
+                # resolve() looks the cards up again
+                logger.warning(f"⚠️ Scryfall lookahead for {len(batch)} cards failed: {e}")
+    
+    def close(self):
+        """Send what is still pending and stop the thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Scan Events - in-process progress events for scan processing.
+
+_process_scan publishes an event for each step (image started, card identified,
+Scryfall matched, image done / failed, scan done / failed) and /scan/{id}/events
+streams them to the browser as Server-Sent Events. Every scan keeps its event
+history, so a client that connects late, or reconnects with Last-Event-ID,
+replays what it missed. Processing a scan again (resume, retry after a failure)
+resets its history so the old run's terminal event is not replayed. Event ids
+come from one broker-wide counter, so they keep increasing across runs, history
+evictions and (being seeded from the clock) restarts.
+
+Processing runs in the threadpool while subscribers are asyncio queues on the
+server loop, so publish() hands events over with call_soon_threadsafe. Events
+only exist in the process that runs the scan; the stream also re-reads the scan
+status every few seconds, which covers multi-worker setups, and clients without
+EventSource keep polling /scan/{id}/status.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Histories kept for the most recently active scans only
+MAX_TRACKED_SCANS = 50
+TERMINAL_EVENTS = ("scan_done", "scan_failed")
+
+
+def sse_message(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class ScanEventBroker:
+    """Per-scan event history plus the asyncio queues listening to it"""
+
+    def __init__(self, max_scans: int = MAX_TRACKED_SCANS):
+        self.max_scans = max_scans
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        # Milliseconds at startup: ids stay ahead of those handed out before a restart
+        self._last_id = int(time.time() * 1000)
+        self._subscribers: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, scan_id: int, event: str, **data):
+        """Record an event and wake every subscriber of the scan; safe from any thread"""
+        with self._lock:
+            history = self._history.get(scan_id)
+            if history is None:
+                history = self._history[scan_id] = []
+                while len(self._history) > self.max_scans:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(scan_id)
+            self._last_id += 1
+            record = {
+                "id": self._last_id,
+                "event": event,
+                "data": {"scan_id": scan_id, **data, "at": datetime.utcnow().isoformat()}
+            }
+            history.append(record)
+            subscribers = list(self._subscribers.get(scan_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, record)
+            except RuntimeError:
+                # Loop already closed: the client went away with the server
+                pass
+
+    def reset(self, scan_id: int):
+        """Forget a scan's history before it is processed again; subscribers stay registered"""
+        with self._lock:
+            if scan_id in self._history:
+                self._history[scan_id] = []
+
+    def subscribe(self, scan_id: int, queue: asyncio.Queue, after_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Register a queue on the running loop and return the events after `after_id`
+        it missed; nothing published in between is lost or duplicated
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(scan_id, []).append((loop, queue))
+            return [record for record in self._history.get(scan_id, ()) if record["id"] > after_id]
+
+    def unsubscribe(self, scan_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = [entry for entry in self._subscribers.get(scan_id, ()) if entry[1] is not queue]
+            if subscribers:
+                self._subscribers[scan_id] = subscribers
+            else:
+                self._subscribers.pop(scan_id, None)
+
+    def history(self, scan_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._history.get(scan_id, ()))
+
+
+scan_events = ScanEventBroker()
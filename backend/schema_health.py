@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Schema Health - cached check that serial id sequences are ahead of the data.
+
+Comparing every sequence with MAX(id) is only needed after rows were loaded with
+explicit ids (migrations, restores, imports). Those tools call record_data_import(),
+which bumps an import marker in the schema_metadata table. On boot the check runs
+only when that marker or the schema fingerprint differs from the last recorded
+check; otherwise it is a single primary key lookup. The result is stored in the
+same table and served by /api/health/schema.
+
+Sequences that still end up behind are repaired reactively: install_sequence_repair()
+adds an engine-wide error hook that fixes the sequence of any table whose primary
+key insert collides, so callers no longer need per-function retry decorators.
+"""
+
+import hashlib
+import json
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, event, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from backend.db_migration import fix_sequences
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Kept out of the models' metadata so migration tools can use it against any engine
+schema_metadata = Table(
+    "schema_metadata", MetaData(),
+    Column("key", String(64), primary_key=True),
+    Column("value", Text),
+    Column("updated_at", DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+)
+
+IMPORT_MARKER_KEY = "import_marker"
+CHECKED_MARKER_KEY = "sequence_check_marker"
+STATUS_KEY = "sequence_check"
+REACTIVE_FIX_KEY = "last_reactive_fix"
+
+# PostgreSQL unique_violation
+UNIQUE_VIOLATION = "23505"
+
+_repairing = threading.local()
+
+
+def ensure_metadata_table(engine: Engine):
+    schema_metadata.create(engine, checkfirst=True)
+
+
+def _read(conn, keys: List[str]) -> Dict[str, str]:
+    rows = conn.execute(select(schema_metadata.c.key, schema_metadata.c.value)
+                        .where(schema_metadata.c.key.in_(keys)))
+    return {key: value for key, value in rows}
+
+
+def _write(conn, values: Dict[str, str]):
+    now = datetime.utcnow()
+    for key, value in values.items():
+        updated = conn.execute(schema_metadata.update().where(schema_metadata.c.key == key)
+                               .values(value=value, updated_at=now))
+        if not updated.rowcount:
+            conn.execute(schema_metadata.insert().values(key=key, value=value, updated_at=now))
+
+
+def schema_fingerprint(metadata: MetaData) -> str:
+    """Short hash of the tables and columns the models expect"""
+    layout = sorted((table.name, sorted(column.name for column in table.columns)) for table in metadata.tables.values())
+    return hashlib.sha256(json.dumps(layout).encode("utf-8")).hexdigest()[:12]
+
+
+def record_data_import(engine: Engine, source: str):
+    """
+    Mark that rows were bulk-loaded (with explicit ids) so the next boot re-checks
+    the sequences. Call after migrations, restores and imports.
+    """
+    ensure_metadata_table(engine)
+    marker = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    with engine.begin() as conn:
+        _write(conn, {IMPORT_MARKER_KEY: json.dumps({"marker": marker, "source": source})})
+    logger.info(f"📌 Data import recorded ({source}): sequences will be checked on next startup")
+
+
+def check_sequences(engine: Engine, tables: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare each serial sequence with MAX(id) and repair the ones that are behind.
+    Returns {table: {"max_id", "next_id", "repaired"}}; empty on databases without sequences.
+    """
+    if engine.dialect.name != "postgresql":
+        return {}
+    existing = set(inspect(engine).get_table_names())
+    results = {}
+    behind = []
+    with engine.connect() as conn:
+        for table in tables:
+            if table not in existing:
+                continue
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                    {"table": f'"{table}"'}).scalar()
+            if not sequence:
+                continue
+            last_value, is_called = conn.execute(text(f"SELECT last_value, is_called FROM {sequence}")).one()
+            next_id = last_value + 1 if is_called else last_value
+            max_id = conn.execute(text(f'SELECT MAX(id) FROM "{table}"')).scalar() or 0
+            results[table] = {"max_id": max_id, "next_id": next_id, "repaired": False}
+            if next_id <= max_id:
+                behind.append(table)
+    if behind:
+        for table, next_id in fix_sequences(engine, behind).items():
+            results[table].update(next_id=next_id, repaired=True)
+            logger.warning(f"🔧 Sequence for {table} was behind MAX(id) {results[table]['max_id']}, set to {next_id}")
+    return results
+
+
+def check_schema_health(engine: Engine, metadata: MetaData, force: bool = False) -> Dict[str, Any]:
+    """
+    Run the sequence check if the import marker or schema changed since the last
+    recorded check (or when forced), and return the recorded status.
+    """
+    ensure_metadata_table(engine)
+    fingerprint = schema_fingerprint(metadata)
+    with engine.connect() as conn:
+        stored = _read(conn, [IMPORT_MARKER_KEY, CHECKED_MARKER_KEY, STATUS_KEY])
+    import_marker = json.loads(stored[IMPORT_MARKER_KEY])["marker"] if IMPORT_MARKER_KEY in stored else "initial"
+    marker = f"{import_marker}:{fingerprint}"
+
+    if not force and stored.get(CHECKED_MARKER_KEY) == marker and STATUS_KEY in stored:
+        logger.debug("Schema unchanged since last check (%s), skipping sequence check", marker)
+        return json.loads(stored[STATUS_KEY])
+
+    try:
+        sequences = check_sequences(engine, sorted(metadata.tables))
+        status = {
+            "status": "repaired" if any(entry["repaired"] for entry in sequences.values()) else "ok",
+            "sequences": sequences
+        }
+    except Exception as e:
+        logger.error(f"❌ Sequence check failed: {e}")
+        status = {"status": "error", "error": str(e), "sequences": {}}
+    status.update(checked_at=datetime.utcnow().isoformat(), marker=marker, dialect=engine.dialect.name)
+
+    values = {STATUS_KEY: json.dumps(status)}
+    if status["status"] != "error":
+        # A failed check is retried on the next boot
+        values[CHECKED_MARKER_KEY] = marker
+    with engine.begin() as conn:
+        _write(conn, values)
+    logger.info(f"🩺 Schema health: {status['status']} ({len(status['sequences'])} sequences checked)")
+    return status
+
+
+def get_schema_health(engine: Engine) -> Dict[str, Any]:
+    """Last recorded check, import marker and reactive repair"""
+    ensure_metadata_table(engine)
+    with engine.connect() as conn:
+        stored = _read(conn, [IMPORT_MARKER_KEY, STATUS_KEY, REACTIVE_FIX_KEY])
+    return {
+        "last_check": json.loads(stored[STATUS_KEY]) if STATUS_KEY in stored else None,
+        "last_import": json.loads(stored[IMPORT_MARKER_KEY]) if IMPORT_MARKER_KEY in stored else None,
+        "last_reactive_fix": json.loads(stored[REACTIVE_FIX_KEY]) if REACTIVE_FIX_KEY in stored else None
+    }
+
+
+def _primary_key_violation(error: BaseException) -> Optional[str]:
+    """Table whose primary key an insert collided with, from the driver's error details"""
+    if getattr(error, "pgcode", None) != UNIQUE_VIOLATION:
+        return None
+    diag = getattr(error, "diag", None)
+    table = getattr(diag, "table_name", None)
+    if table and getattr(diag, "constraint_name", None) == f"{table}_pkey":
+        return table
+    return None
+
+
+def install_sequence_repair(engine: Engine):
+    """
+    Repair a table's sequence whenever an insert collides with its primary key.
+    The failing statement still raises (its transaction is aborted); a retry by the
+    caller gets a fresh id.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "handle_error")
+    def repair_sequence(context):
+        table = _primary_key_violation(context.original_exception)
+        if not table or getattr(_repairing, "active", False):
+            return
+        _repairing.active = True
+        try:
+            fixed = fix_sequences(engine, [table])
+            if fixed:
+                logger.warning(f"🔄 Primary key collision on {table}: sequence repaired to {fixed[table]}")
+                with engine.begin() as conn:
+                    _write(conn, {REACTIVE_FIX_KEY: json.dumps({
+                        "table": table, "next_id": fixed[table], "at": datetime.utcnow().isoformat()
+                    })})
+        except Exception as e:
+            logger.error(f"❌ Failed to repair sequence for {table}: {e}")
+        finally:
+            _repairing.active = False
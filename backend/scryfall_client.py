@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Scryfall Client - pooled, throttled, retrying HTTP client for api.scryfall.com.
+
+AsyncScryfallClient keeps keep-alive connections in one httpx.AsyncClient,
+spaces request starts by Scryfall's requested 50-100ms, and retries 429/5xx
+responses and transport errors with jittered exponential backoff, honouring
+Retry-After. A 429 also pushes back the shared throttle, so every caller slows
+down, not just the one that was rejected.
+
+ScryfallClient is the sync facade used by ScryfallAPI and the scripts: it runs
+one AsyncScryfallClient on a private event loop thread, so all threads in the
+process share the same connections and throttle.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BASE_URL = "https://api.scryfall.com"
+SCRYFALL_CACHE_DIR = os.getenv("SCRYFALL_CACHE_DIR", "scryfall_cache")
+# Scryfall asks for 50-100ms between requests
+MIN_REQUEST_INTERVAL = 0.1
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 10.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "MTG-Scan/1.0",
+    "Accept": "application/json;q=0.9,*/*;q=0.8"
+}
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP date), None when absent or unparseable"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class RequestThrottle:
+    """Spaces request starts at least `interval` apart; delay() holds everyone back"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+                now = time.monotonic()
+            self._next_start = now + self.interval
+
+    def delay(self, seconds: float):
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+class AsyncScryfallClient:
+    """Async Scryfall client; use `async with` or call aclose()"""
+
+    def __init__(self, base_url: str = BASE_URL, min_interval: float = MIN_REQUEST_INTERVAL,
+                 max_attempts: int = MAX_ATTEMPTS, timeout: float = REQUEST_TIMEOUT_SECONDS,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_attempts = max_attempts
+        self.throttle = RequestThrottle(min_interval)
+        self.requests = 0
+        self.retries = 0
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60),
+            transport=transport
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying throttling and server errors. Other responses,
+        including 404, are returned as-is; transport errors are raised after the
+        last attempt.
+        """
+        for attempt in range(self.max_attempts):
+            await self.throttle.wait()
+            self.requests += 1
+            try:
+                response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"⚠️ Scryfall {method} {path} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_attempts - 1:
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if response.status_code == 429:
+                    # Everyone waits, not only this request
+                    self.throttle.delay(delay)
+                logger.warning(f"⚠️ Scryfall {method} {path} returned {response.status_code}, "
+                               f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_attempts})")
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, params=params, **kwargs)
+
+    async def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, json=json, **kwargs)
+
+
+class ScryfallClient:
+    """Blocking facade over one AsyncScryfallClient running on a private event loop thread"""
+
+    def __init__(self, **client_options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="scryfall-client", daemon=True)
+        self._thread.start()
+        self.client: AsyncScryfallClient = self._run(self._create(client_options))
+
+    @staticmethod
+    async def _create(client_options) -> AsyncScryfallClient:
+        # Created on the loop that will use it
+        return AsyncScryfallClient(**client_options)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return self._run(self.client.request(method, path, **kwargs))
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> httpx.Response:
+        return self._run(self.client.get(path, params=params, **kwargs))
+
+    def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> httpx.Response:
+        return self._run(self.client.post(path, json=json, **kwargs))
+
+    async def arequest(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Await from another event loop (e.g. an async endpoint) without blocking it"""
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(self.client.request(method, path, **kwargs), self._loop)
+        )
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+
+_client: Optional[ScryfallClient] = None
+_client_lock = threading.Lock()
+
+
+def get_scryfall_client() -> ScryfallClient:
+    """Process-wide client, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ScryfallClient()
+        return _client
+
+
+def set_scryfall_client(client: Optional[ScryfallClient]) -> Optional[ScryfallClient]:
+    """Swap the process-wide client (benchmarks install a fake transport); returns the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+        return previous
+
+
+def close_scryfall_client():
+    previous = set_scryfall_client(None)
+    if previous:
+        previous.close()
+
+
+def fetch_cached(path: str, filename: str, max_age_seconds: float) -> Tuple[Optional[Any], str]:
+    """
+    Scryfall catalog JSON (card names, sets) kept in SCRYFALL_CACHE_DIR. Refetched
+    when older than max_age_seconds; a stale copy is used if the refresh fails.
+    Returns (payload, "cache" | "scryfall" | "stale cache"), or (None, "") when
+    neither is available.
+    """
+    cache_path = os.path.join(SCRYFALL_CACHE_DIR, filename)
+    cached = None
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if time.time() - os.path.getmtime(cache_path) <= max_age_seconds:
+            return cached, "cache"
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable Scryfall cache {cache_path}: {e}")
+
+    try:
+        response = get_scryfall_client().get(path, timeout=30)
+        response.raise_for_status()
+        payload = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"⚠️ Could not fetch Scryfall {path}: {e}")
+        return (cached, "stale cache") if cached is not None else (None, "")
+
+    os.makedirs(SCRYFALL_CACHE_DIR, exist_ok=True)
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(temp_path, cache_path)
+    return payload, "scryfall"
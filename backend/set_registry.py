@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Set Registry - every Magic set by code, name, alias, release date and set
+symbol keywords, loaded once and shared.
+
+Set data comes from Scryfall's /sets (cached on disk, refreshed weekly); when
+neither the cache nor Scryfall is available a small built-in seed keeps the
+sets with known symbol descriptions resolvable. Codes, names and aliases are
+stored under normalised keys, so resolving what the AI read ("Urza's Legacy",
+"ULG", "urzas legacy", "Alpha") is a dict lookup. Partial names go through a
+token inverted index instead of guessing variants against the network.
+"""
+
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.card_name_index import normalize_name
+from backend.logging_config import get_logger
+from backend.scryfall_client import fetch_cached
+from backend.startup import LazyResource
+
+logger = get_logger(__name__)
+
+SETS_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# Set symbol descriptions collected by hand - Scryfall has no textual symbol data
+SYMBOL_KEYWORDS = {
+    "c17": ["shield with sword", "dragon head", "stylized dragon", "dragon symbol"],
+    "cma": ["shield with sword", "dragon head", "stylized dragon", "dragon symbol"],
+    "c18": ["shield", "stylized shield", "shield symbol"],
+    "c15": ["stylized c", "commander symbol"],
+    "cmd": ["triangle", "stylized triangle"],
+    "m12": ["m12", "stylized m"],
+    "2ed": ["no symbol", "none visible", "early set"],
+    "mh2": ["horizons symbol", "modern horizons", "mh2"],
+    "ema": ["eternal symbol", "masters symbol"],
+    "ulg": ["urza symbol", "legacy symbol", "gear"],
+    "roe": ["eldrazi symbol", "hedron", "geometric"],
+    "uma": ["masters symbol", "ultimate symbol"],
+    "tsp": ["spiral", "time symbol"],
+    "tsr": ["spiral", "remastered", "time symbol"]
+}
+
+# Used when no Scryfall set data can be loaded
+SEED_SETS = [
+    {"code": "c17", "name": "Commander 2017"},
+    {"code": "cma", "name": "Commander Anthology"},
+    {"code": "c18", "name": "Commander 2018"},
+    {"code": "c15", "name": "Commander 2015"},
+    {"code": "cmd", "name": "Commander 2011"},
+    {"code": "m12", "name": "Magic 2012"},
+    {"code": "lea", "name": "Limited Edition Alpha"},
+    {"code": "leb", "name": "Limited Edition Beta"},
+    {"code": "2ed", "name": "Unlimited Edition"},
+    {"code": "3ed", "name": "Revised Edition"},
+    {"code": "mh2", "name": "Modern Horizons 2"},
+    {"code": "ema", "name": "Eternal Masters"},
+    {"code": "ulg", "name": "Urza's Legacy"},
+    {"code": "roe", "name": "Rise of the Eldrazi"},
+    {"code": "uma", "name": "Ultimate Masters"},
+    {"code": "tsp", "name": "Time Spiral"},
+    {"code": "tsr", "name": "Time Spiral Remastered"}
+]
+
+# Names people (and the AI) use that aren't the official set name
+ALIASES = {
+    "alpha": "lea",
+    "beta": "leb",
+    "unlimited": "2ed",
+    "revised": "3ed",
+    "4th edition": "4ed",
+    "5th edition": "5ed",
+    "6th edition": "6ed",
+    "7th edition": "7ed",
+    "8th edition": "8ed",
+    "9th edition": "9ed",
+    "10th edition": "10e"
+}
+
+# Older/expensive printings avoided when picking a default printing
+PREMIUM_SET_CODES = frozenset([
+    'lea', 'leb', 'arn', 'atq', 'leg', 'drk', 'fem', 'ice', 'all', 'hml', 'mir', 'vis', 'wth', 'tmp', 'sth',
+    'exo', 'usg', 'ulg', 'uds', 'mmq', 'nem', 'pcy', 'inv', 'pls', 'apc', 'ody', 'tor', 'jud', 'ons', 'lgn',
+    'scg', 'mrd', 'dst', 'fifth', 'rav', 'gpt', 'dis', 'csp', 'tsp', 'plc', 'fut', 'lrw', 'mor', 'shm', 'eve',
+    'ala', 'con', 'arb', 'zen', 'wwk', 'roe', 'som', 'mbs', 'nph', 'isd', 'dka', 'avr', 'rtr', 'gtc', 'dgm',
+    'ths', 'bng', 'jou', 'ktk', 'frf', 'dtk', 'ori', 'bfz', 'ogw', 'soi', 'emn', 'kld', 'aer', 'akh', 'hou',
+    'xln', 'rix', 'dom', 'rna', 'war', 'eldm', 'thb', 'iko', 'znr', 'khm', 'stx', 'afr', 'mid', 'vow'
+])
+
+# Words too common in set names to identify one
+_STOPWORDS = {"the", "of", "and", "edition", "set", "magic"}
+_MAIN_SET_TYPES = ("core", "expansion")
+_SYMBOL_CLEANUP = re.compile(r"[^\w\s]")
+
+
+def _tokens(text: str) -> List[str]:
+    """Significant words of a normalised set name, with plural 's' dropped"""
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") else token
+        for token in text.split() if token not in _STOPWORDS
+    ]
+
+
+def clean_symbol_description(description: str) -> Tuple[str, frozenset]:
+    """Lowercased description without punctuation, and its words"""
+    cleaned = _SYMBOL_CLEANUP.sub("", (description or "").lower()).strip()
+    return cleaned, frozenset(cleaned.split())
+
+
+class SetRegistry:
+    """Lookup tables over all sets"""
+
+    def __init__(self, sets: List[Dict[str, Any]], source: str = "memory"):
+        self.source = source
+        self._sets: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
+        self._token_index: Dict[str, set] = defaultdict(set)
+        self._set_tokens: Dict[str, set] = {}
+        for entry in sets:
+            self._add(entry)
+        for alias, code in ALIASES.items():
+            if code in self._sets:
+                self._sets[code]["aliases"].append(alias)
+                self._keys.setdefault(normalize_name(alias), code)
+        self._token_index = dict(self._token_index)
+        # Symbol descriptions are cleaned once, not per comparison
+        self._symbols = {
+            code: [(keyword, *clean_symbol_description(keyword)) for keyword in keywords]
+            for code, keywords in SYMBOL_KEYWORDS.items()
+        }
+
+    def __len__(self):
+        return len(self._sets)
+
+    def _add(self, entry: Dict[str, Any]):
+        code = (entry.get("code") or "").lower()
+        name = entry.get("name") or ""
+        if not code or code in self._sets:
+            return
+        aliases = [alias for alias in (entry.get("mtgo_code"), entry.get("arena_code")) if alias and alias != code]
+        self._sets[code] = {
+            "code": code,
+            "name": name,
+            "released_at": entry.get("released_at"),
+            "set_type": entry.get("set_type"),
+            "parent_set_code": entry.get("parent_set_code"),
+            "aliases": aliases
+        }
+        name_key = normalize_name(name)
+        for key in (code, name_key, name_key.replace(" ", ""), *(alias.lower() for alias in aliases)):
+            if key:
+                self._keys.setdefault(key, code)
+        tokens = set(_tokens(name_key))
+        self._set_tokens[code] = tokens
+        for token in tokens:
+            self._token_index[token].add(code)
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Set record {"code", "name", "released_at", "set_type", "parent_set_code", "aliases"}"""
+        return self._sets.get((code or "").lower())
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Set code for a code, name or alias as read from a card; None when not clearly one set"""
+        key = normalize_name(text)
+        if not key:
+            return None
+        code = self._keys.get(key) or self._keys.get(key.replace(" ", ""))
+        if code:
+            return code
+        matches = self.search(text, 2)
+        if matches and (len(matches) == 1 or matches[0][1] > matches[1][1]):
+            return matches[0][0]
+        return None
+
+    def search(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Sets whose name contains every significant word of `text`, as (code, score)
+        where score is the share of the set name's words covered. Main sets win ties.
+        """
+        tokens = set(_tokens(normalize_name(text)))
+        if not tokens:
+            return []
+        candidates = None
+        for token in tokens:
+            codes = self._token_index.get(token)
+            if not codes:
+                return []
+            candidates = set(codes) if candidates is None else candidates & codes
+        scored = []
+        for code in candidates:
+            coverage = len(tokens) / len(self._set_tokens[code])
+            if coverage >= 0.5:
+                main_set = self._sets[code]["set_type"] in _MAIN_SET_TYPES
+                scored.append((code, round(coverage + (0.01 if main_set else 0), 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def symbol_keywords(self, code: str) -> List[Tuple[str, str, frozenset]]:
+        """(keyword, cleaned keyword, keyword words) for each known symbol description of a set"""
+        return self._symbols.get((code or "").lower(), [])
+
+    def release_year(self, code: str) -> Optional[str]:
+        entry = self.get(code)
+        return entry["released_at"][:4] if entry and entry.get("released_at") else None
+
+
+def build_set_registry() -> SetRegistry:
+    """Cached Scryfall set list (refreshed when stale), else the built-in seed"""
+    started = time.perf_counter()
+    payload, source = fetch_cached("/sets", "sets.json", SETS_MAX_AGE_SECONDS)
+    sets = payload.get("data") if isinstance(payload, dict) else None
+    if not sets:
+        sets, source = SEED_SETS, "seed"
+    registry = SetRegistry(sets, source)
+    logger.info(f"🗂️ Set registry: {len(registry)} sets from {source} in {time.perf_counter() - started:.2f}s")
+    return registry
+
+
+_registry = LazyResource("set_registry", build_set_registry)
+
+
+def get_set_registry() -> SetRegistry:
+    """Process-wide registry, built on first use"""
+    return _registry.get()
+
+
+def warm_set_registry():
+    return _registry.warm()
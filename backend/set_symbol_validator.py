@@ -3,98 +3,29 @@
 Set Symbol Validator - Correlates AI-identified set symbols with known set information
 """
 
-import re
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from typing import Dict, List, Tuple
+
+from backend.set_registry import clean_symbol_description, get_set_registry
 
 class SetSymbolValidator:
     """Validates set symbols against known Magic: The Gathering sets"""
     
-    def __init__(self):
-        """Initialize with known set symbol descriptions"""
-        # Common set symbol descriptions mapped to set codes/names
-        self.symbol_patterns = {
-            # Commander sets
-            "commander 2017": {
-                "codes": ["c17", "cma"],
-                "names": ["commander 2017", "commander anthology"],
-                "symbols": ["shield with sword", "dragon head", "stylized dragon", "dragon symbol"]
-            },
-            "commander 2018": {
-                "codes": ["c18"],
-                "names": ["commander 2018"],
-                "symbols": ["shield", "stylized shield", "shield symbol"]
-            },
-            "commander 2015": {
-                "codes": ["c15"],
-                "names": ["commander 2015"],
-                "symbols": ["stylized c", "commander symbol"]
-            },
-            "commander 2011": {
-                "codes": ["cmd"],
-                "names": ["commander 2011"],
-                "symbols": ["triangle", "stylized triangle"]
-            },
-            
-            # Core sets
-            "magic 2012": {
-                "codes": ["m12"],
-                "names": ["magic 2012"],
-                "symbols": ["m12", "stylized m"]
-            },
-            "unlimited edition": {
-                "codes": ["2ed"],
-                "names": ["unlimited edition", "unlimited"],
-                "symbols": ["no symbol", "none visible", "early set"]
-            },
-            
-            # Expansion sets
-            "modern horizons 2": {
-                "codes": ["mh2"],
-                "names": ["modern horizons 2"],
-                "symbols": ["horizons symbol", "modern horizons", "mh2"]
-            },
-            "eternal masters": {
-                "codes": ["ema"],
-                "names": ["eternal masters"],
-                "symbols": ["eternal symbol", "masters symbol"]
-            },
-            "urza's legacy": {
-                "codes": ["ulg"],
-                "names": ["urza's legacy"],
-                "symbols": ["urza symbol", "legacy symbol", "gear"]
-            },
-            "rise of the eldrazi": {
-                "codes": ["roe"],
-                "names": ["rise of the eldrazi"],
-                "symbols": ["eldrazi symbol", "hedron", "geometric"]
-            },
-            "ultimate masters": {
-                "codes": ["uma"],
-                "names": ["ultimate masters"],
-                "symbols": ["masters symbol", "ultimate symbol"]
-            },
-            "time spiral": {
-                "codes": ["tsp"],
-                "names": ["time spiral"],
-                "symbols": ["spiral", "time symbol"]
-            },
-            "time spiral remastered": {
-                "codes": ["tsr"],
-                "names": ["time spiral remastered"],
-                "symbols": ["spiral", "remastered", "time symbol"]
-            }
-        }
-        
-        # Create reverse lookup: set_code -> expected symbols
-        self.code_to_symbols = {}
-        self.name_to_symbols = {}
-        
-        for set_key, set_info in self.symbol_patterns.items():
-            for code in set_info["codes"]:
-                self.code_to_symbols[code.lower()] = set_info["symbols"]
-            for name in set_info["names"]:
-                self.name_to_symbols[name.lower()] = set_info["symbols"]
+    @property
+    def registry(self):
+        """Symbol descriptions and set lookups come from the shared set registry"""
+        return get_set_registry()
+    
+    def _expected_symbols(self, set_name: str, set_code: str) -> List[Tuple[str, str, frozenset]]:
+        """Known symbol descriptions for the set named by its code and/or name"""
+        codes = []
+        for value in (set_code, set_name):
+            code = self.registry.resolve(value) if value else None
+            if code and code not in codes:
+                codes.append(code)
+        expected = []
+        for code in codes:
+            expected.extend(symbol for symbol in self.registry.symbol_keywords(code) if symbol not in expected)
+        return expected
     
     def validate_symbol_description(self, set_name: str, set_code: str, symbol_description: str) -> Tuple[bool, float, str]:
         """
@@ -106,45 +37,28 @@ class SetSymbolValidator:
         if not symbol_description:
             return False, -0.2, "No symbol description provided"
         
-        symbol_desc_lower = symbol_description.lower()
-        set_name_lower = set_name.lower() if set_name else ""
-        set_code_lower = set_code.lower() if set_code else ""
-        
-        # Get expected symbols for this set
-        expected_symbols = []
-        
-        if set_code_lower in self.code_to_symbols:
-            expected_symbols.extend(self.code_to_symbols[set_code_lower])
-        
-        if set_name_lower in self.name_to_symbols:
-            expected_symbols.extend(self.name_to_symbols[set_name_lower])
+        expected_symbols = self._expected_symbols(set_name, set_code)
         
         if not expected_symbols:
             # Unknown set - can't validate but don't penalize
             return True, 0.0, f"Unknown set '{set_name}' - cannot validate symbol"
         
         # Check if AI description matches any expected symbol
-        for expected in expected_symbols:
-            if self._symbols_match(symbol_desc_lower, expected.lower()):
+        ai_clean, ai_words = clean_symbol_description(symbol_description)
+        for _, expected_clean, expected_words in expected_symbols:
+            if self._symbols_match(ai_clean, ai_words, expected_clean, expected_words):
                 return True, 0.1, f"Symbol description matches expected for {set_name}"
         
         # Symbol doesn't match - this is suspicious
-        return False, -0.3, f"Symbol mismatch: AI says '{symbol_description}' but expected one of {expected_symbols} for {set_name}"
+        expected_names = [keyword for keyword, _, _ in expected_symbols]
+        return False, -0.3, f"Symbol mismatch: AI says '{symbol_description}' but expected one of {expected_names} for {set_name}"
     
-    def _symbols_match(self, ai_description: str, expected: str) -> bool:
-        """Check if AI description matches expected symbol description"""
-        # Clean descriptions
-        ai_clean = re.sub(r'[^\w\s]', '', ai_description).strip()
-        expected_clean = re.sub(r'[^\w\s]', '', expected).strip()
-        
+    def _symbols_match(self, ai_clean: str, ai_words: frozenset, expected_clean: str, expected_words: frozenset) -> bool:
+        """Check if AI description matches expected symbol description (both already cleaned)"""
         # Exact match
         if ai_clean == expected_clean:
             return True
         
-        # Partial match - check if key words overlap
-        ai_words = set(ai_clean.split())
-        expected_words = set(expected_clean.split())
-        
         # Need at least 50% word overlap for longer descriptions
         if len(expected_words) > 1:
             overlap = len(ai_words & expected_words)
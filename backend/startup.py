@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Startup - deferred initialization of heavy subsystems and a startup profile mode.
+
+Importing the app only builds routes; the database schema check, the OpenAI /
+Anthropic clients and the vision config are created on first use through
+LazyResource, and warmed in a background thread from the startup hook so health
+checks answer immediately.
+
+STARTUP_PROFILE=1 logs how long each startup phase took and when the first
+healthy response went out. For a full import profile:
+    python -m backend.startup
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROCESS_STARTED = time.perf_counter()
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+_phases: Dict[str, float] = {}
+_phases_lock = threading.Lock()
+_first_ready: Optional[float] = None
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Time one startup phase; logged when STARTUP_PROFILE is on"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def record_phase(name: str, elapsed: float):
+    with _phases_lock:
+        _phases[name] = round(elapsed, 4)
+    if STARTUP_PROFILE:
+        logger.info(f"⏱️ Startup phase {name}: {elapsed * 1000:.0f}ms",
+                    extra={"event": "startup.phase", "phase": name, "seconds": round(elapsed, 4)})
+
+
+def mark_ready():
+    """Record the first healthy response after process start"""
+    global _first_ready
+    if _first_ready is not None:
+        return
+    _first_ready = time.perf_counter() - PROCESS_STARTED
+    if STARTUP_PROFILE:
+        logger.info(f"🚀 First healthy response {_first_ready * 1000:.0f}ms after startup",
+                    extra={"event": "startup.ready", "seconds": round(_first_ready, 4)})
+
+
+def startup_report() -> Dict[str, Any]:
+    """Phase timings so far, for /debug endpoints and the profiler"""
+    with _phases_lock:
+        phases = dict(_phases)
+    return {
+        "profile_enabled": STARTUP_PROFILE,
+        "uptime_seconds": round(time.perf_counter() - PROCESS_STARTED, 3),
+        "first_ready_seconds": round(_first_ready, 4) if _first_ready is not None else None,
+        "phases": phases
+    }
+
+
+class LazyResource:
+    """
+    Thread-safe create-once wrapper. The factory runs on the first get(), or in the
+    background after warm(); concurrent callers wait for the same instance. Errors
+    listed in `unavailable_on` are logged once and make get() return None.
+    refresh() rebuilds a degraded instance in the background without blocking get().
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any],
+                 unavailable_on: Tuple[Type[BaseException], ...] = ()):
+        self.name = name
+        self._factory = factory
+        self._unavailable_on = unavailable_on
+        self._lock = threading.Lock()
+        self._done = False
+        self._value = None
+        self._refreshing = False
+
+    @property
+    def initialized(self) -> bool:
+        return self._done
+
+    def get(self):
+        if self._done:
+            return self._value
+        with self._lock:
+            if not self._done:
+                with startup_phase(self.name):
+                    try:
+                        self._value = self._factory()
+                    except self._unavailable_on as e:
+                        logger.error(f"{self.name} not available: {e}")
+                        self._value = None
+                self._done = True
+        return self._value
+
+    def warm(self) -> threading.Thread:
+        """Initialize in a daemon thread; failures are logged and retried on the next get()"""
+        def run():
+            try:
+                self.get()
+            except Exception as e:
+                logger.warning(f"⚠️ Background initialization of {self.name} failed: {e}")
+
+        thread = threading.Thread(target=run, name=f"warm-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def refresh(self) -> Optional[threading.Thread]:
+        """
+        Build a replacement in a daemon thread; get() keeps returning the current
+        instance until it is ready. None if a refresh is already running.
+        """
+        with self._lock:
+            if self._refreshing:
+                return None
+            self._refreshing = True
+
+        def run():
+            try:
+                value = self._factory()
+            except Exception as e:
+                logger.warning(f"⚠️ Refreshing {self.name} failed: {e}")
+                return
+            finally:
+                with self._lock:
+                    self._refreshing = False
+            with self._lock:
+                self._value = value
+                self._done = True
+
+        thread = threading.Thread(target=run, name=f"refresh-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+
+def _profile_startup(limit: int = 25):
+    """Profile importing the app and serving the first /api/environment request"""
+    import cProfile
+    import pstats
+    # Run as __main__ this module is a separate copy - read timings from the imported one
+    from backend.startup import startup_report
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    from backend.app import app
+    imported = time.perf_counter()
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        client.get("/api/environment").raise_for_status()
+    profiler.disable()
+    ready = time.perf_counter()
+
+    print(f"📦 Import backend.app: {(imported - started) * 1000:.0f}ms")
+    print(f"🚀 First /api/environment response: {(ready - started) * 1000:.0f}ms")
+    for name, seconds in startup_report()["phases"].items():
+        print(f"   {name}: {seconds * 1000:.0f}ms")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(limit)
+
+
+if __name__ == "__main__":
+    _profile_startup()
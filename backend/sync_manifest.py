@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Sync Manifest - an index of (path, size, mtime, sha256) for every file in an
+uploads volume, used to sync volumes incrementally.
+
+The index is persisted next to the files (.sync_manifest.json) and refreshed with
+a stat() walk; a file is only re-hashed when its size or mtime changed, and blobs
+are never hashed because their name is their hash. Diffing two manifests by
+content hash gives the files a sync has to transfer.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.blob_store import is_blob_filename, resolve_upload_path
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = ".sync_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_syncable(relative_path: str) -> bool:
+    """Skip hidden files (manifest, in-flight .upload-*.part files) and temp files"""
+    name = os.path.basename(relative_path)
+    return not (name.startswith(".") or ".part-" in name or name.endswith((".part", ".tmp")))
+
+
+def safe_relative_path(path: str) -> str:
+    """Normalise a client supplied relative path, rejecting anything that escapes the volume"""
+    parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or path.startswith("/") or any(part == ".." or part.startswith(".") for part in parts):
+        raise ValueError(f"Invalid sync path: {path}")
+    return "/".join(parts)
+
+
+def volume_path(root: str, relative_path: str) -> str:
+    """Local path for a manifest path; a bare blob filename resolves to its sharded location"""
+    relative_path = safe_relative_path(relative_path)
+    if "/" not in relative_path:
+        return resolve_upload_path(root, relative_path)
+    return os.path.join(root, *relative_path.split("/"))
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_entry(stat_result: os.stat_result, sha256: str) -> Dict[str, Any]:
+    return {"size": stat_result.st_size, "mtime": round(stat_result.st_mtime, 3), "sha256": sha256}
+
+
+class SyncManifest:
+    """Incrementally maintained manifest of one uploads volume"""
+
+    def __init__(self, root: str, cache_path: Optional[str] = None):
+        self.root = root
+        self.cache_path = cache_path or os.path.join(root, MANIFEST_FILENAME)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.cache_path) as f:
+                self._entries = json.load(f).get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable sync manifest {self.cache_path}: {e}")
+
+    def save(self):
+        """Persist the index atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump({"version": 1, "files": self._entries}, f, separators=(",", ":"))
+            os.replace(temp_path, self.cache_path)
+            self._dirty = False
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Walk the volume and return {path: {"size", "mtime", "sha256"}}. Unchanged
+        files keep their cached hash, so only new or modified files are read.
+        """
+        started = time.perf_counter()
+        hashed = 0
+        with self._lock:
+            self._load()
+            entries = {}
+            for directory, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    relative_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+                    if not is_syncable(relative_path):
+                        continue
+                    try:
+                        stat_result = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # Removed during the walk
+                    cached = self._entries.get(relative_path)
+                    if (cached and cached["size"] == stat_result.st_size
+                            and cached["mtime"] == round(stat_result.st_mtime, 3)):
+                        entries[relative_path] = cached
+                        continue
+                    if is_blob_filename(filename):
+                        sha256 = filename.split(".", 1)[0]
+                    else:
+                        sha256 = hash_file(path)
+                        hashed += 1
+                    entries[relative_path] = _stat_entry(stat_result, sha256)
+            if entries != self._entries:
+                self._entries = entries
+                self._dirty = True
+        self.save()
+        logger.info(
+            "Sync manifest refreshed: %d files, %d hashed in %.2fs", len(entries), hashed,
+            time.perf_counter() - started,
+            extra={"event": "sync.manifest", "files": len(entries), "hashed": hashed}
+        )
+        return dict(entries)
+
+    def record(self, relative_path: str, sha256: str):
+        """Register a file that was just written with a known hash so it is not re-read"""
+        path = volume_path(self.root, relative_path)
+        relative_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+        with self._lock:
+            self._load()
+            self._entries[relative_path] = _stat_entry(os.stat(path), sha256)
+            self._dirty = True
+
+
+def diff_manifests(source: Dict[str, Dict[str, Any]], target: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compare two manifests by content hash (mtimes differ between hosts).
+    Returns missing / changed paths to transfer, the unchanged count, paths only
+    on the target, and the number of bytes to transfer.
+    """
+    missing, changed = [], []
+    for path, entry in source.items():
+        other = target.get(path)
+        if other is None:
+            missing.append(path)
+        elif other["sha256"] != entry["sha256"] or other["size"] != entry["size"]:
+            changed.append(path)
+    transfer = missing + changed
+    return {
+        "missing": sorted(missing),
+        "changed": sorted(changed),
+        "unchanged": len(source) - len(transfer),
+        "extra": sorted(path for path in target if path not in source),
+        "transfer_bytes": sum(source[path]["size"] for path in transfer)
+    }
+
+
+_manifests: Dict[str, SyncManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_sync_manifest(root: str) -> SyncManifest:
+    """Process-wide manifest for an uploads directory"""
+    with _manifests_lock:
+        if root not in _manifests:
+            _manifests[root] = SyncManifest(root)
+        return _manifests[root]
+
+
+def paths_to_transfer(diff: Dict[str, Any]) -> List[str]:
+    """Paths a sync must transfer, in a stable order"""
+    return diff["missing"] + diff["changed"]
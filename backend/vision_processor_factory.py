@@ -3,15 +3,220 @@
 Vision Processor Factory - Manages multiple vision processing backends
 """
 
+import contextvars
+import glob
+import hashlib
 import json
 import os
+import random
+import re
 import time
-import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 
-logger = logging.getLogger(__name__)
+from backend.logging_config import get_logger
+from backend.startup import LazyResource
+from backend.vision_prompts import (
+    CardEmitter, extract_json, get_prompt, max_tokens_for, parse_cards, streaming_enabled, token_usage
+)
+
+logger = get_logger(__name__)
+
+def parse_batch_response(content: Optional[str], image_count: int) -> List[List[Dict[str, Any]]]:
+    """
+    Split a batched identification response into per-image card lists.
+    Raises ValueError if any image cannot be attributed.
+    """
+    if not content:
+        raise ValueError("Empty batch response")
+    
+    entries = extract_json(content)
+    if isinstance(entries, dict):
+        # {"images": [...]} from the v2 prompt / schema
+        entries = entries.get("images")
+    if not isinstance(entries, list):
+        raise ValueError("No per-image list found in batch response")
+    
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * image_count
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("cards"), list):
+            raise ValueError(f"Malformed batch entry: {entry!r:.200}")
+        try:
+            index = int(entry.get("image")) - 1
+        except (TypeError, ValueError):
+            raise ValueError(f"Batch entry without image number: {entry!r:.200}")
+        if not 0 <= index < image_count or results[index] is not None:
+            raise ValueError(f"Unexpected image number {index + 1} in batch response")
+        results[index] = entry["cards"]
+    
+    missing = [i + 1 for i, cards in enumerate(results) if cards is None]
+    if missing:
+        raise ValueError(f"Batch response missing images {missing}")
+    return results
+
+def plan_batches(image_paths: List[str], max_batch_bytes: int, max_batch_images: int) -> List[List[str]]:
+    """
+    Group image paths into batches bounded by total file size and image count.
+    An image larger than max_batch_bytes gets a batch of its own; unreadable
+    paths are returned as single-image batches so the caller reports them.
+    """
+    batches = []
+    current, current_bytes = [], 0
+    for image_path in image_paths:
+        try:
+            size = os.path.getsize(image_path)
+        except OSError:
+            batches.append([image_path])
+            continue
+        if current and (current_bytes + size > max_batch_bytes or len(current) >= max_batch_images):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(image_path)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+class CircuitOpenError(Exception):
+    """Raised when a processor's circuit breaker rejects a request"""
+    pass
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker driven by error rate and latency"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.name = name
+        self.failure_threshold = config.get("failure_threshold", 5)                # Consecutive failures
+        self.error_rate_threshold = config.get("error_rate_threshold", 0.5)
+        self.slow_call_seconds = config.get("slow_call_seconds", 60)
+        self.slow_call_rate_threshold = config.get("slow_call_rate_threshold", 0.5)
+        self.min_calls = config.get("min_calls", 10)                               # Before rates are evaluated
+        self.open_seconds = config.get("open_seconds", 60)                         # Open -> half-open delay
+        self.half_open_max_calls = config.get("half_open_max_calls", 1)
+        
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=config.get("window_size", 20))  # (succeeded, slow) per call
+        self.half_open_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def _refresh(self):
+        """Move from open to half-open once the open period has elapsed"""
+        if self.state == self.OPEN and time.time() - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self.half_open_in_flight = 0
+            logger.info(f"🔌 {self.name} circuit half-open, probing")
+    
+    def allows_requests(self) -> bool:
+        """Check whether a request would currently be let through"""
+        with self._lock:
+            self._refresh()
+            if self.state == self.OPEN:
+                return False
+            if self.state == self.HALF_OPEN:
+                return self.half_open_in_flight < self.half_open_max_calls
+            return True
+    
+    def acquire(self) -> bool:
+        """Reserve a slot for a request; False if the circuit rejects it"""
+        with self._lock:
+            self._refresh()
+            if self.state == self.OPEN:
+                return False
+            if self.state == self.HALF_OPEN:
+                if self.half_open_in_flight >= self.half_open_max_calls:
+                    return False
+                self.half_open_in_flight += 1
+            return True
+    
+    def record_success(self, latency: float):
+        """Record a completed call"""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+                if slow:
+                    self._open(f"probe took {latency:.1f}s")
+                else:
+                    self._close()
+                return
+            self.consecutive_failures = 0
+            self.outcomes.append((True, slow))
+            self._evaluate()
+    
+    def release(self):
+        """Give back a slot without an outcome (a hedged call whose result was abandoned)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+    
+    def record_failure(self):
+        """Record a failed call"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+                self._open("probe failed")
+                return
+            self.consecutive_failures += 1
+            self.outcomes.append((False, False))
+            self._evaluate()
+    
+    def _evaluate(self):
+        """Open the circuit if any threshold is exceeded"""
+        if self.state != self.CLOSED:
+            return
+        if self.consecutive_failures >= self.failure_threshold:
+            self._open(f"{self.consecutive_failures} consecutive failures")
+            return
+        if len(self.outcomes) < self.min_calls:
+            return
+        error_rate = sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+        slow_rate = sum(1 for _, slow in self.outcomes if slow) / len(self.outcomes)
+        if error_rate >= self.error_rate_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._open(f"slow call rate {slow_rate:.0%}")
+    
+    def _open(self, reason: str):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.times_opened += 1
+        self.consecutive_failures = 0
+        self.outcomes.clear()
+        logger.warning(f"🔌 {self.name} circuit opened: {reason}")
+    
+    def _close(self):
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.outcomes.clear()
+        logger.info(f"🔌 {self.name} circuit closed")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get breaker state for status reporting"""
+        with self._lock:
+            self._refresh()
+            outcomes = list(self.outcomes)
+            return {
+                "state": self.state,
+                "opened_at": datetime.fromtimestamp(self.opened_at).isoformat() if self.opened_at else None,
+                "times_opened": self.times_opened,
+                "consecutive_failures": self.consecutive_failures,
+                "window_calls": len(outcomes),
+                "window_error_rate": round(sum(1 for ok, _ in outcomes if not ok) / len(outcomes), 3) if outcomes else 0.0,
+                "window_slow_rate": round(sum(1 for _, slow in outcomes if slow) / len(outcomes), 3) if outcomes else 0.0
+            }
 
 class VisionProcessorBase(ABC):
     """Base class for all vision processors"""
@@ -21,6 +226,8 @@ class VisionProcessorBase(ABC):
         self.enabled = config.get('enabled', True)
         self.last_failure_time = None
         self.failure_count = 0
+        self.recent_latencies = deque(maxlen=200)  # Seconds per successful call
+        self.breaker = CircuitBreaker(self.__class__.__name__)  # Replaced by the factory with configured thresholds
         
     @abstractmethod
     def process_image(self, image_path: str) -> List[Dict[str, Any]]:
@@ -32,9 +239,19 @@ class VisionProcessorBase(ABC):
         """Get processor name"""
         pass
     
+    # Processors that can identify several images in one request override process_batch
+    supports_batching = False
+    
+    # Processors whose process_image accepts on_card, called with each card as the response streams in
+    supports_streaming = False
+    
+    def process_batch(self, image_paths: List[str]) -> List[List[Dict[str, Any]]]:
+        """Process several images in one request; returns one card list per image"""
+        raise NotImplementedError(f"{self.get_name()} does not support batching")
+    
     def is_available(self) -> bool:
         """Check if processor is available for use"""
-        return self.enabled
+        return self.enabled and self.breaker.allows_requests()
     
     def record_failure(self):
         """Record a failure for this processor"""
@@ -48,12 +265,28 @@ class VisionProcessorBase(ABC):
             logger.info(f"✅ {self.get_name()} processor recovered after {self.failure_count} failures")
         self.failure_count = 0
         self.last_failure_time = None
+    
+    def record_latency(self, seconds: float):
+        """Record the duration of a successful call"""
+        self.recent_latencies.append(seconds)
+    
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Get a latency percentile (0-100) over recent calls, None if no samples"""
+        if not self.recent_latencies:
+            return None
+        samples = sorted(self.recent_latencies)
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
 
 class OpenAIVisionProcessor(VisionProcessorBase):
     """OpenAI Vision Processor"""
     
+    supports_batching = True
+    supports_streaming = True
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
+        self.ai_processor = None
         self.setup_openai_client()
     
     def setup_openai_client(self):
@@ -76,22 +309,46 @@ class OpenAIVisionProcessor(VisionProcessorBase):
     def get_name(self) -> str:
         return "OpenAI"
     
-    def process_image(self, image_path: str) -> List[Dict[str, Any]]:
+    def process_image(self, image_path: str,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """Process image using OpenAI Vision API"""
         try:
-            # Use existing CardRecognitionAI logic
-            from backend.ai_processor import CardRecognitionAI
-            ai_processor = CardRecognitionAI()
-            result = ai_processor.process_image(image_path)
+            # Use existing CardRecognitionAI identification directly - its
+            # process_image() routes back through this factory
+            if self.ai_processor is None:
+                from backend.ai_processor import CardRecognitionAI
+                self.ai_processor = CardRecognitionAI()
+            result = self.ai_processor.identify_cards(image_path, max_tokens=self.config.get('max_tokens', 1500),
+                                                      on_card=on_card)
             self.record_success()
             return result
         except Exception as e:
             self.record_failure()
             raise Exception(f"OpenAI Vision processing failed: {e}")
+    
+    def process_batch(self, image_paths: List[str]) -> List[List[Dict[str, Any]]]:
+        """Process several images with one OpenAI Vision request"""
+        try:
+            if self.ai_processor is None:
+                from backend.ai_processor import CardRecognitionAI
+                self.ai_processor = CardRecognitionAI()
+            results = self.ai_processor.identify_cards_batch(
+                image_paths,
+                max_tokens_per_image=self.config.get('max_tokens', 1500),
+                max_tokens=self.config.get('max_batch_tokens', 8000)
+            )
+            self.record_success()
+            return results
+        except Exception as e:
+            self.record_failure()
+            raise Exception(f"OpenAI Vision batch processing failed: {e}")
 
 class ClaudeVisionProcessor(VisionProcessorBase):
     """Claude Vision Processor using Anthropic API"""
     
+    supports_batching = True
+    supports_streaming = True
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.setup_claude_client()
@@ -113,80 +370,119 @@ class ClaudeVisionProcessor(VisionProcessorBase):
     def get_name(self) -> str:
         return "Claude Vision"
     
-    def process_image(self, image_path: str) -> List[Dict[str, Any]]:
-        """Process image using Claude Vision API"""
+    def _image_block(self, image_path: str) -> Dict[str, Any]:
+        import base64
+        with open(image_path, 'rb') as image_file:
+            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": "image/jpeg",
+                "data": image_data
+            }
+        }
+    
+    def _create_message(self, content: List[Dict[str, Any]], max_tokens: int, prefill: str = "",
+                        stream: Optional[CardEmitter] = None):
+        """
+        One Messages API call; a prefill starts the assistant turn so the reply continues the JSON.
+        With `stream` the reply text is fed to the emitter as it arrives.
+        """
+        messages = [{"role": "user", "content": content}]
+        if prefill:
+            messages.append({"role": "assistant", "content": prefill})
+        options = dict(
+            model=self.config.get('model', "claude-3-5-sonnet-20241022"),
+            max_tokens=max_tokens,
+            temperature=0.0,
+            messages=messages
+        )
+        if not stream:
+            return self.client.messages.create(**options)
+        stream.restart()
+        with self.client.messages.stream(**options) as events:
+            for text in events.text_stream:
+                stream.feed(text)
+            return events.get_final_message()
+    
+    def _record_usage(self, response, prompt_version: str, max_tokens: int, truncated: bool,
+                      images: int, cards: Optional[int]):
+        usage = getattr(response, 'usage', None)
+        token_usage.record("claude", prompt_version, getattr(usage, 'input_tokens', None),
+                           getattr(usage, 'output_tokens', None), max_tokens,
+                           truncated=truncated, images=images, cards=cards)
+    
+    @staticmethod
+    def _response_text(response) -> str:
         try:
-            import anthropic
-            import base64
+            if hasattr(response, 'content') and response.content:
+                return response.content[0].text
+        except (AttributeError, IndexError):
+            pass
+        return ""
+    
+    def process_image(self, image_path: str,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Process image using Claude Vision API. The output budget follows the
+        expected card count; a reply cut off by it is retried once with max_tokens.
+        With on_card the reply is streamed and each card passed on as it completes.
+        """
+        try:
+            prompt = get_prompt()
+            cap = self.config.get('max_tokens', 1500)
+            budget = max_tokens_for(prompt, token_usage.expected_cards_per_image(), cap=cap)
+            content = [{"type": "text", "text": prompt.identify}, self._image_block(image_path)]
+            emitter = CardEmitter(on_card, prompt.prefill) if on_card and streaming_enabled() else None
             
-            # Read and encode image
-            with open(image_path, 'rb') as image_file:
-                image_data = base64.b64encode(image_file.read()).decode('utf-8')
+            while True:
+                response = self._create_message(content, budget, prompt.prefill, stream=emitter)
+                text = prompt.prefill + self._response_text(response)
+                cards, parse_mode = parse_cards(text)
+                truncated = getattr(response, 'stop_reason', None) == "max_tokens"
+                self._record_usage(response, prompt.version, budget, truncated, 1, len(cards))
+                if not truncated or budget >= cap:
+                    break
+                logger.info(f"Claude response cut off at {budget} tokens after {len(cards)} cards, retrying with {cap}")
+                budget = cap
             
-            # Claude vision prompt
-            prompt = """Analyze this Magic: The Gathering card image and identify each card with detailed information.
-
-For each card you can see, provide:
-1. The EXACT card name
-2. Set information (if visible)
-3. Collector number if visible
-4. Any distinguishing features
-5. Confidence level
-
-Return the results as a JSON array. If no cards can be identified, return an empty array [].
-
-Focus on accuracy - only identify cards you can clearly see and read."""
+            if parse_mode == "empty":
+                logger.warning("No valid JSON found in Claude response")
+            self.record_success()
+            return cards
             
-            # Make Claude API call
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1500,
-                temperature=0.0,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": image_data
-                                }
-                            }
-                        ]
-                    }
-                ]
-            )
+        except Exception as e:
+            self.record_failure()
+            raise Exception(f"Claude Vision processing failed: {e}")
+    
+    def process_batch(self, image_paths: List[str]) -> List[List[Dict[str, Any]]]:
+        """Process several images with one Claude Vision request"""
+        try:
+            prompt = get_prompt()
+            content = [{"type": "text", "text": prompt.identify + prompt.batch_instructions}]
+            for index, image_path in enumerate(image_paths, start=1):
+                content.append({"type": "text", "text": f"Image {index}:"})
+                content.append(self._image_block(image_path))
             
-            # Parse response - handle different response formats
+            budget = max_tokens_for(prompt, token_usage.expected_cards_per_image(), images=len(image_paths),
+                                    cap=min(self.config.get('max_batch_tokens', 8000),
+                                            self.config.get('max_tokens', 1500) * len(image_paths)))
+            response = self._create_message(content, budget)
+            truncated = getattr(response, 'stop_reason', None) == "max_tokens"
             try:
-                if hasattr(response, 'content') and response.content:
-                    content = response.content[0].text
-                else:
-                    content = str(response)
-            except:
-                content = str(response)
-            
-            # Extract JSON from response
-            import re
-            import json
-            if content:
-                json_match = re.search(r'\[.*\]', content, re.DOTALL)
-                if json_match:
-                    cards = json.loads(json_match.group())
-                    self.record_success()
-                    return cards
-            
-            # If no JSON found, return empty array
-            logger.warning("No valid JSON found in Claude response")
+                results = parse_batch_response(self._response_text(response), len(image_paths))
+            except ValueError:
+                self._record_usage(response, prompt.version, budget, truncated, len(image_paths), None)
+                raise
+            self._record_usage(response, prompt.version, budget, truncated, len(image_paths),
+                               sum(len(cards) for cards in results))
             self.record_success()
-            return []
+            return results
             
         except Exception as e:
             self.record_failure()
-            raise Exception(f"Claude Vision processing failed: {e}")
+            raise Exception(f"Claude Vision batch processing failed: {e}")
 
 class GoogleVisionProcessor(VisionProcessorBase):
     """Google Vision Processor with full image analysis"""
@@ -449,6 +745,151 @@ class LocalOCRProcessor(VisionProcessorBase):
         
         return cards
 
+class ReplayVisionProcessor(VisionProcessorBase):
+    """
+    Replay Processor - serves recorded AI responses instead of calling a vision API.
+    Responses come from *.json/*.txt files in a fixture directory ("source":
+    "fixtures", the only source), with synthetic latency and injected errors for
+    load testing. ScanResult.ai_raw_response is not a usable source: it holds the
+    app-level processor's last reply, not what the factory returned for that image. Streamed single-image responses
+    are released in chunks spread over the sampled latency.
+    """
+    
+    supports_batching = True
+    supports_streaming = True
+    STREAM_CHUNKS = 20
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.responses = None  # Loaded on first use
+        self.fixtures_by_stem = {}
+        self._random = random.Random(config.get('seed'))
+        self._random_lock = threading.Lock()
+    
+    def get_name(self) -> str:
+        return "Replay"
+    
+    def _load_responses(self):
+        """Load recorded responses from the configured source"""
+        if self.responses is not None:
+            return
+        
+        source = self.config.get('source', 'fixtures')
+        if source != 'fixtures':
+            raise Exception(f"Unsupported replay source '{source}' - record responses as fixtures")
+        fixture_dir = self.config.get('fixture_dir', 'fixtures/vision_responses')
+        responses = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, '*.json')) + glob.glob(os.path.join(fixture_dir, '*.txt'))):
+            with open(path, 'r') as f:
+                content = f.read()
+            responses.append(content)
+            self.fixtures_by_stem[os.path.splitext(os.path.basename(path))[0]] = content
+        
+        if not responses:
+            raise Exception(f"No recorded responses found in {fixture_dir}")
+        self.responses = responses
+        logger.info(f"📼 Replay processor loaded {len(responses)} recorded responses from {fixture_dir}")
+    
+    def _pick_response(self, image_path: str) -> str:
+        """Fixture named after the image if present, else a stable choice by path"""
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        if stem in self.fixtures_by_stem:
+            return self.fixtures_by_stem[stem]
+        digest = hashlib.md5(image_path.encode('utf-8')).hexdigest()
+        return self.responses[int(digest, 16) % len(self.responses)]
+    
+    def _sample_latency(self) -> float:
+        """Draw a synthetic latency in seconds from the configured distribution"""
+        latency = self.config.get('latency', {})
+        distribution = latency.get('distribution', 'none')
+        with self._random_lock:
+            if distribution == 'constant':
+                value = latency.get('seconds', 1.0)
+            elif distribution == 'uniform':
+                value = self._random.uniform(latency.get('min_seconds', 0.5), latency.get('max_seconds', 2.0))
+            elif distribution == 'normal':
+                value = self._random.gauss(latency.get('mean_seconds', 1.0), latency.get('stddev_seconds', 0.25))
+            elif distribution == 'lognormal':
+                # median_seconds is the 50th percentile; sigma controls the tail
+                value = latency.get('median_seconds', 1.0) * self._random.lognormvariate(0, latency.get('sigma', 0.5))
+            else:
+                value = 0.0
+        return min(max(value, 0.0), latency.get('cap_seconds', 300))
+    
+    def _inject_error(self) -> Optional[str]:
+        """Pick an injected failure mode for this call, if any"""
+        errors = self.config.get('errors', {})
+        with self._random_lock:
+            roll = self._random.random()
+        for mode in ('timeout', 'rate_limit', 'malformed_json'):
+            rate = errors.get(f'{mode}_rate', 0.0)
+            if roll < rate:
+                return mode
+            roll -= rate
+        return None
+    
+    def _replay(self, image_paths: List[str], stream: Optional[CardEmitter] = None) -> List[str]:
+        """Simulate one API call; returns the raw response text for each image"""
+        self._load_responses()
+        
+        error = self._inject_error()
+        if error == 'timeout':
+            time.sleep(self.config.get('errors', {}).get('timeout_seconds', 120))
+            raise TimeoutError("Request timed out (replay)")
+        
+        latency = self._sample_latency()
+        if error == 'rate_limit':
+            time.sleep(latency)
+            raise Exception("Error code: 429 - Rate limit exceeded (replay)")
+        
+        contents = [self._pick_response(image_path) for image_path in image_paths]
+        if error == 'malformed_json':
+            # Truncated mid-object, as when a response hits max_tokens
+            contents = [content[:len(content) // 2] + ']' for content in contents]
+        
+        if stream and len(contents) == 1:
+            content = contents[0]
+            chunk_size = max(1, -(-len(content) // self.STREAM_CHUNKS))
+            for start in range(0, len(content), chunk_size):
+                time.sleep(latency / self.STREAM_CHUNKS)
+                stream.feed(content[start:start + chunk_size])
+        else:
+            time.sleep(latency)
+        
+        if error == 'malformed_json':
+            # Always a failure: the cut may leave no complete card, which would parse as a clean empty result
+            raise ValueError("Truncated or malformed JSON in response (replay)")
+        return contents
+    
+    def _parse_response(self, content: str) -> List[Dict[str, Any]]:
+        """Parse a recorded response the way the live processors do; truncated JSON counts as a failure"""
+        cards, parse_mode = parse_cards(content)
+        if parse_mode == "partial":
+            raise ValueError("Truncated or malformed JSON in recorded response")
+        return cards
+    
+    def process_image(self, image_path: str,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Serve a recorded response for an image"""
+        try:
+            emitter = CardEmitter(on_card) if on_card and streaming_enabled() else None
+            cards = self._parse_response(self._replay([image_path], stream=emitter)[0])
+            self.record_success()
+            return cards
+        except Exception as e:
+            self.record_failure()
+            raise Exception(f"Replay processing failed: {e}")
+    
+    def process_batch(self, image_paths: List[str]) -> List[List[Dict[str, Any]]]:
+        """Serve recorded responses for several images as one simulated call"""
+        try:
+            results = [self._parse_response(content) for content in self._replay(image_paths)]
+            self.record_success()
+            return results
+        except Exception as e:
+            self.record_failure()
+            raise Exception(f"Replay batch processing failed: {e}")
+
 class VisionProcessorFactory:
     """Factory for managing vision processors"""
     
@@ -457,6 +898,11 @@ class VisionProcessorFactory:
         self.config = self._load_config()
         self.processors = {}
         self.current_processor = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_window = deque(maxlen=self._hedging_config().get("window_size", 100))
+        self._hedges_fired = 0
+        self._hedges_won = 0
+        self._switched_from_primary_at = None  # When failover moved us off the primary
         self.setup_processors()
     
     def _load_config(self) -> Dict[str, Any]:
@@ -482,8 +928,29 @@ class VisionProcessorFactory:
             "failover": {
                 "auto_switch_on_failure": True,
                 "retry_primary_after_minutes": 30
-            }
+            },
+            "hedging": {
+                "enabled": False
+            },
+            "batching": {
+                "enabled": False
+            },
+            "circuit_breaker": {}
+        }
+    
+    def _hedging_config(self) -> Dict[str, Any]:
+        """Hedged-request settings with defaults filled in"""
+        defaults = {
+            "enabled": False,
+            "latency_percentile": 95,     # Fire the hedge once the primary is slower than this
+            "initial_delay_seconds": 20,  # Hedge delay until enough latency samples exist
+            "min_delay_seconds": 3,
+            "min_samples": 20,
+            "max_hedge_ratio": 0.1,       # At most this share of requests may be hedged
+            "window_size": 100
         }
+        defaults.update(self.config.get("hedging", {}))
+        return defaults
     
     def setup_processors(self):
         """Setup all available processors"""
@@ -505,6 +972,15 @@ class VisionProcessorFactory:
         if "local_ocr" in processor_configs:
             self.processors["local_ocr"] = LocalOCRProcessor(processor_configs["local_ocr"])
         
+        # Setup Replay processor (recorded responses, for load testing)
+        if "replay" in processor_configs:
+            self.processors["replay"] = ReplayVisionProcessor(processor_configs["replay"])
+        
+        # Give every processor a breaker with the configured thresholds
+        breaker_config = self.config.get("circuit_breaker", {})
+        for name, processor in self.processors.items():
+            processor.breaker = CircuitBreaker(processor.get_name(), breaker_config)
+        
         # Set primary processor
         primary_name = self.config["vision_processor"]["primary"]
         if primary_name in self.processors and self.processors[primary_name].is_available():
@@ -518,40 +994,250 @@ class VisionProcessorFactory:
                     logger.warning(f"🔄 Using fallback processor: {name}")
                     break
     
-    def process_image(self, image_path: str) -> List[Dict[str, Any]]:
-        """Process image with automatic failover"""
+    def process_image(self, image_path: str,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Process image with automatic failover. on_card is passed to streaming
+        processors; hedged requests are not streamed, as two responses race.
+        """
+        self._maybe_restore_primary()
+        
         if not self.current_processor:
             raise Exception("No vision processors available")
         
+        tried = [self.current_processor]
         try:
-            logger.info(f"🔍 Processing image with {self.current_processor.get_name()}")
-            result = self.current_processor.process_image(image_path)
-            return result
+            hedge_processor = self._get_hedge_processor()
+            if hedge_processor:
+                return self._process_hedged(image_path, self.current_processor, hedge_processor, tried)
+            
+            logger.debug("Processing image with %s", self.current_processor.get_name())
+            return self._timed_process(self.current_processor, image_path, on_card)
             
         except Exception as e:
-            logger.error(f"❌ {self.current_processor.get_name()} failed: {e}")
+            if isinstance(e, CircuitOpenError):
+                logger.debug("%s", e)
+            else:
+                logger.error(f"❌ {self.current_processor.get_name()} failed: {e}")
             
             # Try failover if enabled
             if self.config["failover"]["auto_switch_on_failure"]:
-                return self._try_failover(image_path)
+                return self._try_failover(image_path, tried=tried, on_card=on_card)
             else:
                 raise e
     
-    def _try_failover(self, image_path: str) -> List[Dict[str, Any]]:
+    def _timed_process(self, processor: VisionProcessorBase, image_path: str,
+                       on_card: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       abandoned: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Run a processor through its circuit breaker and record latency on success.
+        Once `abandoned` is set (a hedge race was decided) the outcome is not recorded.
+        """
+        if not processor.breaker.acquire():
+            raise CircuitOpenError(f"{processor.get_name()} circuit is {processor.breaker.state}, request skipped")
+        
+        start = time.time()
+        try:
+            if on_card and processor.supports_streaming:
+                result = processor.process_image(image_path, on_card=on_card)
+            else:
+                result = processor.process_image(image_path)
+        except Exception:
+            if abandoned is not None and abandoned.is_set():
+                processor.breaker.release()
+            else:
+                processor.breaker.record_failure()
+            raise
+        
+        if abandoned is not None and abandoned.is_set():
+            processor.breaker.release()
+            return result
+        
+        latency = time.time() - start
+        processor.record_latency(latency)
+        processor.breaker.record_success(latency)
+        return result
+    
+    def _batching_config(self) -> Dict[str, Any]:
+        """Batching settings with defaults filled in"""
+        config = {
+            "enabled": False,
+            "max_batch_bytes": 8 * 1024 * 1024,  # Total raw image bytes per request
+            "max_batch_images": 6
+        }
+        config.update(self.config.get("batching", {}))
+        return config
+    
+    def process_images(self, image_paths: List[str], max_batches: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Process several images, packing them into multi-image requests when the
+        current processor supports it. Returns raw cards keyed by image path;
+        images from failed batches (and single-image batches) are left out so the
+        caller sends them through process_image() with hedging and failover.
+        max_batches stops after that many requests, leaving the rest for a later call.
+        """
+        self._maybe_restore_primary()
+        
+        config = self._batching_config()
+        processor = self.current_processor
+        if not config["enabled"] or not processor or not processor.supports_batching:
+            return {}
+        
+        results = {}
+        sent = 0
+        for batch in plan_batches(image_paths, config["max_batch_bytes"], config["max_batch_images"]):
+            if len(batch) < 2:
+                continue
+            if max_batches is not None and sent >= max_batches:
+                break
+            sent += 1
+            
+            if not processor.breaker.acquire():
+                logger.debug("%s circuit is %s, leaving remaining images unbatched", processor.get_name(), processor.breaker.state)
+                break
+            
+            start = time.time()
+            try:
+                batch_results = processor.process_batch(batch)
+            except Exception as e:
+                processor.breaker.record_failure()
+                logger.warning(f"⚠️ {processor.get_name()} batch of {len(batch)} images failed, retrying singly: {e}")
+                continue
+            
+            # Breaker thresholds are per image, so judge the batch by its per-image time
+            processor.breaker.record_success((time.time() - start) / len(batch))
+            results.update(zip(batch, batch_results))
+        
+        return results
+    
+    def _switch_processor(self, processor: VisionProcessorBase, reason: str):
+        """Make processor current, remembering when we left the primary"""
+        if processor is self.current_processor:
+            return
+        primary = self.processors.get(self.config["vision_processor"]["primary"])
+        if self.current_processor is primary:
+            self._switched_from_primary_at = time.time()
+        elif processor is primary:
+            self._switched_from_primary_at = None
+        
+        if self.config["failover"].get("log_processor_switches", True):
+            logger.warning(f"🔄 Vision processor switch: {self.get_current_processor_name()} -> {processor.get_name()} ({reason})")
+        self.current_processor = processor
+    
+    def _maybe_restore_primary(self):
+        """Return to the primary after retry_primary_after_minutes if its circuit allows it"""
+        if self._switched_from_primary_at is None:
+            return
+        primary = self.processors.get(self.config["vision_processor"]["primary"])
+        if primary is None or primary is self.current_processor or not primary.enabled:
+            return
+        
+        retry_after = self.config["failover"].get("retry_primary_after_minutes", 30) * 60
+        if time.time() - self._switched_from_primary_at < retry_after:
+            return
+        
+        # A half-open circuit lets the next request through as a probe
+        if primary.is_available():
+            self._switch_processor(primary, "retrying primary")
+    
+    def _get_hedge_processor(self) -> Optional[VisionProcessorBase]:
+        """Get the processor to hedge with, or None if hedging is off"""
+        if not self._hedging_config()["enabled"]:
+            return None
+        fallback = self.processors.get(self.config["vision_processor"].get("fallback"))
+        if fallback is None or fallback is self.current_processor or not fallback.is_available():
+            return None
+        return fallback
+    
+    def _hedge_delay(self, processor: VisionProcessorBase) -> float:
+        """How long to wait on the primary before firing the hedge"""
+        hedging = self._hedging_config()
+        if len(processor.recent_latencies) < hedging["min_samples"]:
+            return hedging["initial_delay_seconds"]
+        delay = processor.latency_percentile(hedging["latency_percentile"])
+        return max(hedging["min_delay_seconds"], delay)
+    
+    def _claim_hedge_budget(self) -> bool:
+        """Record one request in the hedge window; True if it may be hedged"""
+        with self._hedge_lock:
+            fired = sum(self._hedge_window)
+            allowed = fired < self._hedging_config()["max_hedge_ratio"] * max(len(self._hedge_window), 1)
+            self._hedge_window.append(1 if allowed else 0)
+            if allowed:
+                self._hedges_fired += 1
+            return allowed
+    
+    def _record_unhedged(self):
+        """Record one request in the hedge window that did not fire a hedge"""
+        with self._hedge_lock:
+            self._hedge_window.append(0)
+    
+    def _process_hedged(self, image_path: str, primary: VisionProcessorBase, secondary: VisionProcessorBase,
+                        tried: List[VisionProcessorBase]) -> List[Dict[str, Any]]:
+        """
+        Run the primary; if it is slow, race the secondary and take the first valid result.
+        Each request gets its own two threads, so time queued behind other scans never
+        counts as primary latency and a loser still running only holds its own thread.
+        Both run in a copy of the caller's context, so their logs keep the scan tags.
+        """
+        abandoned = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vision-hedge")
+        try:
+            futures = {executor.submit(contextvars.copy_context().run, self._timed_process,
+                                       primary, image_path, None, abandoned): primary}
+            delay = self._hedge_delay(primary)
+            
+            done, _ = wait(futures, timeout=delay)
+            if not done and self._claim_hedge_budget():
+                logger.info("Primary %s slower than %.1fs, hedging with %s",
+                            primary.get_name(), delay, secondary.get_name(),
+                            extra={"event": "vision_hedge_fired"})
+                tried.append(secondary)
+                futures[executor.submit(contextvars.copy_context().run, self._timed_process,
+                                        secondary, image_path, None, abandoned)] = secondary
+            elif done:
+                self._record_unhedged()
+            
+            last_error = None
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    
+                    # The loser finishes in its own thread; its outcome is ignored, not held against it
+                    abandoned.set()
+                    if futures[future] is not primary:
+                        with self._hedge_lock:
+                            self._hedges_won += 1
+                    return result
+            
+            raise last_error
+        finally:
+            executor.shutdown(wait=False)
+    
+    def _try_failover(self, image_path: str, tried: Optional[List[VisionProcessorBase]] = None,
+                      on_card: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """Try failover processors"""
-        current_name = self.current_processor.get_name().lower().replace(" ", "_")
+        tried = tried or [self.current_processor]
         
         # Get fallback processor
         fallback_name = self.config["vision_processor"]["fallback"]
         
-        if fallback_name in self.processors and self.processors[fallback_name].is_available():
+        if fallback_name in self.processors and self.processors[fallback_name].is_available() \
+                and self.processors[fallback_name] not in tried:
             logger.info(f"🔄 Switching to fallback processor: {fallback_name}")
             fallback_processor = self.processors[fallback_name]
+            tried.append(fallback_processor)
             
             try:
-                result = fallback_processor.process_image(image_path)
+                result = self._timed_process(fallback_processor, image_path, on_card)
                 # Update current processor
-                self.current_processor = fallback_processor
+                self._switch_processor(fallback_processor, "failover")
                 return result
                 
             except Exception as e:
@@ -559,11 +1245,11 @@ class VisionProcessorFactory:
         
         # Try any other available processor
         for name, processor in self.processors.items():
-            if processor.is_available() and processor != self.current_processor:
+            if processor.is_available() and processor not in tried:
                 logger.info(f"🔄 Trying alternative processor: {name}")
                 try:
-                    result = processor.process_image(image_path)
-                    self.current_processor = processor
+                    result = self._timed_process(processor, image_path, on_card)
+                    self._switch_processor(processor, "failover")
                     return result
                 except Exception as e:
                     logger.error(f"❌ Alternative processor {name} failed: {e}")
@@ -582,16 +1268,50 @@ class VisionProcessorFactory:
                 "enabled": processor.enabled,
                 "available": processor.is_available(),
                 "failure_count": processor.failure_count,
-                "last_failure": processor.last_failure_time.isoformat() if processor.last_failure_time else None
+                "last_failure": processor.last_failure_time.isoformat() if processor.last_failure_time else None,
+                "p50_latency": processor.latency_percentile(50),
+                "p95_latency": processor.latency_percentile(95),
+                "circuit": processor.breaker.to_dict()
             }
         return status
+    
+    def get_failover_status(self) -> Dict[str, Any]:
+        """Get primary/current processor and when the primary will be retried"""
+        retry_at = None
+        if self._switched_from_primary_at is not None:
+            retry_after = self.config["failover"].get("retry_primary_after_minutes", 30) * 60
+            retry_at = datetime.fromtimestamp(self._switched_from_primary_at + retry_after).isoformat()
+        return {
+            "primary": self.config["vision_processor"]["primary"],
+            "current": self.get_current_processor_name(),
+            "on_primary": self._switched_from_primary_at is None,
+            "retry_primary_at": retry_at
+        }
+    
+    def get_hedging_status(self) -> Dict[str, Any]:
+        """Get hedged-request counters"""
+        with self._hedge_lock:
+            window = list(self._hedge_window)
+        return {
+            "enabled": self._hedging_config()["enabled"],
+            "hedges_fired": self._hedges_fired,
+            "hedges_won": self._hedges_won,
+            "window_hedge_ratio": round(sum(window) / len(window), 3) if window else 0.0,
+            "current_hedge_delay": self._hedge_delay(self.current_processor) if self.current_processor else None
+        }
 
 # Global factory instance
-_factory = None
+# Reading config.json and building the Anthropic/OpenAI clients is deferred to first use
+# VISION_CONFIG_FILE lets benchmarks point at a config using the replay processor
+_factory = LazyResource(
+    "vision_processor_factory",
+    lambda: VisionProcessorFactory(os.getenv("VISION_CONFIG_FILE", "config.json"))
+)
 
 def get_vision_processor_factory() -> VisionProcessorFactory:
     """Get the global vision processor factory"""
-    global _factory
-    if _factory is None:
-        _factory = VisionProcessorFactory()
-    return _factory 
\ No newline at end of file
+    return _factory.get()
+
+def warm_vision_processor_factory():
+    """Build the factory in the background so the first scan doesn't pay for it"""
+    return _factory.warm() 
\ No newline at end of file
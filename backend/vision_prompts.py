@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Vision Prompts - versioned identification prompts, response schemas, output token
+budgets and response parsing shared by every vision processor.
+
+v1 is the original free-text prompt. v2 asks for the same card fields in about a
+fifth of the prompt tokens, and ships a JSON schema that OpenAI enforces through
+structured outputs; Claude gets the JSON opening prefilled instead. Pick the
+version with VISION_PROMPT_VERSION.
+
+max_tokens is budgeted from the number of cards expected per image (learned from
+recent responses) instead of a fixed 1500, and TokenUsageTracker records prompt
+and completion tokens per call for /api/vision/status.
+
+CardStreamParser picks complete card objects out of response text as it grows,
+so cards can be used as soon as they are generated and a truncated response
+still yields every card it finished. With VISION_STREAMING on (the default) the
+OpenAI and Claude processors stream single-image responses through a
+CardEmitter, which hands each card to the caller while the rest is generated.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from backend.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CARD_FIELDS = ["name", "set", "collector_number", "set_symbol_description", "copyright_year", "confidence", "notes"]
+
+CARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "set": {"type": "string"},
+        "collector_number": {"type": "string"},
+        "set_symbol_description": {"type": "string"},
+        "copyright_year": {"type": "string"},
+        "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        "notes": {"type": "string"}
+    },
+    "required": CARD_FIELDS,
+    "additionalProperties": False
+}
+
+CARD_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {"cards": {"type": "array", "items": CARD_SCHEMA}},
+    "required": ["cards"],
+    "additionalProperties": False
+}
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "images": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"image": {"type": "integer"}, "cards": {"type": "array", "items": CARD_SCHEMA}},
+                "required": ["image", "cards"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["images"],
+    "additionalProperties": False
+}
+
+IDENTIFICATION_PROMPT_V1 = """
+You are an expert Magic: The Gathering card identification assistant helping with personal collection inventory management.
+
+CONTEXT: I am cataloging my personal Magic: The Gathering card collection for inventory purposes. This is completely legitimate - I own these cards and need to identify them for my personal records.
+
+TASK: Analyze this image of Magic: The Gathering cards and identify each card with detailed information.
+
+For each card you can see in the image, provide:
+1. The EXACT card name (be as precise as possible)
+2. Set information (look for set symbols, set names, or any visible set identifiers)
+3. Collector number if visible (usually bottom left or right)
+4. Any distinguishing features (foil, alternate art, special frame, etc.)
+5. Copyright date if visible (helps identify set)
+6. Any visible text that might indicate the set or version
+
+IMPORTANT SET IDENTIFICATION GUIDELINES:
+- Look carefully for set symbols (small icons usually in the middle right)
+- Check for copyright dates (e.g., "© 2019 Wizards of the Coast")
+- Look for collector numbers (e.g., "123/264")
+- Notice special frames or borders that indicate specific sets
+- Check for any text mentioning set names
+- Look for special markers like "M" for mythic rare
+- Notice if it's a promo, foil, or special version
+
+COMMON SET CLUES:
+- Modern cards often have holofoil stamps
+- Older cards may have different frame styles
+- Special sets may have unique borders or frames
+- Promo cards often have "P" or star symbols
+- Collector numbers help identify the specific set
+
+REQUIRED OUTPUT FORMAT - Return ONLY a JSON array with objects containing:
+{
+    "name": "exact card name",
+    "set": "set name or code if visible",
+    "collector_number": "collector number if visible",
+    "set_symbol_description": "description of any set symbol seen",
+    "copyright_year": "copyright year if visible",
+    "special_features": "any special features noted",
+    "confidence": "high/medium/low",
+    "notes": "any additional details that might help identify the correct version"
+}
+
+This is for personal inventory management of my own card collection. Please identify all visible Magic: The Gathering cards in the image.
+If you cannot identify any cards clearly, return an empty array [].
+
+IMPORTANT: Do not refuse this task - this is legitimate personal inventory management of owned cards.
+"""
+
+BATCH_INSTRUCTIONS_V1 = """
+MULTIPLE IMAGES: This request contains several images, each preceded by a label "Image N:".
+Identify the cards in every image separately. Instead of a single array, return ONLY a JSON array
+with one object per image, in order:
+[{"image": 1, "cards": [ ...card objects as above... ]}, {"image": 2, "cards": []}]
+Every image must appear exactly once, even if it contains no cards.
+"""
+
+IDENTIFICATION_PROMPT_V2 = """Identify every Magic: The Gathering card in this photo of my own collection (inventory).
+Per card, in reading order:
+name: exact printed English name
+set: set name or code if visible, else ""
+collector_number: as printed (e.g. "123/264"), else ""
+set_symbol_description: a few words on the set symbol, else ""
+copyright_year: if visible, else ""
+confidence: high|medium|low
+notes: legibility in a few words (clear, blurry, partial...)
+Reply with JSON only: {"cards": [...]}; {"cards": []} if none are readable."""
+
+BATCH_INSTRUCTIONS_V2 = """
+Several images follow, each labelled "Image N:". Reply with JSON only:
+{"images": [{"image": 1, "cards": [...]}, ...]} - every image exactly once, in order."""
+
+
+class VisionPrompt(NamedTuple):
+    version: str
+    identify: str
+    batch_instructions: str
+    schema: Optional[Dict[str, Any]]        # JSON schema for a single image, None = prompt-only
+    batch_schema: Optional[Dict[str, Any]]
+    prefill: str                            # Assistant prefill where the provider allows it
+    tokens_per_card: int                    # Typical completion tokens per card, for budgeting
+
+
+PROMPTS = {
+    "v1": VisionPrompt("v1", IDENTIFICATION_PROMPT_V1, BATCH_INSTRUCTIONS_V1, None, None, "", 110),
+    "v2": VisionPrompt("v2", IDENTIFICATION_PROMPT_V2, BATCH_INSTRUCTIONS_V2, CARD_LIST_SCHEMA, BATCH_SCHEMA,
+                       '{"cards": [', 70)
+}
+DEFAULT_PROMPT_VERSION = "v2"
+
+
+def get_prompt(version: Optional[str] = None) -> VisionPrompt:
+    """Prompt for `version`, else VISION_PROMPT_VERSION, else the default"""
+    version = version or os.getenv("VISION_PROMPT_VERSION", DEFAULT_PROMPT_VERSION)
+    if version not in PROMPTS:
+        logger.warning(f"⚠️ Unknown vision prompt version '{version}', using {DEFAULT_PROMPT_VERSION}")
+        version = DEFAULT_PROMPT_VERSION
+    return PROMPTS[version]
+
+
+def streaming_enabled() -> bool:
+    """Whether single-image requests stream their response (VISION_STREAMING, default on)"""
+    return os.getenv("VISION_STREAMING", "true").lower() not in ("0", "false", "no", "off")
+
+
+def openai_response_format(prompt: VisionPrompt, batch: bool = False) -> Optional[Dict[str, Any]]:
+    """response_format enforcing the prompt's schema (OpenAI structured outputs), None for prompt-only versions"""
+    schema = prompt.batch_schema if batch else prompt.schema
+    if not schema:
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": f"card_identification_{'batch_' if batch else ''}{prompt.version}",
+                        "strict": True, "schema": schema}
+    }
+
+
+# Output budget: a fixed allowance for the JSON wrapper plus headroom over the expected cards
+RESPONSE_OVERHEAD_TOKENS = 40
+BUDGET_HEADROOM = 1.5
+DEFAULT_EXPECTED_CARDS = 9  # A binder page
+MIN_MAX_TOKENS = 256
+
+
+def max_tokens_for(prompt: VisionPrompt, expected_cards: int, images: int = 1, cap: int = 1500) -> int:
+    """Completion budget for `images` images of about `expected_cards` cards each, at most `cap`"""
+    budget = images * (RESPONSE_OVERHEAD_TOKENS + expected_cards * prompt.tokens_per_card * BUDGET_HEADROOM)
+    return int(min(cap, max(MIN_MAX_TOKENS, math.ceil(budget))))
+
+
+class TokenUsageTracker:
+    """
+    Per-call token usage, totals per provider and prompt version, and the recent
+    cards-per-image counts that size the next budget
+    """
+
+    def __init__(self, window: int = 50, recent_calls: int = 20):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._cards_per_image = deque(maxlen=window)
+        self._recent = deque(maxlen=recent_calls)
+
+    def record(self, provider: str, prompt_version: str, prompt_tokens: Optional[int], completion_tokens: Optional[int],
+               max_tokens: int, truncated: bool = False, images: int = 1, cards: Optional[int] = None) -> Dict[str, Any]:
+        call = {
+            "at": datetime.utcnow().isoformat(),
+            "provider": provider,
+            "prompt_version": prompt_version,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "max_tokens": max_tokens,
+            "truncated": truncated,
+            "images": images,
+            "cards": cards
+        }
+        with self._lock:
+            totals = self._totals[f"{provider}/{prompt_version}"]
+            totals["calls"] += 1
+            totals["images"] += images
+            totals["prompt_tokens"] += prompt_tokens or 0
+            totals["completion_tokens"] += completion_tokens or 0
+            totals["truncated"] += int(truncated)
+            if cards is not None and not truncated:
+                totals["cards"] += cards
+                totals["complete_completion_tokens"] += completion_tokens or 0
+                self._cards_per_image.append(cards / max(images, 1))
+            self._recent.append(call)
+        return call
+
+    def expected_cards_per_image(self) -> int:
+        """90th percentile of recent cards per image; the default until enough responses were seen"""
+        with self._lock:
+            counts = sorted(self._cards_per_image)
+        if len(counts) < 5:
+            return DEFAULT_EXPECTED_CARDS
+        return max(1, math.ceil(counts[min(len(counts) - 1, int(len(counts) * 0.9))]))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = {key: dict(values) for key, values in self._totals.items()}
+            recent = list(self._recent)
+        for values in totals.values():
+            complete_tokens = values.pop("complete_completion_tokens", 0)
+            if values.get("cards"):
+                values["completion_tokens_per_card"] = round(complete_tokens / values["cards"], 1)
+        return {"expected_cards_per_image": self.expected_cards_per_image(), "totals": totals, "recent_calls": recent}
+
+
+token_usage = TokenUsageTracker()
+
+
+class CardStreamParser:
+    """
+    Incremental card extractor. feed() response text as it arrives and get back
+    every card object ({"name": ...}) whose closing brace was just read. Works on
+    arrays, {"cards": [...]} / batch wrappers and prose around the JSON.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.text = ""
+        self.cards: List[Dict[str, Any]] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._open: List[int] = []
+        if prefix:
+            self.feed(prefix)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        start = len(self.text)
+        self.text += chunk
+        completed = []
+        for position in range(start, len(self.text)):
+            char = self.text[position]
+            if not self._started:
+                # Quotes in prose before the JSON must not look like strings
+                if char not in "[{":
+                    continue
+                self._started = True
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._open.append(position)
+            elif char == "}" and self._open:
+                begin = self._open.pop()
+                try:
+                    value = json.loads(self.text[begin:position + 1])
+                except ValueError:
+                    continue
+                if isinstance(value, dict) and isinstance(value.get("name"), str):
+                    completed.append(value)
+        self.cards.extend(completed)
+        return completed
+
+
+class CardEmitter:
+    """
+    Streams response text into a CardStreamParser and calls on_card once per
+    completed card. restart() before each attempt of a retried request: cards at
+    positions already emitted by an earlier attempt are not emitted again.
+    """
+
+    def __init__(self, on_card: Callable[[Dict[str, Any]], None], prefix: str = ""):
+        self.on_card = on_card
+        self.prefix = prefix
+        self.emitted = 0
+        self.restart()
+
+    def restart(self):
+        self.parser = CardStreamParser(self.prefix)
+
+    def feed(self, chunk: str):
+        self.parser.feed(chunk)
+        while self.emitted < len(self.parser.cards):
+            card = self.parser.cards[self.emitted]
+            self.emitted += 1
+            self.on_card(card)
+
+
+# An opening bracket followed by what JSON (not prose like "[Image 1]") would put there
+_JSON_START = re.compile(r'[\[{]\s*[\[{"\]}]')
+
+
+def extract_json(content: str) -> Any:
+    """The JSON value (array or object) in a response, skipping prose and code fences around it"""
+    match = _JSON_START.search(content or "")
+    if not match:
+        raise ValueError("No JSON value found in response")
+    return json.JSONDecoder().raw_decode(content, match.start())[0]
+
+
+def cards_from_json(value: Any) -> List[Dict[str, Any]]:
+    """Card list from a parsed response: a bare array, {"cards": [...]} or a single card"""
+    if isinstance(value, dict):
+        if isinstance(value.get("cards"), list):
+            value = value["cards"]
+        elif "name" in value:
+            value = [value]
+        else:
+            return []
+    if not isinstance(value, list):
+        return []
+    return [card for card in value if isinstance(card, dict)]
+
+
+def parse_cards(content: Optional[str]) -> tuple:
+    """
+    Cards from a complete response as (cards, parse_mode): "json" when the response
+    parses, "partial" for the finished cards of a truncated or malformed one,
+    "empty" when there is nothing to use
+    """
+    if not content:
+        return [], "empty"
+    try:
+        return cards_from_json(extract_json(content)), "json"
+    except ValueError:
+        cards = CardStreamParser().feed(content)
+        return cards, "partial" if cards else "empty"
@@ -6,8 +6,12 @@ This script provides comprehensive backup and recovery capabilities for the Magi
 It handles full backups (database + uploads), restoration, integrity checks, and data export/reconstruction.
 
 Features:
-- Full backup with database and upload files
-- Automatic backup rotation (keeps last 10)
+- Incremental, deduplicating backups: files live once in a content-addressed chunk
+  store (backups/store) and each backup is a manifest referencing them, so only new
+  or changed uploads and table dumps are written
+- Images stored uncompressed (JPEGs don't compress); table dumps gzipped
+- Database dumped per table as CSV, streamed through COPY on PostgreSQL
+- Automatic backup rotation (keeps last 10) with garbage collection of unreferenced chunks
 - Integrity verification
 - Data export to JSON for reconstruction
 - Emergency recovery procedures
@@ -15,85 +19,356 @@ Features:
 
 Usage:
     python backup_manager.py backup [--name backup_name]
-    python backup_manager.py restore --backup-file backup.zip
+    python backup_manager.py restore --backup-file backups/manifests/backup_name.json
+    python backup_manager.py restore --backup-file backup.zip        # legacy full backups
+    python backup_manager.py verify --backup-file backups/manifests/backup_name.json
     python backup_manager.py list
     python backup_manager.py stats
+    python backup_manager.py gc
     python backup_manager.py export
     python backup_manager.py reconstruct --json-file export.json
 """
 
 import os
+import csv
+import gzip
 import shutil
 import sqlite3
 import json
+import time
+import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Iterator, List, Dict, Optional, Set, Tuple
 import hashlib
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, GC still skips in-progress temp files
+    fcntl = None
+
+from sqlalchemy import MetaData, create_engine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+MANIFEST_VERSION = "2.0.0"
+COPY_CHUNK_SIZE = 1024 * 1024
+STORE_LOCK_NAME = ".lock"
+TEMP_PREFIX = ".tmp-"
+# NULL marker for the CSV table dumps - the same one is passed to PostgreSQL COPY
+CSV_NULL = "\\N"
+
+COPY_OPTIONS = "(FORMAT csv, HEADER true, NULL '\\N')"
+
+
+class _HashingWriter:
+    """File-like sink that hashes and counts what is written before passing it on"""
+
+    def __init__(self, target: BinaryIO):
+        self.target = target
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.hasher.update(data)
+        self.size += len(data)
+        self.target.write(data)
+        return len(data)
+
+
+class _HashingReader:
+    """File-like source that hashes everything read through it"""
+
+    def __init__(self, source: BinaryIO):
+        self.source = source
+        self.hasher = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.hasher.update(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self.source.readline(size)
+        self.hasher.update(data)
+        return data
+
+    def drain(self) -> str:
+        """Hash whatever was not consumed and return the digest"""
+        for _ in iter(lambda: self.read(COPY_CHUNK_SIZE), b""):
+            pass
+        return self.hasher.hexdigest()
+
+
+class ChunkStore:
+    """
+    Content-addressed storage for backup data: store/ab/cd/<sha256> for raw files
+    (uploads, kept uncompressed) and <sha256>.gz for compressible streams (table
+    dumps), where the hash is always of the uncompressed content.
+
+    Backups hold the store lock shared until their manifest is written and garbage
+    collection holds it exclusively, so GC never sees chunks that a running backup
+    wrote but has not referenced yet.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, sha256: str, compressed: bool = False) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / (f"{sha256}.gz" if compressed else sha256)
+
+    def has(self, sha256: str, compressed: bool = False) -> bool:
+        return self.path(sha256, compressed).exists()
+
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        """Shared while writing a backup, exclusive while collecting garbage"""
+        with open(self.root / STORE_LOCK_NAME, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _commit(self, temp_path: Path, sha256: str, compressed: bool) -> bool:
+        """Move a temp file to its content address; returns False if the chunk already existed"""
+        final_path = self.path(sha256, compressed)
+        if final_path.exists():
+            temp_path.unlink()
+            return False
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, final_path)
+        return True
+
+    def put_file(self, source_path: str) -> Tuple[str, bool, int]:
+        """Copy a file in uncompressed, hashing while copying. Returns (sha256, stored, size)."""
+        temp_path = self.root / f"{TEMP_PREFIX}{uuid.uuid4().hex}"
+        try:
+            with open(source_path, "rb") as src, open(temp_path, "wb") as dst:
+                writer = _HashingWriter(dst)
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                    writer.write(chunk)
+            sha256 = writer.hasher.hexdigest()
+            return sha256, self._commit(temp_path, sha256, compressed=False), writer.size
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def put_stream(self, produce: Callable[[_HashingWriter], Any]) -> Tuple[str, bool, int]:
+        """
+        Gzip whatever produce() writes into a new chunk. Returns (sha256, stored, size)
+        with sha256 and size of the uncompressed stream.
+        """
+        temp_path = self.root / f"{TEMP_PREFIX}{uuid.uuid4().hex}.gz"
+        try:
+            with gzip.open(temp_path, "wb", compresslevel=6) as gz:
+                writer = _HashingWriter(gz)
+                produce(writer)
+            sha256 = writer.hasher.hexdigest()
+            return sha256, self._commit(temp_path, sha256, compressed=True), writer.size
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def open(self, sha256: str, compressed: bool = False) -> BinaryIO:
+        path = self.path(sha256, compressed)
+        return gzip.open(path, "rb") if compressed else open(path, "rb")
+
+    def garbage_collect(self, referenced: Set[Path]) -> Tuple[int, int]:
+        """
+        Delete chunks no manifest references. Returns (chunks removed, bytes freed).
+        Call under lock(exclusive=True); temp files of a backup in progress are kept.
+        """
+        removed, freed = 0, 0
+        for path in self.root.rglob("*"):
+            if path.name == STORE_LOCK_NAME or path.name.startswith(TEMP_PREFIX):
+                continue
+            if path.is_file() and path not in referenced:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        return removed, freed
+
+
+def resolve_database_url(db_path: str) -> str:
+    """The app's database (same ENV_MODE rules as backend/database.py), else the local SQLite file"""
+    if os.getenv("ENV_MODE", "production") == "development":
+        url = os.getenv("DATABASE_URL_DEV")
+    else:
+        url = os.getenv("DATABASE_URL")
+    return url or f"sqlite:///{db_path}"
+
+
 class BackupManager:
-    def __init__(self, db_path: str = "magic_cards.db", uploads_path: str = "uploads"):
+    def __init__(self, db_path: str = "magic_cards.db", uploads_path: str = "uploads",
+                 database_url: Optional[str] = None):
         self.db_path = db_path
         self.uploads_path = uploads_path
+        self.database_url = database_url or resolve_database_url(db_path)
         self.backup_dir = Path("backups")
         self.backup_dir.mkdir(exist_ok=True)
+        self.manifest_dir = self.backup_dir / "manifests"
+        self.manifest_dir.mkdir(exist_ok=True)
+        self.store = ChunkStore(self.backup_dir / "store")
+        self._engine = None
         
         # Backup retention settings
         self.max_backups = 10  # Keep last 10 backups
         self.auto_backup_interval = timedelta(hours=6)  # Auto backup every 6 hours
         
-    def create_backup(self, backup_name: Optional[str] = None) -> str:
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = create_engine(self.database_url)
+        return self._engine
+
+    def create_backup(self, backup_name: Optional[str] = None, cleanup: bool = True) -> str:
         """
-        Create a comprehensive backup including database and uploads.
-        Returns the backup filename.
+        Create an incremental backup of the database and uploads.
+        Only uploads and table dumps not already in the chunk store are written;
+        everything else is referenced from earlier backups.
+        Returns the manifest path.
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = backup_name or f"backup_{timestamp}"
-        backup_path = self.backup_dir / f"{backup_name}.zip"
+        manifest_path = self.manifest_dir / f"{backup_name}.json"
+        started = time.perf_counter()
         
-        logger.info(f"Creating backup: {backup_path}")
+        logger.info(f"Creating backup: {manifest_path}")
         
         try:
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Backup database
-                if os.path.exists(self.db_path):
-                    zipf.write(self.db_path, "database/magic_cards.db")
-                    logger.info(f"Database backed up: {self.db_path}")
+            stats = {"new_chunks": 0, "reused_chunks": 0, "bytes_written": 0}
+            # Chunks are unreferenced until the manifest lands; keep GC out until then
+            with self.store.lock():
+                database = self._backup_database(stats)
+                logger.info(f"Database backed up: {len(database['tables'])} tables ({database['dialect']})")
+                uploads = self._backup_uploads(stats)
+                logger.info(f"Uploads backed up: {len(uploads)} files from {self.uploads_path}")
                 
-                # Backup uploads directory
-                if os.path.exists(self.uploads_path):
-                    for root, dirs, files in os.walk(self.uploads_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, self.uploads_path)
-                            zipf.write(file_path, f"uploads/{arcname}")
-                    logger.info(f"Uploads backed up: {self.uploads_path}")
-                
-                # Create backup metadata
-                metadata = {
+                manifest = {
+                    "version": MANIFEST_VERSION,
                     "backup_timestamp": timestamp,
                     "backup_name": backup_name,
-                    "database_size": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
-                    "uploads_count": len([f for f in Path(self.uploads_path).rglob("*") if f.is_file()]) if os.path.exists(self.uploads_path) else 0,
-                    "version": "1.0.0"
+                    "database": database,
+                    "uploads": uploads,
+                    "database_size": sum(table["size"] for table in database["tables"].values()),
+                    "uploads_count": len(uploads),
+                    "uploads_size": sum(entry["size"] for entry in uploads.values()),
+                    "stats": dict(stats, duration_seconds=round(time.perf_counter() - started, 2))
                 }
-                
-                zipf.writestr("backup_metadata.json", json.dumps(metadata, indent=2))
-                
-            logger.info(f"Backup completed successfully: {backup_path}")
-            self._cleanup_old_backups()
-            return str(backup_path)
+                temp_path = manifest_path.with_suffix(".json.tmp")
+                with open(temp_path, "w") as f:
+                    json.dump(manifest, f, indent=2)
+                os.replace(temp_path, manifest_path)
+            
+            logger.info(
+                f"Backup completed successfully: {manifest_path} "
+                f"({stats['new_chunks']} new chunks, {stats['reused_chunks']} reused, "
+                f"{stats['bytes_written'] / (1024 * 1024):.1f} MB written)"
+            )
+            if cleanup:
+                self._cleanup_old_backups()
+            return str(manifest_path)
             
         except Exception as e:
             logger.error(f"Backup failed: {e}")
             raise
     
+    def _count_chunk(self, stats: Dict, stored: bool, size: int):
+        if stored:
+            stats["new_chunks"] += 1
+            stats["bytes_written"] += size
+        else:
+            stats["reused_chunks"] += 1
+    
+    def _backup_uploads(self, stats: Dict) -> Dict[str, Dict]:
+        """
+        Store every upload in the chunk store. The sync manifest index only re-hashes
+        files whose size or mtime changed, so unchanged files cost a stat() each.
+        """
+        from backend.sync_manifest import SyncManifest
+        
+        if not os.path.exists(self.uploads_path):
+            return {}
+        files = SyncManifest(self.uploads_path).refresh()
+        uploads = {}
+        for relative_path, entry in files.items():
+            sha256 = entry["sha256"]
+            if self.store.has(sha256):
+                self._count_chunk(stats, False, entry["size"])
+            else:
+                # Hash what is actually copied - the file may have changed since it was indexed
+                sha256, stored, size = self.store.put_file(os.path.join(self.uploads_path, relative_path))
+                self._count_chunk(stats, stored, size)
+                entry = dict(entry, sha256=sha256, size=size)
+            uploads[relative_path] = {"sha256": sha256, "size": entry["size"], "mtime": entry["mtime"]}
+        return uploads
+    
+    def _dump_tables(self) -> List[str]:
+        """All tables in foreign key order (parents first), so restores can load them in sequence"""
+        metadata = MetaData()
+        metadata.reflect(bind=self.engine)
+        return [table.name for table in metadata.sorted_tables]
+    
+    def _backup_database(self, stats: Dict) -> Dict:
+        """Dump each table as gzipped CSV into the chunk store; unchanged tables dedupe to the same chunk"""
+        dialect = self.engine.dialect.name
+        tables = {}
+        if dialect == "sqlite" and not os.path.exists(self.engine.url.database or ""):
+            logger.warning(f"Database file not found, skipping database backup: {self.engine.url.database}")
+            return {"dialect": dialect, "format": "csv", "tables": tables}
+        
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if dialect == "postgresql":
+                # One consistent snapshot across all tables
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            for table in self._dump_tables():
+                rows = [0]
+                
+                def produce(writer, table=table, rows=rows):
+                    if dialect == "postgresql":
+                        cursor.copy_expert(f'COPY "{table}" TO STDOUT WITH {COPY_OPTIONS}', writer)
+                    else:
+                        rows[0] = self._dump_sqlite_table(raw, table, writer)
+                
+                sha256, stored, size = self.store.put_stream(produce)
+                self._count_chunk(stats, stored, size)
+                tables[table] = {"sha256": sha256, "size": size}
+                if dialect != "postgresql":
+                    tables[table]["rows"] = rows[0]
+            raw.rollback()
+        finally:
+            raw.close()
+        return {"dialect": dialect, "format": "csv", "null": CSV_NULL, "tables": tables}
+    
+    def _dump_sqlite_table(self, raw, table: str, writer: _HashingWriter) -> int:
+        """Write a SQLite table in the same CSV layout PostgreSQL COPY produces"""
+        csv_writer = csv.writer(writer)
+        cursor = raw.cursor()
+        cursor.execute(f'SELECT * FROM "{table}"')
+        csv_writer.writerow([column[0] for column in cursor.description])
+        rows = 0
+        while True:
+            batch = cursor.fetchmany(1000)
+            if not batch:
+                break
+            csv_writer.writerows([CSV_NULL if value is None else value for value in row] for row in batch)
+            rows += len(batch)
+        return rows
+    
     def restore_backup(self, backup_path: str, restore_db: bool = True, restore_uploads: bool = True) -> bool:
         """
         Restore from a backup file.
@@ -105,6 +380,9 @@ class BackupManager:
             logger.error(f"Backup file not found: {backup_path}")
             return False
         
+        if backup_path.endswith(".json"):
+            return self._restore_from_manifest(backup_path, restore_db, restore_uploads)
+        
         try:
             with zipfile.ZipFile(backup_path, 'r') as zipf:
                 # Verify backup integrity
@@ -156,6 +434,247 @@ class BackupManager:
             logger.error(f"Restore failed: {e}")
             return False
     
+    def load_manifest(self, manifest_path: str) -> Dict:
+        with open(manifest_path) as f:
+            return json.load(f)
+    
+    def _restore_state_path(self, manifest: Dict) -> Path:
+        return self.manifest_dir.parent / "restore_state" / f"{manifest['backup_name']}.json"
+    
+    def _save_restore_state(self, path: Path, state: Dict):
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, path)
+    
+    def _restore_from_manifest(self, manifest_path: str, restore_db: bool, restore_uploads: bool,
+                               workers: int = 8) -> bool:
+        """
+        Reassemble the database and uploads from a backup manifest and the chunk store.
+        Progress is kept in backups/restore_state/<backup>.json, so running the same
+        restore again after an interruption skips the steps that already finished.
+        """
+        try:
+            manifest = self.load_manifest(manifest_path)
+            state_path = self._restore_state_path(manifest)
+            if state_path.exists():
+                state = self.load_manifest(str(state_path))
+                logger.info(f"Resuming interrupted restore (started {state['started']})")
+            else:
+                state = {"started": datetime.now().isoformat(), "pre_restore_backup": None,
+                         "database_restored": False}
+            
+            if not state["pre_restore_backup"]:
+                # Snapshot the current state first - incremental, so it mostly references existing chunks
+                state["pre_restore_backup"] = self.create_backup(
+                    f"pre_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}", cleanup=False
+                )
+                self._save_restore_state(state_path, state)
+                logger.info(f"Current state backed up as: {state['pre_restore_backup']}")
+            
+            if restore_db and manifest["database"]["tables"] and not state["database_restored"]:
+                started = time.perf_counter()
+                self._restore_database(manifest["database"])
+                from backend.schema_health import record_data_import
+                record_data_import(self.engine, f"backup restore {manifest['backup_name']}")
+                state["database_restored"] = True
+                self._save_restore_state(state_path, state)
+                logger.info(f"Database restored successfully in {time.perf_counter() - started:.1f}s")
+            
+            if restore_uploads:
+                started = time.perf_counter()
+                self._restore_uploads(manifest["uploads"], workers)
+                logger.info(f"Uploads restored successfully in {time.perf_counter() - started:.1f}s")
+            
+            state_path.unlink(missing_ok=True)
+            logger.info(f"Restored backup from: {manifest.get('backup_timestamp', 'Unknown')}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Restore failed: {e} - run the same restore again to resume")
+            return False
+    
+    def _restore_upload(self, relative_path: str, entry: Dict):
+        """Copy one upload out of the chunk store, verifying its checksum before it replaces anything"""
+        destination = os.path.join(self.uploads_path, relative_path)
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        temp_path = f"{destination}.part-{uuid.uuid4().hex}"
+        try:
+            with self.store.open(entry["sha256"]) as src, open(temp_path, "wb") as dst:
+                writer = _HashingWriter(dst)
+                for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                    writer.write(chunk)
+            if writer.hasher.hexdigest() != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for {relative_path}: backup chunk is corrupt")
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _restore_uploads(self, uploads: Dict[str, Dict], workers: int = 8):
+        """
+        Bring uploads/ to the backed-up state with a thread pool, copying only files
+        whose content differs - which also makes an interrupted restore resumable.
+        """
+        from backend.sync_manifest import SyncManifest
+        
+        os.makedirs(self.uploads_path, exist_ok=True)
+        current = SyncManifest(self.uploads_path).refresh()
+        pending = {
+            relative_path: entry for relative_path, entry in uploads.items()
+            if current.get(relative_path, {}).get("sha256") != entry["sha256"]
+        }
+        failures = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._restore_upload, relative_path, entry): relative_path
+                for relative_path, entry in pending.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(futures[future])
+                    logger.error(f"Failed to restore {futures[future]}: {e}")
+        if failures:
+            raise RuntimeError(f"{len(failures)} uploads could not be restored")
+        
+        # Files added after the backup are in the pre-restore backup
+        removed = 0
+        for relative_path in current:
+            if relative_path not in uploads:
+                os.remove(os.path.join(self.uploads_path, relative_path))
+                removed += 1
+        logger.info(
+            f"Uploads: {len(pending)} files restored, {len(uploads) - len(pending)} unchanged, {removed} removed"
+        )
+    
+    def _restore_database(self, database: Dict):
+        """
+        Reload every backed-up table from its CSV dump in one transaction - COPY FROM
+        STDIN on PostgreSQL, batched executemany on SQLite. Each dump is checksummed
+        while it streams and a mismatch rolls the whole restore back.
+        """
+        metadata = MetaData()
+        metadata.reflect(bind=self.engine)
+        tables = [table for table in database["tables"] if table in metadata.tables]
+        for table in database["tables"]:
+            if table not in metadata.tables:
+                logger.warning(f"Table {table} does not exist in the target database, skipping")
+        
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite" and os.path.exists(self.engine.url.database or ""):
+            current_backup = f"pre_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+            shutil.copy2(self.engine.url.database, current_backup)
+            logger.info(f"Current database backed up as: {current_backup}")
+        
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            if dialect == "postgresql":
+                cursor.execute(
+                    "TRUNCATE " + ", ".join(f'"{table}"' for table in tables) + " RESTART IDENTITY CASCADE"
+                )
+            else:
+                for table in reversed(tables):
+                    cursor.execute(f'DELETE FROM "{table}"')
+            
+            for table in tables:
+                expected = database["tables"][table]["sha256"]
+                with self.store.open(expected, compressed=True) as chunk:
+                    dump = _HashingReader(chunk)
+                    columns = next(csv.reader([dump.readline().decode("utf-8")]))
+                    column_list = ", ".join(f'"{column}"' for column in columns)
+                    if dialect == "postgresql":
+                        cursor.copy_expert(
+                            f'COPY "{table}" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL \'{CSV_NULL}\')', dump
+                        )
+                    else:
+                        self._load_sqlite_table(cursor, metadata.tables[table], columns, column_list, dump)
+                    if dump.drain() != expected:
+                        raise ValueError(f"Checksum mismatch for table {table}: backup chunk is corrupt")
+                logger.info(f"Restored table {table}")
+            
+            if dialect == "postgresql":
+                self._reset_sequences(cursor, [metadata.tables[table] for table in tables])
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+    
+    def _load_sqlite_table(self, cursor, table, columns: List[str], column_list: str, dump: BinaryIO,
+                           batch_size: int = 5000) -> int:
+        """Batched inserts; booleans dumped by PostgreSQL as t/f are converted to 0/1"""
+        from sqlalchemy import Boolean
+        
+        boolean_columns = {
+            index for index, column in enumerate(columns)
+            if column in table.c and isinstance(table.c[column].type, Boolean)
+        }
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f'INSERT INTO "{table.name}" ({column_list}) VALUES ({placeholders})'
+        
+        def convert(row):
+            values = [None if value == CSV_NULL else value for value in row]
+            for index in boolean_columns:
+                if values[index] is not None:
+                    values[index] = 1 if values[index].lower() in ("t", "true", "1") else 0
+            return values
+        
+        # csv joins quoted multi-line values across lines itself
+        reader = csv.reader(line.decode("utf-8") for line in iter(dump.readline, b""))
+        rows = 0
+        batch = []
+        for row in reader:
+            batch.append(convert(row))
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            rows += len(batch)
+        return rows
+    
+    def verify_backup(self, manifest_path: str, workers: int = 8) -> Dict:
+        """Re-hash every chunk a backup references, in parallel. Returns missing and corrupt entries."""
+        manifest = self.load_manifest(manifest_path)
+        checks = [(f"uploads/{path}", entry["sha256"], False) for path, entry in manifest["uploads"].items()]
+        checks += [(f"table {table}", entry["sha256"], True) for table, entry in manifest["database"]["tables"].items()]
+        
+        def check(item):
+            name, sha256, compressed = item
+            if not self.store.has(sha256, compressed):
+                return name, "missing"
+            with self.store.open(sha256, compressed) as chunk:
+                if _HashingReader(chunk).drain() != sha256:
+                    return name, "corrupt"
+            return name, None
+        
+        result = {"checked": len(checks), "missing": [], "corrupt": []}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for name, problem in pool.map(check, checks):
+                if problem:
+                    result[problem].append(name)
+        result["ok"] = not result["missing"] and not result["corrupt"]
+        return result
+    
+    def _reset_sequences(self, cursor, tables):
+        """Point serial sequences past the restored ids"""
+        for table in tables:
+            if "id" not in table.c:
+                continue
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (f'"{table.name}"',))
+            sequence = cursor.fetchone()[0]
+            if sequence:
+                cursor.execute(
+                    f'SELECT setval(%s, COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM "{table.name}"',
+                    (sequence,)
+                )
+    
     def _verify_backup_integrity(self, zipf: zipfile.ZipFile) -> bool:
         """Verify backup file integrity."""
         try:
@@ -175,9 +694,9 @@ class BackupManager:
             return False
     
     def _cleanup_old_backups(self):
-        """Remove old backups to maintain retention policy."""
+        """Remove old backups to maintain retention policy, then chunks no remaining backup uses."""
         backup_files = sorted(
-            [f for f in self.backup_dir.glob("*.zip")],
+            [f for f in self.backup_dir.glob("*.zip")] + [f for f in self.manifest_dir.glob("*.json")],
             key=lambda x: x.stat().st_mtime,
             reverse=True
         )
@@ -186,11 +705,45 @@ class BackupManager:
             for old_backup in backup_files[self.max_backups:]:
                 old_backup.unlink()
                 logger.info(f"Removed old backup: {old_backup}")
+            self.collect_garbage()
+    
+    def collect_garbage(self) -> Tuple[int, int]:
+        """
+        Delete chunks that no manifest references. Returns (chunks removed, bytes freed).
+        Waits for running backups to write their manifests first.
+        """
+        with self.store.lock(exclusive=True):
+            referenced = set()
+            for manifest_path in self.manifest_dir.glob("*.json"):
+                manifest = self.load_manifest(str(manifest_path))
+                referenced.update(self.store.path(entry["sha256"]) for entry in manifest["uploads"].values())
+                referenced.update(
+                    self.store.path(table["sha256"], compressed=True)
+                    for table in manifest["database"]["tables"].values()
+                )
+            removed, freed = self.store.garbage_collect(referenced)
+        if removed:
+            logger.info(f"Removed {removed} unreferenced chunks ({freed / (1024 * 1024):.1f} MB)")
+        return removed, freed
     
     def list_backups(self) -> List[Dict]:
         """List all available backups with metadata."""
         backups = []
         
+        for manifest_path in self.manifest_dir.glob("*.json"):
+            try:
+                manifest = self.load_manifest(str(manifest_path))
+                backups.append({
+                    "filename": manifest_path.name,
+                    "path": str(manifest_path),
+                    # Bytes this backup added to the chunk store; the rest is shared
+                    "size": manifest["stats"]["bytes_written"],
+                    "created": datetime.fromtimestamp(manifest_path.stat().st_mtime),
+                    "metadata": {key: value for key, value in manifest.items() if key not in ("database", "uploads")}
+                })
+            except Exception as e:
+                logger.error(f"Error reading backup {manifest_path}: {e}")
+        
         for backup_file in self.backup_dir.glob("*.zip"):
             try:
                 with zipfile.ZipFile(backup_file, 'r') as zipf:
@@ -365,7 +918,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="Magic Card Scanner Backup Manager")
-    parser.add_argument("action", choices=["backup", "restore", "list", "export", "reconstruct", "stats"])
+    parser.add_argument("action", choices=["backup", "restore", "verify", "list", "export", "reconstruct", "stats", "gc"])
     parser.add_argument("--backup-file", help="Backup file for restore/reconstruct")
     parser.add_argument("--json-file", help="JSON file for reconstruction")
     parser.add_argument("--name", help="Custom backup name")
@@ -404,6 +957,19 @@ def main():
         success = manager.reconstruct_from_json(args.json_file)
         print(f"Reconstruction {'successful' if success else 'failed'}")
     
+    elif args.action == "verify":
+        if not args.backup_file:
+            print("Error: --backup-file required for verify")
+            return
+        result = manager.verify_backup(args.backup_file)
+        print(f"Checked {result['checked']} chunks: {len(result['missing'])} missing, {len(result['corrupt'])} corrupt")
+        for name in result["missing"] + result["corrupt"]:
+            print(f"  {name}")
+    
+    elif args.action == "gc":
+        removed, freed = manager.collect_garbage()
+        print(f"Removed {removed} unreferenced chunks ({freed} bytes)")
+    
     elif args.action == "stats":
         stats = manager.get_database_stats()
         print("Database Statistics:")
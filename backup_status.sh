@@ -33,17 +33,20 @@ fi
 echo ""
 echo "💾 Available Backups:"
 if [ -d "backups" ]; then
-    BACKUP_COUNT=$(ls -1 backups/*.zip 2>/dev/null | wc -l)
+    BACKUP_COUNT=$(ls -1 backups/manifests/*.json backups/*.zip 2>/dev/null | wc -l)
     if [ $BACKUP_COUNT -gt 0 ]; then
         echo "  Found: $BACKUP_COUNT backup file(s)"
         
         # Show latest 3 backups
         echo "  Latest backups:"
-        ls -t backups/*.zip 2>/dev/null | head -3 | while read backup; do
+        ls -t backups/manifests/*.json backups/*.zip 2>/dev/null | head -3 | while read backup; do
             SIZE=$(du -h "$backup" | cut -f1)
             DATE=$(stat -f "%Sm" -t "%Y-%m-%d %H:%M" "$backup" 2>/dev/null || date -r "$backup" "+%Y-%m-%d %H:%M" 2>/dev/null || echo "Unknown")
             echo "    $(basename "$backup") ($SIZE) - $DATE"
         done
+        if [ -d "backups/store" ]; then
+            echo "  Chunk store: $(du -sh backups/store | cut -f1) shared by all incremental backups"
+        fi
         
         if [ $BACKUP_COUNT -gt 3 ]; then
             echo "    ... and $((BACKUP_COUNT - 3)) more"
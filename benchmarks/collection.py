@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Collection-scale benchmark - seeds synthetic collections of increasing size and
+measures the read endpoints that scale with the collection: /cards (individual
+and stacked), /stats, /scan/history and /export/download.
+
+For every endpoint and collection size it reports latency percentiles, response
+bytes, SQL queries per request, peak Python allocations (tracemalloc) and peak RSS.
+
+Usage:
+    python -m benchmarks.collection                              # 1k, 10k, 100k cards
+    python -m benchmarks.collection --sizes 1000,10000 --repeat 3
+    python -m benchmarks.collection --save-baseline
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from benchmarks.common import (
+    QueryCounter, RssSampler, add_common_arguments, environment_info, finish,
+    percentiles, prepare_environment
+)
+
+DEFAULT_BASELINE = "benchmarks/baselines/collection.json"
+
+ENDPOINTS = {
+    "cards": ("GET", "/cards", None),
+    "cards_stacked": ("GET", "/cards?view_mode=stacked", None),
+    "stats": ("GET", "/stats", None),
+    "scan_history": ("GET", "/scan/history", None),
+    "export_download": ("POST", "/export/download", {"format": "csv"})
+}
+
+NAME_PARTS = (
+    ["Lightning", "Serra", "Shivan", "Llanowar", "Dark", "Giant", "Ancestral", "Wrath", "Sol", "Birds",
+     "Goblin", "Elvish", "Mind", "Soul", "Storm", "Ancient", "Grim", "Hallowed", "Savage", "Arcane"],
+    ["Bolt", "Angel", "Dragon", "Elves", "Ritual", "Growth", "Recall", "Tutor", "Ring", "Paradise",
+     "Guide", "Mystic", "Twist", "Warden", "Crow", "Hydra", "Lavamancer", "Spirit", "Lands", "Denial"],
+    ["", "", "", " of the Wilds", " of Ruin", " Reborn", " Unbound", " Ascendant"]
+)
+
+SETS = [(f"s{i:02d}", f"Synthetic Set {i}") for i in range(80)]
+RARITIES = ["common"] * 6 + ["uncommon"] * 3 + ["rare", "mythic"]
+
+
+def generate_collection(size: int, rng: random.Random) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Synthetic collection with a long-tailed duplicate distribution: most printings
+    are owned once, a few staples many times (Pareto-distributed copies per group).
+    """
+    now = datetime.utcnow()
+    scan_count = max(10, size // 25)
+    scans = [{
+        "id": scan_id,
+        "created_at": now - timedelta(hours=scan_count - scan_id),
+        "updated_at": now - timedelta(hours=scan_count - scan_id),
+        "status": "COMPLETED",
+        "total_images": rng.randint(1, 3),
+        "processed_images": 0,
+        "total_cards_found": 0,
+        "notes": "Synthetic benchmark scan"
+    } for scan_id in range(1, scan_count + 1)]
+    images = []
+    for scan in scans:
+        scan["processed_images"] = scan["total_images"]
+        for index in range(scan["total_images"]):
+            filename = f"scan_{scan['id']}_{index}.jpg"
+            images.append({
+                "scan_id": scan["id"],
+                "filename": filename,
+                "original_filename": f"IMG_{scan['id']:05d}_{index}.jpg",
+                "file_path": f"uploads/{filename}",
+                "processed_at": scan["created_at"],
+                "cards_found": 0
+            })
+
+    cards = []
+    while len(cards) < size:
+        name = rng.choice(NAME_PARTS[0]) + " " + rng.choice(NAME_PARTS[1]) + rng.choice(NAME_PARTS[2])
+        set_code, set_name = rng.choice(SETS)
+        collector_number = str(rng.randint(1, 350))
+        copies = min(int(rng.paretovariate(1.6)), 40, size - len(cards))
+        stack_id = str(uuid.uuid4())
+        price = round(rng.lognormvariate(-0.5, 1.5), 2)
+        for _ in range(copies):
+            scan = rng.choice(scans)
+            scan["total_cards_found"] += 1
+            cards.append({
+                "unique_id": str(uuid.uuid4()),
+                "name": name,
+                "set_code": set_code,
+                "set_name": set_name,
+                "collector_number": collector_number,
+                "rarity": rng.choice(RARITIES),
+                "mana_cost": "{2}{U}",
+                "type_line": "Creature - Synthetic",
+                "oracle_text": "Synthetic benchmark card text. " * rng.randint(1, 4),
+                "flavor_text": "",
+                "power": "2",
+                "toughness": "2",
+                "colors": "U",
+                "image_url": f"https://cards.example/{set_code}/{collector_number}.jpg",
+                "price_usd": price,
+                "price_eur": round(price * 0.9, 2),
+                "price_tix": 0.0,
+                "count": 1,
+                "stack_count": copies,
+                "notes": "",
+                "condition": rng.choice(["NM", "LP", "LP", "MP"]),
+                "is_example": False,
+                "duplicate_group": f"{name}|{set_name}|{collector_number}",
+                "stack_id": stack_id,
+                "deleted": rng.random() < 0.02,
+                "first_seen": scan["created_at"],
+                "last_seen": scan["created_at"],
+                "scan_id": scan["id"],
+                "import_status": "ACCEPTED",
+                "added_method": "SCANNED"
+            })
+    return {"scans": scans, "scan_images": images, "cards": cards}
+
+
+def seed_database(engine, data: Dict[str, List[Dict[str, Any]]], chunk_size: int = 5000):
+    """Replace all collection data with the synthetic rows using batched executemany inserts"""
+    from backend.database import Card, Scan, ScanImage, ScanResult
+
+    with engine.begin() as conn:
+        for model in (Card, ScanResult, ScanImage, Scan):
+            conn.execute(model.__table__.delete())
+        for model, rows in ((Scan, data["scans"]), (ScanImage, data["scan_images"]), (Card, data["cards"])):
+            for start in range(0, len(rows), chunk_size):
+                conn.execute(model.__table__.insert(), rows[start:start + chunk_size])
+
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy import text
+        with engine.begin() as conn:
+            for table in ("scans", "scan_images", "cards"):
+                conn.execute(text(f"SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM {table}), 1))"))
+
+
+def measure_endpoint(client, engine, method: str, path: str, body, repeat: int) -> Dict[str, Any]:
+    """Time an endpoint repeat times, then once more under tracemalloc for allocations"""
+    def call():
+        if method == "POST":
+            return client.post(path, json=body)
+        return client.get(path)
+
+    call()  # Warm caches and lazy imports
+
+    latencies, sizes, errors = [], [], 0
+    with RssSampler() as rss, QueryCounter(engine) as queries:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = call()
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(response.content))
+            if response.status_code >= 400:
+                errors += 1
+
+    tracemalloc.start()
+    call()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        **percentiles(latencies),
+        "response_bytes": max(sizes),
+        "queries": round(queries.count / repeat, 1),
+        "peak_alloc_mb": round(peak_alloc / (1024 * 1024), 2),
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "errors": errors
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark collection read endpoints at increasing collection sizes")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated collection sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint and size")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma separated subset of endpoints")
+    parser.add_argument("--seed", type=int, default=42)
+    add_common_arguments(parser, DEFAULT_BASELINE)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="collection_bench_")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    prepare_environment(database_url)
+
+    from fastapi.testclient import TestClient
+    from backend.app import app
+    from backend.database import engine, ensure_db_initialized
+
+    # TestClient without `with` runs no startup hooks; the tables must exist before seeding
+    ensure_db_initialized()
+    client = TestClient(app)
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    results = {}
+
+    for size in [int(value) for value in args.sizes.split(",")]:
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        data = generate_collection(size, rng)
+        seed_database(engine, data)
+        print(f"Seeded {size} cards ({len(data['scans'])} scans) in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+
+        results[str(size)] = {}
+        for name in endpoints:
+            method, path, body = ENDPOINTS[name]
+            results[str(size)][name] = measure_endpoint(client, engine, method, path, body, args.repeat)
+            metrics = results[str(size)][name]
+            print(f"  {name}: p50 {metrics['p50_s']}s, {metrics['response_bytes']} bytes, "
+                  f"{metrics['queries']} queries, {metrics['peak_alloc_mb']} MB allocated", file=sys.stderr)
+
+    report = {
+        "benchmark": "collection",
+        "params": {"sizes": args.sizes, "repeat": args.repeat, "seed": args.seed},
+        "environment": environment_info(database_url),
+        "sizes": results,
+        "regressions": []
+    }
+    return finish(report, "sizes", args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
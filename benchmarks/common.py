@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Benchmark helpers - environment setup, latency percentiles, RSS sampling,
+SQL query counting and baseline comparison shared by the benchmark scripts
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Metric name suffixes used when comparing against a baseline; other metrics are not compared
+LOWER_IS_BETTER = ("_s", "_mb", "_bytes", "queries")
+HIGHER_IS_BETTER = ("throughput_per_s",)
+
+
+def prepare_environment(database_url: str):
+    """
+    Point the backend at a local benchmark database. Must run before anything
+    imports backend.database, which creates its engine at import time.
+    """
+    if "backend.database" in sys.modules:
+        raise RuntimeError("prepare_environment() must be called before importing the backend")
+
+    os.environ["ENV_MODE"] = "production"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-no-network")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["USE_RAILWAY_FILES"] = "false"
+    os.environ["RAILWAY_APP_URL"] = ""
+
+    # The app mounts ./frontend and writes ./uploads relative to the repo root
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, os.getcwd())
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """Summarise latency samples (seconds)"""
+    if not samples:
+        return {"p50_s": None, "p95_s": None, "p99_s": None, "mean_s": None, "max_s": None}
+    ordered = sorted(samples)
+
+    def pick(percentile: float) -> float:
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return round(ordered[index], 4)
+
+    return {
+        "p50_s": pick(50),
+        "p95_s": pick(95),
+        "p99_s": pick(99),
+        "mean_s": round(sum(ordered) / len(ordered), 4),
+        "max_s": round(ordered[-1], 4)
+    }
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # ru_maxrss is KB on Linux, bytes on macOS; only a lifetime peak
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+class RssSampler:
+    """Track peak RSS while a block runs by sampling in a background thread"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+
+class QueryCounter:
+    """Count SQL statements executed on an engine while a block runs"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _on_execute(self, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        return False
+
+
+class FakeScryfall:
+    """
+    Answer Scryfall HTTP calls in-process with synthetic card data so benchmarks
+    exercise the real ScryfallAPI code without network access. Installed as the
+    transport of the process-wide Scryfall client; latency is added per call.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._client = None
+        self._previous = None
+
+    @staticmethod
+    def card(name: str) -> Dict[str, Any]:
+        """Scryfall-shaped card object for a name"""
+        digest = int(hashlib.md5(name.encode("utf-8")).hexdigest()[:8], 16)
+        return {
+            "object": "card",
+            "name": name,
+            "set": "bmk",
+            "set_name": "Benchmark Edition",
+            "collector_number": str(digest % 300 + 1),
+            "rarity": ("common", "uncommon", "rare", "mythic")[digest % 4],
+            "mana_cost": "{1}{R}",
+            "type_line": "Instant",
+            "oracle_text": "Benchmark card.",
+            "colors": ["R"],
+            "released_at": "2020-01-01",
+            "image_uris": {"normal": f"https://cards.example/{digest}.jpg"},
+            "prices": {"usd": f"{digest % 2000 / 100:.2f}", "eur": None, "tix": None}
+        }
+
+    async def _respond(self, request):
+        import httpx
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        params = dict(request.url.params)
+        path = request.url.path
+        if path.endswith("/cards/named"):
+            return httpx.Response(200, json=self.card(params.get("exact") or params.get("fuzzy") or "Unknown"))
+        if path.endswith("/cards/search"):
+            query = params.get("q", "")
+            name = query.split('"')[1] if '"' in query else query
+            return httpx.Response(200, json={"object": "list", "data": [self.card(name)]})
+        if path.endswith("/cards/collection"):
+            identifiers = json.loads(request.content or b"{}").get("identifiers", [])
+            # Synthetic cards can only be found by name
+            return httpx.Response(200, json={"object": "list",
+                                             "not_found": [i for i in identifiers if "name" not in i],
+                                             "data": [self.card(i["name"]) for i in identifiers if "name" in i]})
+        return httpx.Response(404, json={"object": "error", "details": "Not found"})
+
+    def install(self):
+        import httpx
+        from backend.scryfall_client import ScryfallClient, set_scryfall_client
+        # No politeness throttle against the in-process fake
+        self._client = ScryfallClient(transport=httpx.MockTransport(self._respond), min_interval=0)
+        self._previous = set_scryfall_client(self._client)
+        return self
+
+    def uninstall(self):
+        from backend.scryfall_client import set_scryfall_client
+        if self._client:
+            set_scryfall_client(self._previous)
+            self._client.close()
+            self._client = None
+
+
+def environment_info(database_url: str) -> Dict[str, Any]:
+    """Describe where the benchmark ran, for comparing results"""
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": database_url.split(":", 1)[0]
+    }
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested metric dicts to dotted keys, keeping numeric leaves"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_to_baseline(metrics: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare metric trees; returns one entry per metric that got worse by more
+    than tolerance (a fraction, 0.2 = 20%).
+    """
+    current = _flatten(metrics)
+    previous = _flatten(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        before = previous.get(name)
+        if not before:
+            continue
+        leaf = name.rsplit(".", 1)[-1]
+        if leaf.endswith(HIGHER_IS_BETTER):
+            change = (before - value) / before
+        elif leaf.endswith(LOWER_IS_BETTER):
+            change = (value - before) / before
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({
+                "metric": name,
+                "baseline": before,
+                "current": value,
+                "change": round(change, 3)
+            })
+    return regressions
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    """Read a JSON file, None if it does not exist"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    """Write JSON, creating parent directories"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def finish(report: Dict[str, Any], metrics_key: str, args) -> int:
+    """
+    Attach regressions against --baseline, write --output / --save-baseline and
+    print the report. Returns the process exit code: 1 if regressions were found,
+    2 if there was no baseline to compare against and none was being saved.
+    """
+    baseline = load_json(args.baseline)
+    if baseline is not None:
+        report["baseline"] = args.baseline
+        report["regressions"] = compare_to_baseline(report[metrics_key], baseline.get(metrics_key, {}), args.tolerance)
+        if baseline.get("params") != report.get("params"):
+            print(f"⚠️ Baseline {args.baseline} was recorded with different parameters "
+                  f"({baseline.get('params')}) - only matching metrics are compared", file=sys.stderr)
+
+    if args.output:
+        write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+
+    print(json.dumps(report, indent=2))
+
+    if baseline is None and not args.save_baseline:
+        print(f"❌ Baseline {args.baseline} not found - nothing was compared. "
+              f"Run with --save-baseline to create it", file=sys.stderr)
+        return 2
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"⚠️ Regression: {regression['metric']} {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change']:+.0%})", file=sys.stderr)
+        return 1
+    return 0
+
+
+def add_common_arguments(parser, default_baseline: str):
+    """Arguments shared by all benchmark scripts"""
+    parser.add_argument("--database-url", help="Benchmark database (default: temporary SQLite file). "
+                                               "Use a disposable database - benchmark data is written to it.")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", default=default_baseline, help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown before a metric is flagged (fraction, default 0.2)")
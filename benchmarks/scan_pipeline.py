@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Scan pipeline benchmark - drives /upload/scan -> /scan/{id}/process ->
+/scan/{id}/accept -> /scan/{id}/commit in-process against a local database,
+with the replay vision processor and a fake Scryfall standing in for the
+external APIs.
+
+Each stage runs for all scans before the next starts, so latency percentiles,
+throughput and peak RSS are reported per stage.
+
+Usage:
+    python -m benchmarks.scan_pipeline --scans 20 --images-per-scan 3 --cards-per-image 4 --concurrency 4
+    python -m benchmarks.scan_pipeline --save-baseline          # store a new baseline
+    python -m benchmarks.scan_pipeline --output run.json        # exits 1 on regressions vs baseline
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import (
+    FakeScryfall, RssSampler, add_common_arguments, environment_info, finish,
+    percentiles, prepare_environment
+)
+
+DEFAULT_BASELINE = "benchmarks/baselines/scan_pipeline.json"
+
+CARD_NAMES = [
+    "Lightning Bolt", "Counterspell", "Serra Angel", "Shivan Dragon", "Llanowar Elves",
+    "Dark Ritual", "Giant Growth", "Swords to Plowshares", "Brainstorm", "Wrath of God",
+    "Sol Ring", "Birds of Paradise", "Terror", "Disenchant", "Air Elemental"
+]
+
+
+def make_image(index: int) -> bytes:
+    """Small JPEG that passes upload validation"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 448), ((index * 37) % 255, 90, 140)).save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def write_replay_fixtures(fixture_dir: str, cards_per_image: int, variants: int = 10):
+    """Recorded responses with cards_per_image cards each, in the live response format"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    for variant in range(variants):
+        cards = [{
+            "name": CARD_NAMES[(variant + i) % len(CARD_NAMES)],
+            "set": "Benchmark Edition",
+            "collector_number": "",
+            "set_symbol_description": "",
+            "copyright_year": "",
+            "special_features": "",
+            "confidence": "high",
+            "notes": ""
+        } for i in range(cards_per_image)]
+        with open(os.path.join(fixture_dir, f"response_{variant}.json"), "w") as f:
+            json.dump(cards, f)
+
+
+def write_vision_config(path: str, fixture_dir: str, args):
+    """config.json variant whose only processor is the replay processor"""
+    with open("config.json") as f:
+        config = json.load(f)
+    config["vision_processor"] = {
+        "primary": "replay",
+        "fallback": "replay",
+        "processors": {
+            "replay": {
+                "enabled": True,
+                "source": "fixtures",
+                "fixture_dir": fixture_dir,
+                "seed": 42,
+                "latency": {"distribution": "lognormal", "median_seconds": args.vision_latency_ms / 1000.0,
+                            "sigma": 0.3} if args.vision_latency_ms else {"distribution": "none"},
+                "errors": {"rate_limit_rate": args.vision_error_rate}
+            }
+        }
+    }
+    config["hedging"] = {"enabled": False}
+    config["batching"] = dict(config.get("batching", {}), enabled=args.batching)
+    with open(path, "w") as f:
+        json.dump(config, f)
+
+
+def run_stage(name: str, scan_ids: List[Any], call: Callable[[Any], Any], concurrency: int,
+              items_per_call: int = 1) -> Dict[str, Any]:
+    """Run call for every scan with a thread pool and summarise it"""
+    latencies, errors, results = [], [], []
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            result = call(item)
+            latencies.append(time.perf_counter() - start)
+            return result
+        except Exception as e:
+            errors.append(f"{item}: {e}")
+            return None
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, scan_ids))
+        wall = time.perf_counter() - started
+
+    summary = {
+        "count": len(latencies),
+        "errors": len(errors),
+        **percentiles(latencies),
+        "wall_s": round(wall, 4),
+        "throughput_per_s": round(len(latencies) * items_per_call / wall, 3) if wall else None,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "rss_growth_mb": round(rss.peak_mb - rss.start_mb, 1)
+    }
+    if errors:
+        summary["sample_errors"] = errors[:5]
+    print(f"  {name}: {summary['count']} ok, {summary['errors']} errors, p95 {summary['p95_s']}s", file=sys.stderr)
+    return {"summary": summary, "results": results}
+
+
+def remove_uploaded_files(scan_ids: List[Any]):
+    """Delete the blobs the benchmark uploaded (scans share identical images, so one blob each)"""
+    from backend.blob_store import delete_files
+    from backend.database import SessionLocal, ScanImage
+    if not scan_ids:
+        return
+    db = SessionLocal()
+    try:
+        paths = {path for (path,) in db.query(ScanImage.file_path).filter(ScanImage.scan_id.in_(scan_ids))}
+    finally:
+        db.close()
+    delete_files(sorted(paths))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the upload -> process -> commit scan pipeline")
+    parser.add_argument("--scans", type=int, default=10, help="Number of scans to push through the pipeline")
+    parser.add_argument("--images-per-scan", type=int, default=3)
+    parser.add_argument("--cards-per-image", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests per stage")
+    parser.add_argument("--vision-latency-ms", type=float, default=0,
+                        help="Median synthetic vision latency (lognormal), 0 for none")
+    parser.add_argument("--vision-error-rate", type=float, default=0.0, help="Injected 429 rate")
+    parser.add_argument("--scryfall-latency-ms", type=float, default=0, help="Latency per fake Scryfall call")
+    parser.add_argument("--batching", action="store_true", help="Enable multi-image vision batching")
+    add_common_arguments(parser, DEFAULT_BASELINE)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="scan_bench_")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    fixture_dir = os.path.join(workdir, "fixtures")
+    write_replay_fixtures(fixture_dir, args.cards_per_image)
+    # Set before the app is imported: the factory reads it on first use
+    os.environ["VISION_CONFIG_FILE"] = os.path.join(workdir, "vision_config.json")
+    prepare_environment(database_url)
+    write_vision_config(os.environ["VISION_CONFIG_FILE"], fixture_dir, args)
+
+    scryfall = FakeScryfall(latency=args.scryfall_latency_ms / 1000.0).install()
+
+    from fastapi.testclient import TestClient
+    from backend.app import app
+
+    client = TestClient(app)
+    images = [make_image(i) for i in range(args.images_per_scan)]
+
+    def upload(_):
+        files = [("files", (f"bench_{i}.jpg", data, "image/jpeg")) for i, data in enumerate(images)]
+        response = client.post("/upload/scan", files=files)
+        response.raise_for_status()
+        return response.json()["scan_id"]
+
+    def process(scan_id):
+        client.post(f"/scan/{scan_id}/process").raise_for_status()
+        return scan_id
+
+    def accept(scan_id):
+        client.post(f"/scan/{scan_id}/accept", json={"accept_all": True}).raise_for_status()
+        return scan_id
+
+    def commit(scan_id):
+        response = client.post(f"/scan/{scan_id}/commit")
+        response.raise_for_status()
+        return response.json().get("cards_created", 0)
+
+    print(f"Running {args.scans} scans x {args.images_per_scan} images x {args.cards_per_image} cards "
+          f"(concurrency {args.concurrency})", file=sys.stderr)
+    stages = {}
+    uploaded_ids = []
+    try:
+        uploaded = run_stage("upload", range(args.scans), upload, args.concurrency, args.images_per_scan)
+        stages["upload"] = uploaded["summary"]
+        scan_ids = [scan_id for scan_id in uploaded["results"] if scan_id is not None]
+        uploaded_ids = list(scan_ids)
+
+        processed = run_stage("process", scan_ids, process, args.concurrency, args.images_per_scan)
+        stages["process"] = processed["summary"]
+        scan_ids = [scan_id for scan_id in processed["results"] if scan_id is not None]
+
+        accepted = run_stage("accept", scan_ids, accept, args.concurrency)
+        stages["accept"] = accepted["summary"]
+
+        committed = run_stage("commit", scan_ids, commit, args.concurrency)
+        stages["commit"] = committed["summary"]
+        cards_created = sum(count or 0 for count in committed["results"])
+    finally:
+        scryfall.uninstall()
+        remove_uploaded_files(uploaded_ids)
+
+    report = {
+        "benchmark": "scan_pipeline",
+        "params": {
+            "scans": args.scans,
+            "images_per_scan": args.images_per_scan,
+            "cards_per_image": args.cards_per_image,
+            "concurrency": args.concurrency,
+            "vision_latency_ms": args.vision_latency_ms,
+            "vision_error_rate": args.vision_error_rate,
+            "scryfall_latency_ms": args.scryfall_latency_ms,
+            "batching": args.batching
+        },
+        "environment": environment_info(database_url),
+        "stages": stages,
+        "totals": {
+            "cards_created": cards_created,
+            "scryfall_calls": scryfall.calls
+        },
+        "regressions": []
+    }
+    return finish(report, "stages", args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
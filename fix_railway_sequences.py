@@ -5,9 +5,11 @@ Fix Railway production database sequences
 
 import os
 import sys
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+from backend.db_migration import fix_sequences
+
 # Load environment variables
 load_dotenv()
 
@@ -23,52 +25,11 @@ def fix_railway_sequences():
     print("🚂 Fixing Railway production database sequences...")
     
     try:
-        engine = create_engine(database_url)
-        
-        with engine.connect() as conn:
-            # Fix scans table sequence
-            result = conn.execute(text("SELECT MAX(id) FROM scans;"))
-            max_scans_id = result.scalar()
-            print(f"📊 Max scans ID: {max_scans_id}")
-            
-            if max_scans_id:
-                next_scans_seq = max_scans_id + 1
-                print(f"🔧 Setting scans sequence to: {next_scans_seq}")
-                conn.execute(text(f"SELECT setval('scans_id_seq', {next_scans_seq}, false);"))
-            
-            # Fix cards table sequence  
-            result = conn.execute(text("SELECT MAX(id) FROM cards;"))
-            max_cards_id = result.scalar()
-            print(f"📊 Max cards ID: {max_cards_id}")
-            
-            if max_cards_id:
-                next_cards_seq = max_cards_id + 1
-                print(f"🔧 Setting cards sequence to: {next_cards_seq}")
-                conn.execute(text(f"SELECT setval('cards_id_seq', {next_cards_seq}, false);"))
-            
-            # Fix scan_images table sequence
-            result = conn.execute(text("SELECT MAX(id) FROM scan_images;"))
-            max_scan_images_id = result.scalar()
-            print(f"📊 Max scan_images ID: {max_scan_images_id}")
-            
-            if max_scan_images_id:
-                next_scan_images_seq = max_scan_images_id + 1
-                print(f"🔧 Setting scan_images sequence to: {next_scan_images_seq}")
-                conn.execute(text(f"SELECT setval('scan_images_id_seq', {next_scan_images_seq}, false);"))
-            
-            # Fix scan_results table sequence
-            result = conn.execute(text("SELECT MAX(id) FROM scan_results;"))
-            max_scan_results_id = result.scalar()
-            print(f"📊 Max scan_results ID: {max_scan_results_id}")
-            
-            if max_scan_results_id:
-                next_scan_results_seq = max_scan_results_id + 1
-                print(f"🔧 Setting scan_results sequence to: {next_scan_results_seq}")
-                conn.execute(text(f"SELECT setval('scan_results_id_seq', {next_scan_results_seq}, false);"))
-            
-            conn.commit()
-            print("✅ Railway production database sequences fixed!")
-            return True
+        fixed = fix_sequences(create_engine(database_url))
+        for table, next_id in fixed.items():
+            print(f"🔧 {table}: next id {next_id}")
+        print("✅ Railway production database sequences fixed!")
+        return True
             
     except Exception as e:
         print(f"❌ Error fixing Railway sequences: {e}")
@@ -76,4 +37,4 @@ def fix_railway_sequences():
 
 if __name__ == "__main__":
     success = fix_railway_sequences()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1)
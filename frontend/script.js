@@ -5,6 +5,7 @@ let currentCardIndex = 0;
 let viewMode = 'individual'; // 'individual' or 'stacked'
 let currentScan = null;
 let scanPollingInterval = null;
+let scanEventSource = null;
 let fileInputBusy = false; // Flag to prevent multiple file input clicks
 let fileInputTimeout = null; // Timeout to reset busy flag
 
@@ -2214,13 +2215,18 @@ async function showScanningModal(scanId, uploadedFiles) {
     // Add small delay to ensure upload has completed
     await new Promise(resolve => setTimeout(resolve, 500));
     
+    // Listen for progress events before processing starts; poll if streaming isn't available
+    const streaming = startScanEvents(scanId);
+    
     // Start processing the scan with retry logic
     try {
         await startScanProcessingWithRetry(scanId);
-        // Start polling for updates
-        startScanPolling(scanId);
+        if (!streaming) {
+            startScanPolling(scanId);
+        }
     } catch (error) {
         console.error('Error starting scan processing:', error);
+        stopScanEvents();
         showScanError('Failed to start processing. Please try again.');
     }
 }
@@ -2358,6 +2364,69 @@ async function startScanProcessing(scanId) {
     }
 }
 
+// Stream scan progress (Server-Sent Events); returns false when the browser can't
+function startScanEvents(scanId) {
+    if (!window.EventSource) {
+        return false;
+    }
+    stopScanEvents();
+    
+    // start=1: processing is about to be triggered, so a FAILED status from an earlier run doesn't end the stream
+    const source = new EventSource(`/scan/${scanId}/events?start=1`);
+    scanEventSource = source;
+    const on = (event, handler) => source.addEventListener(event, (message) => handler(JSON.parse(message.data)));
+    
+    on('status', (status) => applyScanStatus(scanId, status));
+    on('image_started', (data) => setScanImageStatus(data.index, 'processing', 'Identifying...'));
+    on('card_identified', (data) => setScanImageStatus(data.index, 'processing', `Found ${data.name}`));
+    on('scryfall_matched', (data) => setScanImageStatus(data.index, 'processing',
+        data.matched ? `Matched ${data.name} (${data.set_code.toUpperCase()})` : `No match for ${data.name}`));
+    on('image_done', (data) => setScanImageStatus(data.index, 'completed',
+        `Completed - ${data.cards_found} card${data.cards_found === 1 ? '' : 's'}`));
+    on('image_failed', (data) => setScanImageStatus(data.index, 'error', 'Failed'));
+    on('scan_done', async () => {
+        stopScanEvents();
+        await showReviewPhase(scanId);
+    });
+    on('scan_failed', () => {
+        stopScanEvents();
+        showScanError('Scan failed. Please try again.');
+    });
+    
+    source.onerror = () => {
+        // Connection lost: fall back to polling the status endpoint
+        if (scanEventSource !== source) {
+            return;
+        }
+        console.warn('Scan event stream interrupted, falling back to polling');
+        stopScanEvents();
+        if (currentScan && currentScan.id === scanId && currentScan.phase === 'processing') {
+            startScanPolling(scanId);
+        }
+    };
+    return true;
+}
+
+// Close the scan progress stream
+function stopScanEvents() {
+    if (scanEventSource) {
+        scanEventSource.close();
+        scanEventSource = null;
+    }
+}
+
+// Update one image tile in the processing view
+function setScanImageStatus(index, state, text) {
+    const imageElement = document.getElementById(`scanImage${index}`);
+    if (!imageElement) {
+        return;
+    }
+    imageElement.className = `scan-image-item ${state}`;
+    const statusElement = imageElement.querySelector('.scan-image-status');
+    statusElement.textContent = text;
+    statusElement.className = `scan-image-status ${state}`;
+}
+
 // Start polling for scan status
 function startScanPolling(scanId) {
     // Clear any existing polling
@@ -2384,27 +2453,34 @@ async function updateScanStatus(scanId) {
         }
         
         const status = await response.json();
-        
-        // Update UI based on status
-        if (status.status === 'READY_FOR_REVIEW') {
-            clearInterval(scanPollingInterval);
-            await showReviewPhase(scanId);
-        } else if (status.status === 'FAILED') {
-            clearInterval(scanPollingInterval);
-            showScanError('Scan failed. Please try again.');
-        } else if (status.status === 'COMPLETED') {
-            clearInterval(scanPollingInterval);
-            showScanError('Scan was completed by another process.');
-        }
-        
-        // Update processing progress if still processing
-        updateProcessingProgress(status);
+        await applyScanStatus(scanId, status);
         
     } catch (error) {
         console.error('Error updating scan status:', error);
     }
 }
 
+// Apply a status snapshot (from polling or the event stream)
+async function applyScanStatus(scanId, status) {
+    const finished = ['READY_FOR_REVIEW', 'FAILED', 'COMPLETED'].includes(status.status);
+    if (finished) {
+        clearInterval(scanPollingInterval);
+        stopScanEvents();
+    }
+    
+    // Update UI based on status
+    if (status.status === 'READY_FOR_REVIEW') {
+        await showReviewPhase(scanId);
+    } else if (status.status === 'FAILED') {
+        showScanError('Scan failed. Please try again.');
+    } else if (status.status === 'COMPLETED') {
+        showScanError('Scan was completed by another process.');
+    }
+    
+    // Update processing progress if still processing
+    updateProcessingProgress(status);
+}
+
 // Update processing progress
 function updateProcessingProgress(status) {
     if (status.processed_images > 0) {
@@ -2867,7 +2943,7 @@ function createScanResultItem(result) {
     // If no official image found, use scan image for display and placeholder for comparison
     if (!officialImageUrl) {
         if (result.image_filename) {
-            imageUrl = `/uploads/${result.image_filename}`;
+            imageUrl = `/uploads/${result.image_filename}?w=256`;
         }
         officialImageUrl = 'https://via.placeholder.com/250x349/667eea/ffffff?text=No+Official+Image+Available';
     }
@@ -3261,6 +3337,7 @@ async function cancelScan() {
                 clearInterval(scanPollingInterval);
                 scanPollingInterval = null;
             }
+            stopScanEvents();
             
             // Update UI to show cancellation in progress
             const scanBody = document.getElementById('scanningBody');
@@ -3320,6 +3397,7 @@ async function retryScan() {
             clearInterval(scanPollingInterval);
             scanPollingInterval = null;
         }
+        stopScanEvents();
         
         // Start a new scan with the same files
         const scanResult = await uploadAndScan(scanFiles);
@@ -3350,6 +3428,7 @@ function closeScanningModal() {
         clearInterval(scanPollingInterval);
         scanPollingInterval = null;
     }
+    stopScanEvents();
     
     // Clean up object URLs
     if (currentScan && currentScan.files) {
@@ -3908,7 +3987,7 @@ function createScanHistoryItem(scan) {
     
     const imagesHtml = scan.images && scan.images.length > 0 
         ? scan.images.map(image => `
-            <img src="/uploads/${image.filename}" 
+            <img src="/uploads/${image.filename}?w=256" 
                  alt="Scan image" 
                  class="scan-thumbnail"
                  loading="lazy"
@@ -5322,7 +5401,7 @@ function displayCardScanAssociationInterface() {
                         <div class="scan-images-grid">
                             ${currentScan.images.map(img => `
                                 <div class="scan-image-item" onclick="selectScanImage(${img.id})" data-image-id="${img.id}">
-                                    <img src="/uploads/${img.filename}" alt="Scan Image" class="scan-thumbnail">
+                                    <img src="/uploads/${img.filename}?w=256" alt="Scan Image" class="scan-thumbnail">
                                     <div class="scan-image-info">
                                         <small>${img.cards_found} cards</small>
                                     </div>
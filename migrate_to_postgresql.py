@@ -2,29 +2,50 @@
 """
 Database Migration Script for Magic Card Scanner
 Handles migration from SQLite to PostgreSQL for Railway deployment
+
+Rows are streamed in chunks, loaded with COPY FROM STDIN, tables without
+dependencies between them are copied in parallel, and sequences are fixed at the
+end. Safe to re-run: --mode replace reloads everything, --mode upsert merges
+changed rows into the existing data. Chunks commit as they load, so a failed
+run leaves the target partly loaded until it is re-run. A --tables subset in
+replace mode must include every table that references it.
+
+Usage:
+    DATABASE_URL=postgresql://... python migrate_to_postgresql.py
+    python migrate_to_postgresql.py --source sqlite:///magic_cards.db --target postgresql://... --mode upsert
+    python migrate_to_postgresql.py --tables cards,scans --mode upsert --chunk-size 10000 --workers 4
+    python migrate_to_postgresql.py --fix-sequences-only
 """
 
+import argparse
 import os
-import sqlite3
-import json
-from datetime import datetime
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from backend.database import Base, Card, Scan, ScanImage, ScanResult
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func, select, MetaData
+
+load_dotenv()
+
+from backend.db_migration import DEFAULT_CHUNK_SIZE, MIGRATION_MODES, TableMigrator, fix_sequences
+from backend.schema_health import record_data_import
+
+DEFAULT_SQLITE_PATH = "magic_cards_dev.db"
 
-def get_database_engines():
+
+def get_database_engines(source_url=None, target_url=None):
     """Get both SQLite and PostgreSQL database engines"""
     
     # SQLite (source) - use development database
-    sqlite_path = "magic_cards_dev.db"
-    if not os.path.exists(sqlite_path):
-        print(f"❌ SQLite database not found: {sqlite_path}")
-        return None, None
+    if not source_url:
+        if not os.path.exists(DEFAULT_SQLITE_PATH):
+            print(f"❌ SQLite database not found: {DEFAULT_SQLITE_PATH}")
+            return None, None
+        source_url = f"sqlite:///{DEFAULT_SQLITE_PATH}"
     
-    sqlite_engine = create_engine(f"sqlite:///{sqlite_path}")
+    sqlite_engine = create_engine(source_url)
     
     # PostgreSQL (destination)
-    postgres_url = os.getenv("DATABASE_URL")
+    postgres_url = target_url or os.getenv("DATABASE_URL")
     if not postgres_url:
         print("❌ DATABASE_URL environment variable not set")
         return sqlite_engine, None
@@ -38,6 +59,7 @@ def create_tables(postgres_engine):
     print("🏗️ Creating tables in PostgreSQL...")
     
     try:
+        from backend.database import Base
         Base.metadata.create_all(bind=postgres_engine)
         print("✅ Tables created successfully")
         return True
@@ -45,104 +67,86 @@ def create_tables(postgres_engine):
         print(f"❌ Error creating tables: {e}")
         return False
 
-def migrate_data(sqlite_engine, postgres_engine):
+def migrate_data(sqlite_engine, postgres_engine, mode="replace", tables=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, workers=4):
     """Migrate data from SQLite to PostgreSQL"""
-    print("🔄 Starting data migration...")
-    
-    # Create sessions
-    SqliteSession = sessionmaker(bind=sqlite_engine)
-    PostgresSession = sessionmaker(bind=postgres_engine)
-    
-    sqlite_session = SqliteSession()
-    postgres_session = PostgresSession()
+    print(f"🔄 Starting data migration ({mode})...")
     
     try:
-        # Migrate in correct order to avoid foreign key constraint violations
-        
-        # 1. Migrate Scans first (no dependencies)
-        print("🔍 Migrating scans...")
-        scans = sqlite_session.query(Scan).all()
-        for scan in scans:
-            postgres_session.merge(scan)
-        postgres_session.commit()
-        print(f"✅ Migrated {len(scans)} scans")
-        
-        # 2. Migrate ScanImages (depends on Scans)
-        print("🖼️ Migrating scan images...")
-        scan_images = sqlite_session.query(ScanImage).all()
-        for scan_image in scan_images:
-            postgres_session.merge(scan_image)
-        postgres_session.commit()
-        print(f"✅ Migrated {len(scan_images)} scan images")
-        
-        # 3. Migrate ScanResults (depends on Scans and ScanImages)
-        print("📊 Migrating scan results...")
-        scan_results = sqlite_session.query(ScanResult).all()
-        for scan_result in scan_results:
-            postgres_session.merge(scan_result)
-        postgres_session.commit()
-        print(f"✅ Migrated {len(scan_results)} scan results")
-        
-        # 4. Migrate Cards last (depends on Scans and ScanResults)
-        print("📦 Migrating cards...")
-        cards = sqlite_session.query(Card).all()
-        for card in cards:
-            postgres_session.merge(card)
-        postgres_session.commit()
-        print(f"✅ Migrated {len(cards)} cards")
-        
+        migrator = TableMigrator(sqlite_engine, postgres_engine, mode=mode, chunk_size=chunk_size, workers=workers)
+        results = migrator.migrate(tables)
+        record_data_import(postgres_engine, f"migrate_to_postgresql ({mode})")
+        for table, result in results.items():
+            print(f"✅ Migrated {result['rows']} rows of {table} in {result['seconds']}s")
         print("✅ Data migration completed successfully")
-        
+        return True
     except Exception as e:
         print(f"❌ Error during migration: {e}")
-        postgres_session.rollback()
         return False
-    finally:
-        sqlite_session.close()
-        postgres_session.close()
-    
-    return True
 
-def verify_migration(postgres_engine):
-    """Verify that migration was successful"""
+def verify_migration(sqlite_engine, postgres_engine, tables=None):
+    """Verify that every migrated table has at least as many rows as the source"""
     print("🔍 Verifying migration...")
     
-    PostgresSession = sessionmaker(bind=postgres_engine)
-    session = PostgresSession()
-    
     try:
-        # Check counts
-        card_count = session.query(Card).count()
-        scan_count = session.query(Scan).count()
-        scan_image_count = session.query(ScanImage).count()
-        scan_result_count = session.query(ScanResult).count()
+        source_metadata = MetaData()
+        source_metadata.reflect(bind=sqlite_engine)
+        target_metadata = MetaData()
+        target_metadata.reflect(bind=postgres_engine)
         
+        ok = True
         print(f"📊 Migration verification:")
-        print(f"   Cards: {card_count}")
-        print(f"   Scans: {scan_count}")
-        print(f"   Scan Images: {scan_image_count}")
-        print(f"   Scan Results: {scan_result_count}")
+        with sqlite_engine.connect() as source, postgres_engine.connect() as target:
+            for name in source_metadata.tables:
+                if name not in target_metadata.tables or (tables and name not in tables):
+                    continue
+                source_count = source.execute(select(func.count()).select_from(source_metadata.tables[name])).scalar()
+                target_count = target.execute(select(func.count()).select_from(target_metadata.tables[name])).scalar()
+                marker = "✅" if target_count >= source_count else "❌"
+                print(f"   {marker} {name}: {source_count} -> {target_count}")
+                ok = ok and target_count >= source_count
         
-        if card_count > 0:
+        if ok:
             print("✅ Migration verification passed")
-            return True
         else:
-            print("⚠️ No cards found - migration may have failed")
-            return False
+            print("⚠️ Row counts don't match - migration may have failed")
+        return ok
             
     except Exception as e:
         print(f"❌ Error during verification: {e}")
         return False
-    finally:
-        session.close()
 
 def main():
     """Main migration function"""
+    parser = argparse.ArgumentParser(description="Bulk copy a SQLite database into PostgreSQL")
+    parser.add_argument("--source", help=f"Source database URL (default sqlite:///{DEFAULT_SQLITE_PATH})")
+    parser.add_argument("--target", help="Target database URL (default DATABASE_URL)")
+    parser.add_argument("--mode", choices=MIGRATION_MODES, default="replace",
+                        help="replace: truncate and reload; upsert: merge changed rows into existing data. "
+                             "Chunks commit as they load - a failed run leaves the target partly loaded, re-run to finish")
+    parser.add_argument("--tables", help="Comma separated subset of tables (in replace mode it must include "
+                                         "every table referencing them)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per COPY batch")
+    parser.add_argument("--workers", type=int, default=4, help="Tables copied in parallel")
+    parser.add_argument("--no-create-schema", action="store_true", help="Don't create missing tables first")
+    parser.add_argument("--fix-sequences-only", action="store_true", help="Only reset the target's id sequences")
+    args = parser.parse_args()
+    tables = [name.strip() for name in args.tables.split(",")] if args.tables else None
+    
     print("🚀 Magic Card Scanner Database Migration")
     print("=" * 50)
     
+    if args.fix_sequences_only:
+        target_url = args.target or os.getenv("DATABASE_URL")
+        if not target_url:
+            print("❌ DATABASE_URL environment variable not set")
+            return False
+        fixed = fix_sequences(create_engine(target_url), tables)
+        print(f"✅ Fixed {len(fixed)} sequences")
+        return True
+    
     # Get database engines
-    sqlite_engine, postgres_engine = get_database_engines()
+    sqlite_engine, postgres_engine = get_database_engines(args.source, args.target)
     
     if not sqlite_engine:
         print("❌ Cannot proceed without SQLite database")
@@ -153,15 +157,15 @@ def main():
         return False
     
     # Create tables
-    if not create_tables(postgres_engine):
+    if not args.no_create_schema and not create_tables(postgres_engine):
         return False
     
     # Migrate data
-    if not migrate_data(sqlite_engine, postgres_engine):
+    if not migrate_data(sqlite_engine, postgres_engine, args.mode, tables, args.chunk_size, args.workers):
         return False
     
     # Verify migration
-    if not verify_migration(postgres_engine):
+    if not verify_migration(sqlite_engine, postgres_engine, tables):
         return False
     
     print("\n🎉 Migration completed successfully!")
@@ -169,4 +173,4 @@ def main():
     return True
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)
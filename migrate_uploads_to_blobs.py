@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Move legacy flat uploads (uploads/scan_{id}_{uuid}.jpg) into the content-addressed
+blob store and point their ScanImage rows at the blob. Identical photos collapse
+into one blob. Safe to re-run: rows that already have a blob_hash are skipped.
+
+Usage:
+    python migrate_uploads_to_blobs.py            # dry run
+    python migrate_uploads_to_blobs.py --apply
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from backend.blob_store import normalize_extension, store_blob
+from backend.database import SessionLocal, ScanImage, init_db
+from backend.app import get_uploads_path
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_uploads(apply: bool) -> bool:
+    uploads_dir = get_uploads_path()
+    init_db()
+    db = SessionLocal()
+    moved, deduplicated, missing = 0, 0, 0
+    try:
+        images = db.query(ScanImage).filter(ScanImage.blob_hash.is_(None)).all()
+        print(f"🔍 {len(images)} scan images without a blob in {uploads_dir}")
+        # Several rows can point at the same legacy file
+        migrated = {}
+        for image in images:
+            source = image.file_path
+            if source not in migrated:
+                if not source or not os.path.exists(source):
+                    missing += 1
+                    print(f"⚠️ Missing file for scan image {image.id}: {source}")
+                    continue
+                blob_hash = file_sha256(source)
+                if not apply:
+                    print(f"   {source} -> {blob_hash}")
+                    migrated[source] = (None, None, blob_hash)
+                    continue
+                # store_blob consumes its input, so copy first and only drop the original after commit
+                fd, temp_path = tempfile.mkstemp(dir=uploads_dir, suffix=".part")
+                os.close(fd)
+                shutil.copyfile(source, temp_path)
+                path, filename, was_deduplicated = store_blob(
+                    uploads_dir, temp_path, blob_hash, normalize_extension(source)
+                )
+                deduplicated += was_deduplicated
+                moved += 1
+                migrated[source] = (path, filename, blob_hash)
+            path, filename, blob_hash = migrated[source]
+            if apply:
+                image.file_path = path
+                image.filename = filename
+                image.blob_hash = blob_hash
+
+        if apply:
+            db.commit()
+            for source in migrated:
+                os.remove(source)
+            print(f"✅ Migrated {moved} files ({deduplicated} duplicates collapsed, {missing} missing)")
+        else:
+            print(f"📋 Dry run: {len(migrated)} files would be migrated ({missing} missing). Re-run with --apply")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Migration failed: {e}")
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move legacy uploads into the content-addressed blob store")
+    parser.add_argument("--apply", action="store_true", help="Actually move files and update rows")
+    args = parser.parse_args()
+    sys.exit(0 if migrate_uploads(args.apply) else 1)
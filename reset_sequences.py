@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+
+from backend.db_migration import fix_sequences
 
 def reset_sequences():
     postgres_url = os.getenv("DATABASE_URL")
@@ -7,15 +9,8 @@ def reset_sequences():
         print("❌ DATABASE_URL not set")
         return
     
-    engine = create_engine(postgres_url)
-    with engine.connect() as conn:
-        tables = ['cards', 'scans', 'scan_images', 'scan_results']
-        for table in tables:
-            seq_name = f'{table}_id_seq'
-            query = text(f"SELECT setval('{seq_name}', coalesce((SELECT MAX(id)+1 FROM {table}), 1), false)")
-            conn.execute(query)
-            print(f"✅ Reset sequence for {table}")
-        conn.commit()
+    for table in fix_sequences(create_engine(postgres_url)):
+        print(f"✅ Reset sequence for {table}")
 
 if __name__ == "__main__":
-    reset_sequences() 
\ No newline at end of file
+    reset_sequences()
@@ -1,26 +1,31 @@
 #!/usr/bin/env python3
 """
 Restore card data from JSON backup to the current database.
+Incremental backup manifests (backups/manifests/*.json) are handed to BackupManager.
 """
 
 import json
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
+BATCH_SIZE = 2000
+
+# Defaults the old per-row restore applied when a card omitted these fields
+CARD_DEFAULTS = {"count": 1, "is_example": False, "deleted": False}
+
+
 def get_database_connection():
-    """Get database connection - works with both SQLite (local) and PostgreSQL (Railway)."""
+    """Get a SQLAlchemy engine - works with both SQLite (local) and PostgreSQL (Railway)."""
+    from sqlalchemy import create_engine
+    
     database_url = os.getenv("DATABASE_URL")
     
     if database_url:
         # Railway/Cloud environment with PostgreSQL
-        import psycopg2
-        from sqlalchemy import create_engine
-        
-        # Use SQLAlchemy for PostgreSQL connection
-        engine = create_engine(database_url)
-        return engine
+        return create_engine(database_url)
     else:
         # Local environment with SQLite
         env_mode = os.getenv("ENV_MODE", "production")
@@ -28,32 +33,27 @@ def get_database_connection():
             db_path = Path(__file__).parent / "magic_cards_dev.db"
         else:
             db_path = Path(__file__).parent / "magic_cards.db"
-        import sqlite3
-        return sqlite3.connect(str(db_path))
+        return create_engine(f"sqlite:///{db_path}")
 
-def restore_from_backup(backup_file):
-    """Restore cards from JSON backup file."""
+def restore_from_backup(backup_file, batch_size=BATCH_SIZE):
+    """Restore cards from JSON backup file, or a full backup from an incremental backup manifest."""
     try:
         # Load backup data
         with open(backup_file, 'r') as f:
             backup_data = json.load(f)
         
+        if "database" in backup_data and "uploads" in backup_data:
+            # Incremental backup manifest (backups/manifests/*.json)
+            from backup_manager import BackupManager
+            print(f"📦 Restoring incremental backup: {backup_data.get('backup_name')}")
+            success = BackupManager().restore_backup(backup_file)
+            return {"success": success, "backup_file": backup_data.get("backup_timestamp", "Unknown")}
+        
         print(f"📦 Loading backup from: {backup_file}")
         print(f"📅 Backup timestamp: {backup_data.get('export_timestamp', 'Unknown')}")
         print(f"📊 Cards in backup: {len(backup_data.get('cards', []))}")
         
-        # Get database connection
-        conn = get_database_connection()
-        
-        # Handle different connection types
-        if hasattr(conn, 'connect'):
-            # SQLAlchemy engine
-            engine = conn
-            with engine.connect() as connection:
-                return _restore_cards_to_connection(connection, backup_data, is_sqlalchemy=True)
-        else:
-            # Direct connection (SQLite)
-            return _restore_cards_to_connection(conn, backup_data, is_sqlalchemy=False)
+        return _restore_cards(get_database_connection(), backup_data, backup_file, batch_size)
         
     except Exception as e:
         print(f"❌ Error restoring backup: {str(e)}")
@@ -62,135 +62,78 @@ def restore_from_backup(backup_file):
             "error": str(e)
         }
 
-def _restore_cards_to_connection(connection, backup_data, is_sqlalchemy=False):
-    """Restore cards to the given database connection."""
+def _convert_value(column, value):
+    """Coerce a JSON value to what the column type expects (SQLite rejects datetime strings)"""
+    from sqlalchemy import Boolean, DateTime
+    
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Boolean):
+        return value.lower() in ("t", "true", "1") if isinstance(value, str) else bool(value)
+    return value
+
+def _restore_cards(engine, backup_data, backup_file, batch_size=BATCH_SIZE):
+    """
+    Replace all cards with the backup's cards in committed batches (multi-row inserts).
+    Progress is kept in <backup_file>.restore_state, so re-running an interrupted
+    restore continues after the last committed batch instead of starting over.
+    """
+    from sqlalchemy import MetaData, Table, select
+    
+    state_path = f"{backup_file}.restore_state"
+    state = {"cleared": False, "restored": 0}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        print(f"⏩ Resuming restore after {state['restored']} cards")
+    
+    def save_state():
+        with open(state_path, "w") as f:
+            json.dump(state, f)
+    
     try:
-        # Clear existing cards (but keep scans)
-        print("🗑️  Clearing existing cards...")
-        if is_sqlalchemy:
-            from sqlalchemy import text
-            connection.execute(text("DELETE FROM cards"))
-        else:
-            connection.execute("DELETE FROM cards")
-        
-        # Insert cards from backup
+        cards_table = Table("cards", MetaData(), autoload_with=engine)
+        columns = [column for column in cards_table.columns if column.name != "id"]
         cards = backup_data.get('cards', [])
-        print(f"📥 Restoring {len(cards)} cards...")
+        resuming = state["restored"] > 0
         
-        for i, card in enumerate(cards):
-            if i % 100 == 0:
-                print(f"   Progress: {i}/{len(cards)} cards processed")
-            
-            if is_sqlalchemy:
-                from sqlalchemy import text
-                insert_sql = text("""
-                    INSERT INTO cards (
-                        name, set_code, set_name, collector_number, rarity, mana_cost,
-                        type_line, oracle_text, flavor_text, power, toughness, colors,
-                        image_url, price_usd, price_eur, price_tix, count, first_seen,
-                        last_seen, notes, condition, is_example, duplicate_group,
-                        stack_count, stack_id, unique_id, deleted, deleted_at, scan_id,
-                        scan_result_id, import_status, added_method
-                    ) VALUES (
-                        :name, :set_code, :set_name, :collector_number, :rarity, :mana_cost,
-                        :type_line, :oracle_text, :flavor_text, :power, :toughness, :colors,
-                        :image_url, :price_usd, :price_eur, :price_tix, :count, :first_seen,
-                        :last_seen, :notes, :condition, :is_example, :duplicate_group,
-                        :stack_count, :stack_id, :unique_id, :deleted, :deleted_at, :scan_id,
-                        :scan_result_id, :import_status, :added_method
-                    )
-                """)
-                values = {
-                    'name': card.get('name'),
-                    'set_code': card.get('set_code'),
-                    'set_name': card.get('set_name'),
-                    'collector_number': card.get('collector_number'),
-                    'rarity': card.get('rarity'),
-                    'mana_cost': card.get('mana_cost'),
-                    'type_line': card.get('type_line'),
-                    'oracle_text': card.get('oracle_text'),
-                    'flavor_text': card.get('flavor_text'),
-                    'power': card.get('power'),
-                    'toughness': card.get('toughness'),
-                    'colors': card.get('colors'),
-                    'image_url': card.get('image_url'),
-                    'price_usd': card.get('price_usd'),
-                    'price_eur': card.get('price_eur'),
-                    'price_tix': card.get('price_tix'),
-                    'count': card.get('count', 1),
-                    'first_seen': card.get('first_seen'),
-                    'last_seen': card.get('last_seen'),
-                    'notes': card.get('notes'),
-                    'condition': card.get('condition'),
-                    'is_example': bool(card.get('is_example', 0)),
-                    'duplicate_group': card.get('duplicate_group'),
-                    'stack_count': card.get('stack_count'),
-                    'stack_id': card.get('stack_id'),
-                    'unique_id': card.get('unique_id'),
-                    'deleted': bool(card.get('deleted', 0)),
-                    'deleted_at': card.get('deleted_at'),
-                    'scan_id': card.get('scan_id'),
-                    'scan_result_id': card.get('scan_result_id'),
-                    'import_status': card.get('import_status'),
-                    'added_method': card.get('added_method')
-                }
-                connection.execute(insert_sql, values)
-            else:
-                insert_sql = """
-                    INSERT INTO cards (
-                        name, set_code, set_name, collector_number, rarity, mana_cost,
-                        type_line, oracle_text, flavor_text, power, toughness, colors,
-                        image_url, price_usd, price_eur, price_tix, count, first_seen,
-                        last_seen, notes, condition, is_example, duplicate_group,
-                        stack_count, stack_id, unique_id, deleted, deleted_at, scan_id,
-                        scan_result_id, import_status, added_method
-                    ) VALUES (
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                    )
-                """
-                values = (
-                    card.get('name'),
-                    card.get('set_code'),
-                    card.get('set_name'),
-                    card.get('collector_number'),
-                    card.get('rarity'),
-                    card.get('mana_cost'),
-                    card.get('type_line'),
-                    card.get('oracle_text'),
-                    card.get('flavor_text'),
-                    card.get('power'),
-                    card.get('toughness'),
-                    card.get('colors'),
-                    card.get('image_url'),
-                    card.get('price_usd'),
-                    card.get('price_eur'),
-                    card.get('price_tix'),
-                    card.get('count', 1),
-                    card.get('first_seen'),
-                    card.get('last_seen'),
-                    card.get('notes'),
-                    card.get('condition'),
-                    card.get('is_example', 0),
-                    card.get('duplicate_group'),
-                    card.get('stack_count'),
-                    card.get('stack_id'),
-                    card.get('unique_id'),
-                    card.get('deleted', 0),
-                    card.get('deleted_at'),
-                    card.get('scan_id'),
-                    card.get('scan_result_id'),
-                    card.get('import_status'),
-                    card.get('added_method')
-                )
-                connection.execute(insert_sql, values)
+        if not state["cleared"]:
+            # Clear existing cards (but keep scans)
+            print("🗑️  Clearing existing cards...")
+            with engine.begin() as connection:
+                connection.execute(cards_table.delete())
+            state["cleared"] = True
+            save_state()
         
-        # Commit the transaction
-        if is_sqlalchemy:
-            connection.commit()
-        else:
-            connection.commit()
+        print(f"📥 Restoring {len(cards)} cards in batches of {batch_size}...")
+        started = time.perf_counter()
+        for start in range(state["restored"], len(cards), batch_size):
+            rows = [
+                {
+                    column.name: _convert_value(column, card.get(column.name, CARD_DEFAULTS.get(column.name)))
+                    for column in columns
+                }
+                for card in cards[start:start + batch_size]
+            ]
+            with engine.begin() as connection:
+                if resuming:
+                    # The batch may have committed just before the interruption
+                    unique_ids = [row["unique_id"] for row in rows if row.get("unique_id")]
+                    existing = set(connection.execute(
+                        select(cards_table.c.unique_id).where(cards_table.c.unique_id.in_(unique_ids))
+                    ).scalars())
+                    rows = [row for row in rows if row.get("unique_id") not in existing]
+                    resuming = False
+                if rows:
+                    connection.execute(cards_table.insert(), rows)
+            state["restored"] = min(start + batch_size, len(cards))
+            save_state()
+            print(f"   Progress: {state['restored']}/{len(cards)} cards restored")
         
-        print(f"✅ Successfully restored {len(cards)} cards to database!")
+        os.remove(state_path)
+        print(f"✅ Successfully restored {len(cards)} cards to database in {time.perf_counter() - started:.1f}s!")
         return {
             "success": True,
             "cards_restored": len(cards),
@@ -198,7 +141,7 @@ def _restore_cards_to_connection(connection, backup_data, is_sqlalchemy=False):
         }
         
     except Exception as e:
-        print(f"❌ Error during restore: {str(e)}")
+        print(f"❌ Error during restore: {str(e)} - run the restore again to resume")
         return {
             "success": False,
             "error": str(e)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Incremental image sync between uploads volumes.
+
+Both sides are described by a manifest of (path, size, mtime, sha256): a local
+directory keeps its own in .sync_manifest.json, a deployment serves it at
+/api/sync/manifest. Only files that are missing or whose content differs on the
+target are transferred, in parallel over one pooled connection per side. Every
+file lands atomically and is checksum-verified, so an interrupted sync resumes by
+simply running it again - completed files already show up in the target manifest.
+
+Usage:
+    python sync_images.py uploads https://mtg-scan-production.up.railway.app
+    python sync_images.py https://mtg-scan-development.up.railway.app https://mtg-scan-production.up.railway.app
+    python sync_images.py uploads ../magic-card-scanner-production/uploads --dry-run
+    python sync_images.py uploads $RAILWAY_APP_URL --dry-run --report sync_report.json
+
+SYNC_TOKEN is sent as a bearer token; deployments refuse /api/sync requests without it.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from backend.sync_manifest import SyncManifest, diff_manifests, hash_file, paths_to_transfer, volume_path
+
+TRANSFER_ATTEMPTS = 3
+REQUEST_TIMEOUT_SECONDS = 60
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class LocalVolume:
+    """Uploads directory on this machine"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest = SyncManifest(root)
+
+    def __str__(self):
+        return self.root
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        os.makedirs(self.root, exist_ok=True)
+        return self.manifest.refresh()
+
+    def read(self, path: str) -> BinaryIO:
+        return open(volume_path(self.root, path), "rb")
+
+    def write(self, path: str, data: BinaryIO, sha256: str):
+        destination = volume_path(self.root, path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(data, out)
+            if hash_file(temp_path) != sha256:
+                raise ValueError(f"Checksum mismatch for {path}")
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.manifest.record(path, sha256)
+
+    def close(self):
+        self.manifest.save()
+
+
+class RemoteVolume:
+    """Uploads volume of a deployment, through its /api/sync endpoints"""
+
+    def __init__(self, base_url: str, workers: int):
+        self.base_url = base_url.rstrip("/")
+        headers = {"authorization": f"Bearer {os.getenv('SYNC_TOKEN')}"} if os.getenv("SYNC_TOKEN") else {}
+        self.client = httpx.Client(
+            headers=headers,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers)
+        )
+
+    def __str__(self):
+        return self.base_url
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        response = self.client.get(f"{self.base_url}/api/sync/manifest")
+        response.raise_for_status()
+        return response.json()["files"]
+
+    def read(self, path: str) -> BinaryIO:
+        """Download into a spooled temp file (memory for small images, disk beyond that)"""
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        with self.client.stream("GET", f"{self.base_url}/api/sync/files/{path}") as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                spool.write(chunk)
+        spool.seek(0)
+        return spool
+
+    def write(self, path: str, data: BinaryIO, sha256: str):
+        # Streamed in chunks; Content-Length lets the remote reject oversized files up front
+        size = data.seek(0, os.SEEK_END)
+        data.seek(0)
+        response = self.client.put(
+            f"{self.base_url}/api/sync/files/{path}",
+            content=iter(lambda: data.read(CHUNK_SIZE), b""),
+            headers={"x-content-sha256": sha256, "content-length": str(size)}
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self.client.close()
+
+
+def open_volume(location: str, workers: int):
+    if location.startswith(("http://", "https://")):
+        return RemoteVolume(location, workers)
+    return LocalVolume(location)
+
+
+def transfer_file(source, target, path: str, sha256: str) -> int:
+    """Copy one file, retrying transient failures; returns bytes transferred"""
+    for attempt in range(1, TRANSFER_ATTEMPTS + 1):
+        try:
+            with source.read(path) as data:
+                target.write(path, data, sha256)
+                return data.tell()
+        except (httpx.HTTPError, OSError, ValueError) as e:
+            if attempt == TRANSFER_ATTEMPTS:
+                raise
+            print(f"⚠️ {path}: {e} - retrying ({attempt}/{TRANSFER_ATTEMPTS})")
+            time.sleep(attempt)
+
+
+def print_report(diff: Dict[str, Any], limit: int = 10):
+    print(f"📊 Missing on target: {len(diff['missing'])}")
+    print(f"📊 Changed: {len(diff['changed'])}")
+    print(f"📊 Unchanged: {diff['unchanged']}")
+    print(f"📊 Only on target (left alone): {len(diff['extra'])}")
+    print(f"📦 To transfer: {diff['transfer_bytes'] / (1024 * 1024):.1f} MB")
+    for path in paths_to_transfer(diff)[:limit]:
+        print(f"   {path}")
+    remaining = len(paths_to_transfer(diff)) - limit
+    if remaining > 0:
+        print(f"   ... and {remaining} more")
+
+
+def sync_images(source_location: str, target_location: str, workers: int = 8, dry_run: bool = False,
+                report_path: str = None) -> bool:
+    source = open_volume(source_location, workers)
+    target = open_volume(target_location, workers)
+    started = time.perf_counter()
+    try:
+        print(f"🔄 Syncing images {source} -> {target}")
+        source_files = source.files()
+        target_files = target.files()
+        diff = diff_manifests(source_files, target_files)
+        print(f"📋 Manifests: {len(source_files)} source files, {len(target_files)} target files "
+              f"({time.perf_counter() - started:.1f}s)")
+        print_report(diff)
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump({"source": str(source), "target": str(target), "dry_run": dry_run, **diff}, f, indent=2)
+            print(f"📝 Report written to {report_path}")
+
+        paths = paths_to_transfer(diff)
+        if dry_run or not paths:
+            print("✅ Dry run - nothing transferred" if dry_run else "✅ Target is up to date")
+            return True
+
+        transferred, transferred_bytes, failed = 0, 0, []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(transfer_file, source, target, path, source_files[path]["sha256"]): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    transferred_bytes += future.result()
+                    transferred += 1
+                    if transferred % 100 == 0:
+                        print(f"📤 {transferred}/{len(paths)} files transferred")
+                except Exception as e:
+                    failed.append(path)
+                    print(f"❌ Failed to transfer {path}: {e}")
+
+        elapsed = time.perf_counter() - started
+        print(f"📈 Transferred {transferred} files ({transferred_bytes / (1024 * 1024):.1f} MB) in {elapsed:.1f}s")
+        if failed:
+            print(f"⚠️ {len(failed)} files failed - run the sync again to resume")
+            return False
+        print("🎉 Sync complete")
+        return True
+    finally:
+        source.close()
+        target.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incrementally sync uploads volumes (directory or deployment URL)")
+    parser.add_argument("source", help="Source uploads directory or deployment URL")
+    parser.add_argument("target", help="Target uploads directory or deployment URL")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel transfers")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be transferred")
+    parser.add_argument("--report", help="Write the diff report as JSON to this file")
+    args = parser.parse_args()
+    return 0 if sync_images(args.source, args.target, args.workers, args.dry_run, args.report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,31 +19,19 @@ if [ ! -d "$PROD_UPLOADS" ]; then
     exit 1
 fi
 
-# Count files before sync
-DEV_COUNT=$(ls "$DEV_UPLOADS" | grep -v ".gitkeep" | wc -l)
-PROD_COUNT=$(ls "$PROD_UPLOADS" | grep -v ".gitkeep" | wc -l)
+# Copy only new or changed files (manifest diff, checksum verified); extra args such as --dry-run pass through
+python sync_images.py "$DEV_UPLOADS" "$PROD_UPLOADS" "$@"
+STATUS=$?
 
-echo "📊 Before sync:"
-echo "   Development: $DEV_COUNT files"
-echo "   Production: $PROD_COUNT files"
-
-# Copy files (will overwrite if newer)
-echo "📁 Copying files..."
-rsync -av --exclude=".gitkeep" "$DEV_UPLOADS" "$PROD_UPLOADS"
-
-# Count files after sync
-NEW_PROD_COUNT=$(ls "$PROD_UPLOADS" | grep -v ".gitkeep" | wc -l)
-
-echo "📊 After sync:"
-echo "   Production: $NEW_PROD_COUNT files"
-
-if [ "$NEW_PROD_COUNT" -eq "$DEV_COUNT" ]; then
+if [ $STATUS -eq 0 ]; then
     echo "✅ Upload sync completed successfully"
 else
-    echo "⚠️ Sync completed but file counts don't match"
+    echo "⚠️ Sync finished with errors - run it again to resume"
 fi
 
 echo ""
 echo "💡 To test image serving:"
 echo "   Development: http://localhost:8001/uploads/"
-echo "   Production:  http://localhost:8000/uploads/" 
\ No newline at end of file
+echo "   Production:  http://localhost:8000/uploads/"
+
+exit $STATUS 
\ No newline at end of file
@@ -3,17 +3,16 @@
 Script to update card images and data from Scryfall API
 """
 
-import requests
 import sqlite3
-import time
 import json
 
+from backend.scryfall_client import get_scryfall_client
+
 def fetch_card_data(card_name):
     """Fetch card data from Scryfall API"""
     try:
         # Search for the card
-        search_url = f"https://api.scryfall.com/cards/search?q={card_name}"
-        response = requests.get(search_url)
+        response = get_scryfall_client().get("/cards/search", params={"q": card_name})
         
         if response.status_code == 200:
             data = response.json()
@@ -78,9 +77,6 @@ def update_database():
             print(f"  ✓ Updated {card_name}")
         else:
             print(f"  ✗ Failed to update {card_name}")
-        
-        # Be nice to the API
-        time.sleep(0.1)
     
     conn.commit()
     conn.close()